@@ -3,13 +3,33 @@ NEXA AI Flask Web Application
 Grade 9 Hybrid AI Revision Platform
 """
 
-from flask import Flask, render_template, request, jsonify, session
-import json
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, session, stream_with_context
+from datetime import datetime
+from functools import wraps
+import hmac
 import os
-import time
-import math
+import shutil
 import socket
-from datetime import datetime
+import threading
+import time
+import bulk
+import content
+import engine
+import fitting
+import predictor
+import progress
+import questions
+import ranking
+import reflections
+import sync
+from compression import init_compression
+from content import get_pack
+from jobs import QueueFull, init_jobs, job_type
+from memory import init_memory
+from models import StudentModel
+from ratelimit import init_rate_limits
+from json_provider import FastJSONProvider
+from storage import get_store, new_revision, new_student
 try:
     from dotenv import load_dotenv  # type: ignore
 except Exception:
@@ -21,36 +41,19 @@ except Exception:
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-
-DATA_FILE = "nexa-ai-student-data.json"
-
-# ==================
-# SUBJECT & CONTENT
-# ==================
-SUBJECT_TOPICS = {
-    "math": ["linear equations", "algebra", "ratio"],
-    "biology": ["cells", "photosynthesis", "respiration"],
-    "chemistry": ["states of matter", "separation of mixtures"],
-    "physics": ["force", "energy", "motion"],
-    "geography": ["weather", "climate"]
-}
-
-SIMPLE_EXPLANATIONS = {
-    "linear equations": "A linear equation has power of x as 1. Example: 2x + 3 = 7.",
-    "algebra": "Algebra uses letters to represent numbers.",
-    "ratio": "Ratio compares two quantities.",
-    "cells": "Cells are the basic units of life.",
-    "photosynthesis": "Plants use sunlight to make food.",
-    "respiration": "Respiration releases energy from food.",
-    "states of matter": "Matter exists as solid, liquid, or gas.",
-    "separation of mixtures": "Mixtures can be separated by filtration or evaporation.",
-    "force": "A force is a push or pull.",
-    "energy": "Energy is the ability to do work.",
-    "motion": "Motion is a change in position.",
-    "weather": "Weather is daily atmospheric condition.",
-    "climate": "Climate is average weather over long time."
-}
+app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+init_compression(app)
+init_rate_limits(app)
+jobs = init_jobs(app)
+app.config.setdefault('JOBS_DIR', os.getenv('JOBS_DIR', 'nexa-ai-jobs'))
+app.config.setdefault('RANK_REFRESH', ranking.RANK_REFRESH)
+app.config.setdefault('CONTENT_WATCH', content.CONTENT_WATCH)
+# Largest request body accepted, except by the streamed admin import
+app.config.setdefault('MAX_BODY_BYTES', int(os.getenv('MAX_BODY_BYTES', 1 << 20)))
+# Reload NEXA_CONTENT_PACK in the background when it changes
+app.extensions['content_watcher'] = content.watch_pack(interval=app.config['CONTENT_WATCH'])
 
 # ==================
 # UTILITIES
@@ -63,78 +66,137 @@ def is_online():
     except:
         return False
 
-def load_student():
-    """Load student data with error handling."""
-    try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                return data
-    except json.JSONDecodeError:
-        print("⚠️ Corrupted data file. Starting fresh.")
-    except IOError as e:
-        print(f"⚠️ Error loading file: {e}")
-    
-    return {
-        "username": "Student",
-        "baseline_done": False,
-        "topic_strength": {},
-        "mistakes": {},
-        "study_log": {},
-        "reflections": []
-    }
-
-def save_student(data):
-    """Save student data with error handling."""
-    try:
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
-        return True
-    except IOError as e:
-        print(f"❌ Error saving data: {e}")
-        return False
+# Students are cached per worker as StudentModel records in an LRU kept
+# under the memory budgets; the session only remembers which student it
+# belongs to.
+DEFAULT_STUDENT_ID = "default"
+_student_cache = init_memory(app)
+# Requests for one student take its lock around every change and save,
+# so they never interleave edits to the shared cached model
+_student_locks = [threading.RLock() for _ in range(64)]
+_rank_index = ranking.RankIndex()
+
+def student_lock(student_id):
+    """The lock guarding a student's cached model in this worker."""
+    return _student_locks[hash(student_id) % len(_student_locks)]
+
+def load_cached_student(student_id):
+    """Get a student's cached model, loading it on first use."""
+    student = cached_student(student_id)
+    if student is None:
+        student = StudentModel.from_dict(get_store().load(student_id) or new_student())
+        _student_cache.put(student_id, student)
+    return student
+
+def cached_student(student_id):
+    """A student's model if this worker has it cached, rebuilt after a content reload."""
+    student = _student_cache.get(student_id)
+    if student is not None and not student.is_current():
+        # Subject ids may have moved with the new pack
+        saved, student = student.saved, StudentModel.from_dict(student.to_dict())
+        student.saved = saved
+        _student_cache.put(student_id, student)
+    return student
+
+def fresh_student(student_id):
+    """A student's cached model, first brought up to date with the stored record."""
+    student = load_cached_student(student_id)
+    stored = get_store().load(student_id)
+    if stored is not None and student.is_stale(stored):
+        student = student.rebase(stored)
+        reflections.stats(student)
+        _student_cache.put(student_id, student)
+    return student
+
+def store_student(student_id, student, replace=False):
+    """Save a student to the worker cache and the configured store; returns the saved model.
+
+    Unless ``replace``, a stored record written elsewhere since this copy
+    was loaded (a decay fit, an import, another worker) is kept and this
+    copy's changes are applied on top of it, so neither side is lost.
+    """
+    store = get_store()
+    if not replace:
+        stored = store.load(student_id)
+        if stored is not None and student.is_stale(stored):
+            student = student.rebase(stored)
+            reflections.stats(student)
+    progress.record(student)
+    student.saved = (student.version, new_revision(), len(student.reflections))
+    _student_cache.put(student_id, student)
+    store.save(student_id, student.to_dict())
+    if _rank_index.built is not None:
+        _rank_index.update(student_id, ranking.class_of(student), engine.readiness_score(student))
+    return student
+
+def rank_index():
+    """The class ranking index, rebuilt from the store when it is stale."""
+    return _rank_index.refresh(lambda: get_store().iter_students(), app.config['RANK_REFRESH'])
+
+UNCAPPED_ENDPOINTS = {'api_admin_import'}
+
+@app.before_request
+def cap_request_body():
+    """Refuse request bodies over MAX_BODY_BYTES; reads past it fail too."""
+    if request.endpoint in UNCAPPED_ENDPOINTS:
+        return None
+    request.max_content_length = app.config['MAX_BODY_BYTES']
+    if (request.content_length or 0) > request.max_content_length:
+        return jsonify({"status": "error", "message": "Request body too large"}), 413
+    return None
+
+def admin_required(view):
+    """Allow a route only with the configured X-Admin-Token header."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = app.config.get('ADMIN_TOKEN')
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not token or not hmac.compare_digest(supplied, token):
+            return jsonify({"status": "error", "message": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def locks_student(view):
+    """Run a route that changes the session's student while holding its lock."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with student_lock(session.setdefault('student_id', DEFAULT_STUDENT_ID)):
+            return view(*args, **kwargs)
+    return wrapper
 
 def get_student():
-    """Get current student session data."""
-    if 'student' not in session:
-        session['student'] = load_student()
-    return session['student']
-
-def save_session_student(data):
-    """Save student to session and file."""
-    session['student'] = data
-    save_student(data)
-
-def forgetting_retention(topic, student_data):
-    """Calculate retention based on forgetting curve."""
-    try:
-        last_time = student_data["study_log"].get(topic, time.time())
-        hours = (time.time() - last_time) / 3600
-        retention = math.exp(-0.15 * hours)
-        return round(retention, 2)
-    except:
-        return 1.0
+    """Get the current student's cached model."""
+    return load_cached_student(session.setdefault('student_id', DEFAULT_STUDENT_ID))
 
-def readiness_score(student_data):
-    """Calculate overall readiness score."""
-    try:
-        if not student_data["topic_strength"]:
-            return 0
-        avg = sum(student_data["topic_strength"].values()) / len(student_data["topic_strength"])
-        return int(avg * 100)
-    except:
-        return 0
+def save_session_student(student, replace=False):
+    """Save the current student to the worker cache and file; returns the saved model."""
+    return store_student(session.setdefault('student_id', DEFAULT_STUDENT_ID), student, replace)
 
-def register_mistake(topic, student_data):
-    """Register a mistake and lower topic strength."""
-    try:
-        student_data["mistakes"].setdefault(topic, 0)
-        student_data["mistakes"][topic] += 1
-        student_data["topic_strength"][topic] = max(
-            0.1, student_data["topic_strength"].get(topic, 0.5) - 0.1
-        )
-    except Exception as e:
-        print(f"Error registering mistake: {e}")
+# Streamed listings send a header line, then one row per line, flushed
+# STREAM_BATCH rows at a time so big curricula start arriving at once
+STREAM_BATCH = 256
+
+def wants_stream():
+    """True for ?stream=1 or a request that prefers application/x-ndjson."""
+    stream = request.args.get('stream', '').lower()
+    if stream:
+        return stream in ('1', 'true', 'ndjson')
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def ndjson_response(header, rows):
+    """Stream ``header`` and then each row of a generator as NDJSON."""
+    def lines():
+        yield app.json.dumps(header) + "\n"
+        batch = []
+        for row in rows:
+            batch.append(app.json.dumps(row))
+            if len(batch) >= STREAM_BATCH:
+                yield "\n".join(batch) + "\n"
+                batch = []
+        if batch:
+            yield "\n".join(batch) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
 
 # ==================
 # ROUTES
@@ -156,9 +218,9 @@ def api_student_info():
         return jsonify({
             "status": "success",
             "data": {
-                "username": student.get("username", "Student"),
-                "baseline_done": student["baseline_done"],
-                "readiness_score": readiness_score(student),
+                "username": student.username or "Student",
+                "baseline_done": student.baseline_done,
+                "readiness_score": engine.readiness_score(student),
                 "online": is_online()
             }
         })
@@ -166,12 +228,13 @@ def api_student_info():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/baseline', methods=['POST'])
+@locks_student
 def api_baseline():
     """Complete baseline assessment."""
     try:
         student = get_student()
         
-        if student["baseline_done"]:
+        if student.baseline_done:
             return jsonify({"status": "error", "message": "Baseline already completed"}), 400
         
         data = request.get_json()
@@ -179,75 +242,191 @@ def api_baseline():
         
         if not answers:
             return jsonify({"status": "error", "message": "No answers provided"}), 400
+        if not isinstance(answers, dict):
+            return jsonify({"status": "error", "message": "answers must be an object"}), 400
         
-        score = 0
-        for topic, answer in answers.items():
-            if len(answer.strip()) > 5:
-                student["topic_strength"][topic] = 0.7
-                score += 1
-            else:
-                student["topic_strength"][topic] = 0.3
-        
-        student["baseline_done"] = True
+        readiness = engine.apply_baseline(student, answers)
         save_session_student(student)
         
-        readiness = int((score / len(answers)) * 100) if answers else 0
-        
         return jsonify({
             "status": "success",
             "readiness_score": readiness,
             "message": f"Baseline completed! Initial Readiness: {readiness}%"
         })
     
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/dashboard')
 def api_dashboard():
-    """Get dashboard data."""
+    """Get dashboard data; ?since=<version> sends only the topics changed after it.
+
+    With ?stream=1 the summary is the first NDJSON line and each topic follows on its own.
+    """
     try:
         student = get_student()
-        
-        topics_data = []
-        for topic, strength in student["topic_strength"].items():
-            retention = forgetting_retention(topic, student)
-            topics_data.append({
-                "topic": topic,
-                "strength": round(strength, 2),
-                "retention": retention,
-                "mistakes": student["mistakes"].get(topic, 0)
-            })
+        since = request.args.get('since', type=int)
+        if wants_stream():
+            full, rows = engine.iter_dashboard_topics(student, since)
+            return ndjson_response({
+                "status": "success",
+                "online": is_online(),
+                "readiness_score": engine.readiness_score(student),
+                "version": student.version,
+                "full": full
+            }, rows)
+        full, topics_data = engine.dashboard_topics(student, since)
         
         return jsonify({
             "status": "success",
             "data": {
                 "online": is_online(),
-                "readiness_score": readiness_score(student),
+                "readiness_score": engine.readiness_score(student),
+                "version": student.version,
+                "full": full,
                 "topics": topics_data
             }
         })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/dashboard/subjects')
+def api_dashboard_subjects():
+    """Get per-subject dashboard rollups."""
+    try:
+        student = get_student()
+        return jsonify({
+            "status": "success",
+            "data": {
+                "readiness_score": engine.readiness_score(student),
+                "subjects": engine.subject_summary(student)
+            }
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+def class_standing(student):
+    """The session student's standing in their class."""
+    student_id = session.setdefault('student_id', DEFAULT_STUDENT_ID)
+    index = rank_index()
+    standing = index.standing(student_id)
+    if standing is None:
+        # Saved by another worker since the last rebuild
+        index.update(student_id, ranking.class_of(student), engine.readiness_score(student))
+        standing = index.standing(student_id)
+    return standing
+
+@app.route('/api/class')
+def api_class():
+    """The student's rank and percentile by readiness within their class."""
+    try:
+        return jsonify({"status": "success", "data": class_standing(get_student())})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/class', methods=['POST'])
+@locks_student
+def api_class_join():
+    """Join a class: {"class_id": ...}."""
+    try:
+        student = get_student()
+        class_id = str((request.get_json(silent=True) or {}).get('class_id', '')).strip()
+        if not class_id or len(class_id) > 64:
+            return jsonify({"status": "error", "message": "class_id is required"}), 400
+        student.extra = dict(student.extra or {}, class_id=class_id)
+        student.touch()
+        student = save_session_student(student)
+        return jsonify({"status": "success", "data": class_standing(student)})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/progress')
+def api_progress():
+    """Readiness and subject strength history for charts: ?range=6h|7d|3m|1y|all."""
+    try:
+        seconds = progress.parse_range(request.args.get('range'))
+        resolution, points = progress.history(get_student(), seconds,
+                                              resolution=request.args.get('resolution'))
+        return jsonify({
+            "status": "success",
+            "data": {
+                "range": seconds,
+                "resolution": resolution,
+                "subjects": get_pack().subject_names,
+                "points": points
+            }
+        })
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/quiz/question')
+@locks_student
+def api_quiz_question():
+    """Draw the next unseen question for a topic (the weakest by default).
+
+    The draw only moves the cached model's question state, which is saved
+    with the next answer, so fetching questions never writes to the store.
+    """
+    try:
+        student = get_student()
+        
+        if not len(student):
+            return jsonify({"status": "error", "message": "No topics to quiz"}), 400
+        
+        topic = request.args.get('topic') or engine.weakest_topics(student, 1)[0]
+        if not student.has_topic(topic):
+            return jsonify({"status": "error", "message": "Invalid topic"}), 400
+        
+        question = questions.draw(student, topic)
+        if question is None:
+            data = {"id": None, "topic": topic, "difficulty": 1, "prompt": f"Explain: {topic}"}
+        else:
+            data = {"id": question.qid, "topic": topic, "difficulty": question.difficulty,
+                    "prompt": question.prompt}
+        return jsonify({"status": "success", "data": data})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+def quiz_topic(student, topic, question_id=None):
+    """(topic, keywords) being answered; ValueError for an unknown question or topic."""
+    keywords = None
+    if question_id is not None:
+        bank = questions.get_bank()
+        if not isinstance(question_id, int) or not 0 <= question_id < len(bank):
+            raise ValueError("Invalid question")
+        question = bank.question(question_id)
+        topic, keywords = question.topic, question.keywords
+    if not topic or not student.has_topic(topic):
+        raise ValueError("Invalid topic")
+    return topic, keywords
+
 @app.route('/api/quiz', methods=['POST'])
+@locks_student
 def api_quiz():
     """Process quiz answer."""
     try:
         student = get_student()
         
-        if not student["topic_strength"]:
+        if not len(student):
             return jsonify({"status": "error", "message": "No topics to quiz"}), 400
         
         data = request.get_json()
         topic = data.get('topic')
         answer = data.get('answer', '').strip().lower()
         
-        if not topic or topic not in student["topic_strength"]:
-            return jsonify({"status": "error", "message": "Invalid topic"}), 400
+        try:
+            topic, keywords = quiz_topic(student, topic, data.get('question_id'))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        correct = engine.answer_quiz(student, topic, answer, keywords=keywords)
+        save_session_student(student)
         
         if not answer:
-            register_mistake(topic, student)
-            save_session_student(student)
             return jsonify({
                 "status": "success",
                 "correct": False,
@@ -255,24 +434,19 @@ def api_quiz():
                 "online": is_online()
             })
         
-        if topic in answer:
-            student["topic_strength"][topic] += 0.05
-            save_session_student(student)
+        if correct:
             return jsonify({
                 "status": "success",
                 "correct": True,
                 "explanation": "✅ Great understanding!"
             })
         else:
-            register_mistake(topic, student)
-            student["study_log"][topic] = time.time()
-            save_session_student(student)
             
             explanation = "❌ Not quite right. "
             if is_online():
                 explanation += f"Advanced tip for {topic}: This is a deeper concept related to fundamental science principles."
             else:
-                explanation += f"Simple explanation: {SIMPLE_EXPLANATIONS.get(topic, 'Topic not found')}"
+                explanation += f"Simple explanation: {get_pack().explanations.get(topic, 'Topic not found')}"
             
             return jsonify({
                 "status": "success",
@@ -286,29 +460,22 @@ def api_quiz():
 
 @app.route('/api/study-plan')
 def api_study_plan():
-    """Get personalized study plan."""
+    """Get personalized study plan; ?n=0 plans every topic, ?stream=1 sends NDJSON."""
     try:
         student = get_student()
         
-        if not student["topic_strength"]:
+        if not len(student):
             return jsonify({"status": "error", "message": "Complete baseline first"}), 400
         
-        ranked = sorted(student["topic_strength"], key=lambda t: student["topic_strength"][t])
-        
-        plan = []
-        for topic in ranked[:5]:
-            retention = forgetting_retention(topic, student)
-            strength = round(student["topic_strength"][topic], 2)
-            plan.append({
-                "topic": topic,
-                "strength": strength,
-                "retention": retention,
-                "priority": "High" if strength < 0.4 else "Medium" if strength < 0.7 else "Low"
-            })
-        
+        n = request.args.get('n', 5, type=int)
+        n = n if n > 0 else None
+        if wants_stream():
+            return ndjson_response({"status": "success",
+                                    "count": len(student) if n is None else min(n, len(student))},
+                                   engine.iter_study_plan(student, n))
         return jsonify({
             "status": "success",
-            "data": plan
+            "data": engine.study_plan(student, n)
         })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -319,14 +486,15 @@ def api_exam_predictor():
     try:
         student = get_student()
         
-        if not student["topic_strength"]:
+        if not len(student):
             return jsonify({"status": "error", "message": "No data available"}), 400
         
-        predicted = sorted(student["topic_strength"], key=lambda t: student["topic_strength"][t])[:3]
+        ranked = predictor.ranking(student)[:3]
         
         return jsonify({
             "status": "success",
-            "data": predicted
+            "data": [topic for topic, _ in ranked],
+            "scores": [{"topic": topic, "score": score} for topic, score in ranked]
         })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -344,7 +512,7 @@ def api_explain():
         if is_online():
             explanation = f"🌐 Advanced explanation for {topic}: This topic involves complex principles in science and has real-world applications."
         else:
-            explanation = f"📴 {SIMPLE_EXPLANATIONS.get(topic, 'Topic not found in database.')}"
+            explanation = f"📴 {get_pack().explanations.get(topic, 'Topic not found in database.')}"
         
         return jsonify({
             "status": "success",
@@ -355,6 +523,7 @@ def api_explain():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/reflection', methods=['POST'])
+@locks_student
 def api_reflection():
     """Save reflection."""
     try:
@@ -365,10 +534,7 @@ def api_reflection():
         if not entry:
             return jsonify({"status": "error", "message": "Reflection cannot be empty"}), 400
         
-        student["reflections"].append({
-            "entry": entry,
-            "timestamp": datetime.now().isoformat()
-        })
+        engine.add_reflection(student, entry)
         
         save_session_student(student)
         
@@ -379,31 +545,381 @@ def api_reflection():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/sync', methods=['POST'])
+@locks_student
+def api_sync():
+    """Merge a compressed delta from the offline CLI and return server changes."""
+    try:
+        delta = sync.decode(request.get_data(), request.headers.get('Content-Encoding'))
+    except sync.SyncError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
+        # A delta may name its student, but only the session's own
+        student_id = session.setdefault('student_id', DEFAULT_STUDENT_ID)
+        if delta.get("s") not in (None, student_id):
+            return jsonify({"status": "error", "message": "Cannot sync another student"}), 403
+        student = load_cached_student(student_id)
+        response = sync.merge(student, delta)
+        store_student(student_id, student)
+        return jsonify(response)
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"status": "error", "message": f"Invalid sync payload: {e}"}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/topics')
 def api_topics():
     """Get all available topics by subject."""
-    return jsonify({
+    response = jsonify({
         "status": "success",
-        "topics": SUBJECT_TOPICS
+        "topics": get_pack().subject_topics
     })
+    response.add_etag()
+    return response.make_conditional(request)
 
 @app.route('/api/reset', methods=['POST'])
+@locks_student
 def api_reset():
     """Reset student data (for testing)."""
     try:
-        student = {
-            "username": "Student",
-            "baseline_done": False,
-            "topic_strength": {},
-            "mistakes": {},
-            "study_log": {},
-            "reflections": []
-        }
-        save_session_student(student)
+        old = get_student()
+        student = StudentModel.from_dict(new_student())
+        # Keep versions increasing so clients holding old ones reload in full
+        student.compact(old.version)
+        save_session_student(student, replace=True)
         return jsonify({"status": "success", "message": "Data reset successfully"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# ==================
+# OFFLINE CLIENT
+# ==================
+
+REPLAY_BATCH = 100                 # queued operations per replay request
+REPLAY_MAX_AGE = 30 * 86400        # older client timestamps are clamped to this
+REPLAY_MEMORY = 1000               # applied operation ids kept in each student's record
+
+@app.route('/sw.js')
+def service_worker():
+    """The service worker, served from the root so it controls every page."""
+    return send_from_directory(app.static_folder, 'sw.js', max_age=0)
+
+@app.route('/api/offline-pack')
+def api_offline_pack():
+    """Topics and offline explanations for the service worker to cache."""
+    pack = get_pack()
+    response = jsonify({
+        "status": "success",
+        "topics": pack.subject_topics,
+        "explanations": pack.explanations
+    })
+    response.add_etag()
+    return response.make_conditional(request)
+
+def replay_op(student, op, now, seen):
+    """Apply one queued operation unless its id is in ``seen``; returns its result entry."""
+    op_id = str(op.get('id', ''))
+    if op_id and op_id in seen:
+        return {"id": op_id, "status": "duplicate"}
+    try:
+        when = float(op.get('ts', now))
+    except (TypeError, ValueError):
+        when = now
+    when = min(now, max(now - REPLAY_MAX_AGE, when))
+    kind = op.get('type')
+    result = {"id": op_id, "status": "applied"}
+    if kind == 'quiz':
+        topic, keywords = quiz_topic(student, op.get('topic'), op.get('question_id'))
+        answer = str(op.get('answer', '')).strip().lower()
+        result["topic"] = topic
+        result["correct"] = engine.answer_quiz(student, topic, answer, now=when, keywords=keywords)
+    elif kind == 'reflection':
+        entry = str(op.get('entry', '')).strip()
+        if not entry:
+            raise ValueError("Reflection cannot be empty")
+        engine.add_reflection(student, entry, when=datetime.fromtimestamp(when))
+    else:
+        raise ValueError(f"Unknown operation: {kind}")
+    if op_id:
+        seen.add(op_id)
+    return result
+
+@app.route('/api/replay', methods=['POST'])
+@locks_student
+def api_replay():
+    """Apply quiz answers and reflections queued offline, oldest first, with one save.
+
+    Each operation is {"id", "type": "quiz"|"reflection", "ts", ...} with
+    the fields of /api/quiz or /api/reflection. The last REPLAY_MEMORY
+    applied ids are kept in the student's record and skipped, so a batch
+    resent after a lost response is safe on any worker, even after a restart.
+    """
+    ops = (request.get_json(silent=True) or {}).get('ops')
+    if not isinstance(ops, list) or len(ops) > REPLAY_BATCH:
+        return jsonify({"status": "error",
+                        "message": f"ops must be a list of at most {REPLAY_BATCH} operations"}), 400
+    try:
+        student = fresh_student(session.setdefault('student_id', DEFAULT_STUDENT_ID))
+        replayed = list((student.extra or {}).get('replayed_ops', []))
+        seen = set(replayed)
+        now = time.time()
+        results = []
+        for op in ops:
+            try:
+                if not isinstance(op, dict):
+                    raise ValueError("Operation must be an object")
+                result = replay_op(student, op, now, seen)
+                if result["status"] == "applied" and result["id"]:
+                    replayed.append(result["id"])
+                results.append(result)
+            except ValueError as e:
+                results.append({"id": str(op.get('id', '')) if isinstance(op, dict) else "",
+                                "status": "rejected", "message": str(e)})
+        applied = sum(result["status"] == "applied" for result in results)
+        if applied:
+            student.extra = dict(student.extra or {}, replayed_ops=replayed[-REPLAY_MEMORY:])
+            save_session_student(student)
+        return jsonify({"status": "success", "applied": applied, "results": results})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# ==================
+# ADMIN ROUTES
+# ==================
+
+@app.route('/api/admin/export')
+@admin_required
+def api_admin_export():
+    """Stream every student as NDJSON, one per line."""
+    return Response(stream_with_context(bulk.iter_export(get_store())),
+                    mimetype='application/x-ndjson',
+                    headers={"Content-Disposition": "attachment; filename=students.ndjson"})
+
+@app.route('/api/admin/import', methods=['POST'])
+@admin_required
+def api_admin_import():
+    """Queue an import of the NDJSON students streamed in the request body.
+
+    The body is spooled to JOBS_DIR and imported by an "import" job, which
+    deletes the file when it finishes; poll the returned job for the summary.
+    """
+    path = None
+    try:
+        batch_size = int(request.args.get('batch_size', bulk.BATCH_SIZE))
+        name = f"upload-{os.urandom(8).hex()}.ndjson"
+        path = job_path(name)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(request.stream, out, 1 << 20)
+        response = queued('import', {"file": name, "batch_size": batch_size, "remove": True})
+        if response.status_code == 202:
+            path = None
+        return response
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+@app.route('/api/admin/exam-predictions')
+@admin_required
+def api_admin_exam_predictions():
+    """Stream exam predictions for every student as NDJSON."""
+    n = request.args.get('n', 3, type=int)
+
+    def models():
+        for student_id, data in get_store().iter_students():
+            student = cached_student(student_id) or StudentModel.from_dict(data)
+            yield student_id, student
+
+    def lines():
+        for student_id, ranked in predictor.predict_many(models(), n):
+            yield app.json.dumps({"id": student_id, "topics": [
+                {"topic": topic, "score": score} for topic, score in ranked]}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+@app.route('/api/admin/fit-decay', methods=['POST'])
+@admin_required
+def api_admin_fit_decay():
+    """Queue a "fit-decay" job refitting every student's forgetting rates: ?workers=N."""
+    try:
+        return queued('fit-decay', {"workers": request.args.get('workers', 0, type=int)})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/classes/<class_id>/ranking')
+@admin_required
+def api_class_ranking(class_id):
+    """The top students of a class by readiness: ?top=N."""
+    try:
+        top = max(1, min(request.args.get('top', 10, type=int), 1000))
+        size, rows = rank_index().top(class_id, top)
+        return jsonify({"status": "success", "data": {
+            "class_id": class_id,
+            "size": size,
+            "top": [{"id": student_id, "readiness": score, "rank": rank}
+                    for student_id, score, rank in rows]
+        }})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/classes/<class_id>/students/<student_id>')
+@admin_required
+def api_class_student(class_id, student_id):
+    """One student's rank and percentile within their class."""
+    standing = rank_index().standing(student_id)
+    if standing is None or standing["class_id"] != class_id:
+        return jsonify({"status": "error", "message": "Student not found in class"}), 404
+    return jsonify({"status": "success", "data": standing})
+
+@app.route('/api/admin/reflections')
+@admin_required
+def api_admin_reflections():
+    """Most frequent reflection terms and topics found hard, for this worker."""
+    top = request.args.get('top', 20, type=int)
+    return jsonify({"status": "success", "data": reflections.global_summary(top)})
+
+@app.route('/api/admin/memory')
+@admin_required
+def api_admin_memory():
+    """Report this worker's approximate memory use by subsystem."""
+    try:
+        top = request.args.get('top', 10, type=int)
+        return jsonify({"status": "success", "data": app.extensions['memory'].report(top)})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/admin/memory/snapshot', methods=['POST', 'DELETE'])
+@admin_required
+def api_admin_memory_snapshot():
+    """Take a tracemalloc snapshot diffed against the last, or stop tracing."""
+    try:
+        snapshots = app.extensions['memory'].snapshots
+        if request.method == 'DELETE':
+            snapshots.stop()
+            return jsonify({"status": "success", "tracing": False})
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({"status": "success", "pid": os.getpid(), "data": snapshots.take(limit)})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# ==================
+# BACKGROUND JOBS
+# ==================
+
+def job_path(name):
+    """Resolve a job's file name inside JOBS_DIR; paths elsewhere are refused."""
+    if not name or os.path.basename(name) != name or name.startswith('.'):
+        raise ValueError(f"Invalid file name: {name!r}")
+    os.makedirs(app.config['JOBS_DIR'], exist_ok=True)
+    return os.path.join(app.config['JOBS_DIR'], name)
+
+@job_type('fit-decay')
+def run_fit_decay(job, workers=0):
+    """Refit every student's forgetting rates."""
+    summary = fitting.fit_all(get_store(), workers=int(workers), progress=job.progress)
+    _student_cache.clear()
+    return summary
+
+@job_type('import')
+def run_import(job, file, workers=0, batch_size=bulk.BATCH_SIZE, remove=False):
+    """Import an NDJSON file from JOBS_DIR; a cancelled import resumes next time."""
+    path = job_path(file)
+    with open(path, 'rb') as fp:
+        summary = bulk.import_ndjson(get_store(), fp, batch_size=int(batch_size),
+                                     workers=int(workers), checkpoint=path + '.checkpoint',
+                                     source=path, progress=job.progress)
+    _student_cache.clear()
+    if remove:
+        os.remove(path)
+    return {"imported": summary["imported"], "skipped": summary["skipped"],
+            "errors": [{"line": line, "error": error} for line, error in summary["errors"]]}
+
+@job_type('baseline')
+def run_baseline(job, file, format=None, workers=0, batch_size=bulk.BATCH_SIZE, replace=False):
+    """Score a CSV or NDJSON file of baseline answers from JOBS_DIR."""
+    path = job_path(file)
+    fmt = format or ('ndjson' if file.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, 'rb') as fp:
+        summary = bulk.import_baseline(get_store(), fp, fmt, batch_size=int(batch_size),
+                                       workers=int(workers), replace=bool(replace),
+                                       progress=job.progress)
+    _student_cache.clear()
+    return {"imported": summary["imported"], "skipped": summary["skipped"],
+            "elapsed": summary["elapsed"], "rate": summary["rate"],
+            "errors": [{"line": line, "error": error} for line, error in summary["errors"]]}
+
+@job_type('export')
+def run_export(job, file):
+    """Export every student to an NDJSON file in JOBS_DIR."""
+    path = job_path(file)
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as out:
+            count = bulk.export_ndjson(get_store(), out,
+                                       progress=lambda n: job.progress({"exported": n}))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {"exported": count, "file": file}
+
+@job_type('reload-pack')
+def run_reload_pack(job, file=None):
+    """Rebuild the content pack and question bank, then swap them in."""
+    pack = content.reload_pack(file)
+    job.progress({"subjects": len(pack.subject_names)})
+    bank = pack.index('questions')
+    return {"subjects": len(pack.subject_names), "topics": len(pack.topic_subject),
+            "questions": len(bank), "version": pack.version}
+
+def queued(kind, params):
+    """Queue a job: 202 pointing at it, or 503 when the queue is full."""
+    try:
+        job = jobs.submit(kind, params)
+    except QueueFull as e:
+        response = jsonify({"status": "error", "message": f"Job queue is full: {e}"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    response = jsonify({"status": "success", "data": job.to_dict()})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response
+
+@app.route('/api/jobs', methods=['POST'])
+@admin_required
+def api_jobs_submit():
+    """Queue a background job: {"type": ..., "params": {...}}."""
+    try:
+        data = request.get_json(silent=True) or {}
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            return jsonify({"status": "error", "message": "params must be an object"}), 400
+        return queued(data.get('type'), params)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/jobs')
+@admin_required
+def api_jobs_list():
+    """List this worker's recent jobs, newest first."""
+    return jsonify({"status": "success",
+                    "data": [job.to_dict() for job in reversed(jobs.jobs())]})
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+@admin_required
+def api_job(job_id):
+    """Poll a job, or cancel it with DELETE."""
+    job = jobs.cancel(job_id) if request.method == 'DELETE' else jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+    return jsonify({"status": "success", "data": job.to_dict()})
+
 # ==================
 # ERROR HANDLERS
 # ==================
@@ -413,6 +929,11 @@ def not_found(e):
     """Handle 404 errors."""
     return jsonify({"status": "error", "message": "Page not found"}), 404
 
+@app.errorhandler(413)
+def too_large(e):
+    """Handle request bodies over MAX_BODY_BYTES."""
+    return jsonify({"status": "error", "message": "Request body too large"}), 413
+
 @app.errorhandler(500)
 def server_error(e):
     """Handle 500 errors."""
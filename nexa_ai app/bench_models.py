@@ -0,0 +1,55 @@
+"""
+Benchmark: memory per cached student
+Compares plain dict documents with StudentModel records
+"""
+
+import gc
+import json
+import random
+import tracemalloc
+
+from content import SUBJECT_TOPICS
+from models import StudentModel
+
+TOPICS = [t for topics in SUBJECT_TOPICS.values() for t in topics]
+
+
+def make_documents(count, extra_topics=0, seed=11):
+    """Serialised student documents, as they would arrive from storage."""
+    rng = random.Random(seed)
+    topics = TOPICS + [f"extra topic {i}" for i in range(extra_topics)]
+    docs = []
+    for _ in range(count):
+        docs.append(json.dumps({
+            "username": "Student",
+            "baseline_done": True,
+            "topic_strength": {t: rng.choice([0.3, 0.7]) + 0.05 * rng.randint(0, 4) for t in topics},
+            "mistakes": {t: rng.randint(1, 5) for t in topics if rng.random() < 0.4},
+            "study_log": {t: 1770000000 + rng.random() * 1e6 for t in topics},
+            "reflections": [],
+        }))
+    return docs
+
+
+def measure(docs, build):
+    gc.collect()
+    tracemalloc.start()
+    cache = [build(doc) for doc in docs]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return size / len(docs)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  MEMORY PER CACHED STUDENT")
+    print("=" * 60)
+    for extra in (0, 100):
+        docs = make_documents(10000, extra_topics=extra)
+        # Intern every topic up front so the shared registry is not counted
+        StudentModel.from_dict(json.loads(docs[0]))
+        as_dict = measure(docs, json.loads)
+        as_model = measure(docs, lambda d: StudentModel.from_dict(json.loads(d)))
+        print(f"{len(TOPICS) + extra:4} topics | dict: {as_dict:8.0f} B | "
+              f"StudentModel: {as_model:6.0f} B | {as_dict / as_model:4.1f}x smaller")
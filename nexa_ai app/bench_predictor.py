@@ -0,0 +1,31 @@
+"""
+Benchmark: exam predictions for a whole class
+Cold scoring pass versus cached rankings
+"""
+
+import json
+import time
+
+import predictor
+from bench_models import make_documents
+from models import StudentModel
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  EXAM PREDICTIONS FOR A CLASS")
+    print("=" * 60)
+    now = time.time()
+    for extra in (0, 100):
+        students = [(i, StudentModel.from_dict(json.loads(doc)))
+                    for i, doc in enumerate(make_documents(10000, extra_topics=extra))]
+        cold = timed(lambda: list(predictor.predict_many(students, now=now)))
+        warm = timed(lambda: list(predictor.predict_many(students, now=now)))
+        print(f"{13 + extra:4} topics | 10000 students | cold: {cold * 1000:6.0f} ms | "
+              f"cached: {warm * 1000:5.1f} ms")
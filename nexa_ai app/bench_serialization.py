@@ -0,0 +1,55 @@
+"""
+Benchmark: student document serialisation
+Compares the old pretty-printed stdlib path with the serialisation layer
+"""
+
+import json
+import random
+import time
+
+import serialization
+
+
+def make_student(topics=5000, reflections=2000, seed=7):
+    """Build a large student document in the persisted shape."""
+    rng = random.Random(seed)
+    names = [f"topic {i}" for i in range(topics)]
+    strength = {}
+    for name in names:
+        value = 0.7
+        for _ in range(rng.randint(0, 6)):
+            value = value + 0.05 if rng.random() < 0.5 else max(0.1, value - 0.1)
+        strength[name] = value
+    return {
+        "username": "Student",
+        "baseline_done": True,
+        "topic_strength": strength,
+        "mistakes": {name: rng.randint(1, 9) for name in names[::3]},
+        "study_log": {name: 1770000000 + rng.random() * 1e6 for name in names[::2]},
+        "reflections": [
+            {"entry": f"Struggled with topic {rng.randrange(topics)} today",
+             "timestamp": "2026-02-08T12:00:00"}
+            for _ in range(reflections)
+        ],
+    }
+
+
+def bench(label, fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:38} {best * 1000:8.2f} ms  {len(out):>9} bytes")
+    return best
+
+
+if __name__ == "__main__":
+    student = make_student()
+    print("=" * 70)
+    print(f"  SERIALISATION BENCHMARK (backend: {serialization.BACKEND})")
+    print("=" * 70)
+    old = bench("json.dumps(indent=4)", lambda: json.dumps(student, indent=4))
+    new = bench("serialization.encode_student", lambda: serialization.encode_student(student))
+    bench("serialization.dumps (API responses)", lambda: serialization.dumps(student))
+    print(f"\nSpeed-up for persistence: {old / new:.1f}x")
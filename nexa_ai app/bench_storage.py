@@ -0,0 +1,40 @@
+"""
+Benchmark: storage backends at scale
+Writes and streams back synthetic students from datagen in every multi-student backend
+
+    python bench_storage.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import datagen
+import storage
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = os.cpu_count() or 1
+    print("=" * 60)
+    print(f"  STORAGE BACKENDS | {count} synthetic students")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("sqlite", "sharded"):
+            store = storage.open_store(f"{backend}:{os.path.join(tmp, backend)}")
+            write, written = timed(lambda: datagen.write_store(store, count, seed=1,
+                                                               workers=workers))
+            scan, scanned = timed(lambda: sum(1 for _ in store.iter_students()))
+            load, _ = timed(lambda: [store.load(f"student-{i:07d}")
+                                     for i in range(0, count, max(1, count // 1000))])
+            print(f"{backend:8} | write: {written / write:8.0f} students/s | "
+                  f"scan: {scanned / scan:8.0f} students/s | "
+                  f"load: {load * 1000 / min(count, 1000):5.2f} ms")
+            store.close()
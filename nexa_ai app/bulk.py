@@ -0,0 +1,439 @@
+"""
+NEXA AI bulk export and import
+Streams student records as NDJSON, one student per line:
+
+    {"id": "<student id>", "student": {...student document...}}
+
+Baseline answers for whole classes are imported from CSV (an ``id``
+column, optional ``username`` and ``class_id`` columns, then one column
+per topic) or NDJSON (``{"id", "username", "class_id", "answers": {topic:
+answer}}``) and scored with the same rules as /api/baseline; an empty
+CSV cell counts as a blank answer, as in the web form.
+
+Usage:
+    python bulk.py export students.ndjson [--store sqlite:students.db]
+    python bulk.py import students.ndjson [--store ...] [--workers 4]
+    python bulk.py baseline answers.csv [--store ...] [--workers 4] [--replace]
+"""
+
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import serialization
+import storage
+from content import get_pack
+from models import StudentModel
+from progress import record as record_progress
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 100
+
+
+class ValidationError(ValueError):
+    """A record that does not match the student schema."""
+
+
+# =========================
+# EXPORT
+# =========================
+def iter_export(store):
+    """Yield one encoded NDJSON line per student, in constant memory."""
+    for student_id, data in store.iter_students():
+        yield serialization.dumps({"id": student_id, "student": data}) + b"\n"
+
+
+def export_ndjson(store, out, progress=None):
+    """Write every student in ``store`` to a binary file object."""
+    count = 0
+    for line in iter_export(store):
+        out.write(line)
+        count += 1
+        if progress and count % BATCH_SIZE == 0:
+            progress(count)
+    return count
+
+
+# =========================
+# VALIDATION
+# =========================
+def _check_map(data, key, types):
+    value = data.get(key, {})
+    if not isinstance(value, dict):
+        raise ValidationError(f"{key} must be an object")
+    for topic, item in value.items():
+        if isinstance(item, bool) or not isinstance(item, types):
+            raise ValidationError(f"{key}[{topic!r}] has the wrong type")
+    return value
+
+
+def validate_record(record):
+    """Return (student_id, student) for a valid record or raise ValidationError."""
+    if not isinstance(record, dict):
+        raise ValidationError("record must be an object")
+    student_id = record.get("id")
+    data = record.get("student")
+    if not isinstance(student_id, str) or not student_id.strip():
+        raise ValidationError("id must be a non-empty string")
+    if not isinstance(data, dict):
+        raise ValidationError("student must be an object")
+    if not isinstance(data.get("baseline_done", False), bool):
+        raise ValidationError("baseline_done must be a boolean")
+    _check_map(data, "topic_strength", (int, float))
+    _check_map(data, "study_log", (int, float))
+    if any(count < 0 for count in _check_map(data, "mistakes", int).values()):
+        raise ValidationError("mistakes must not be negative")
+    if not isinstance(data.get("reflections", []), list):
+        raise ValidationError("reflections must be a list")
+    return student_id, data
+
+
+def parse_batch(batch):
+    """Parse and validate (line number, raw line) pairs.
+
+    Runs in worker processes; returns encoded rows ready for
+    ``store.put_many`` and a list of (line number, error) pairs.
+    """
+    rows, errors = [], []
+    for lineno, raw in batch:
+        if not raw.strip():
+            continue
+        try:
+            student_id, data = validate_record(serialization.loads(raw))
+            rows.append((student_id, serialization.encode_student(data)))
+        except ValueError as e:
+            errors.append((lineno, str(e)))
+    return rows, errors
+
+
+# =========================
+# IMPORT
+# =========================
+def _read_batches(fp, batch_size, offset, lineno):
+    """Yield (batch, end offset, next line number) from a binary stream."""
+    batch = []
+    for raw in iter(fp.readline, b""):
+        lineno += 1
+        offset += len(raw)
+        batch.append((lineno, raw))
+        if len(batch) >= batch_size:
+            yield batch, offset, lineno
+            batch = []
+    if batch:
+        yield batch, offset, lineno
+
+
+def _load_checkpoint(path, source):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            checkpoint = serialization.load(f)
+    except (IOError, ValueError):
+        return None
+    return checkpoint if checkpoint.get("source") == source else None
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        serialization.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _single_student_check(store):
+    """A check refusing a second student id for the single-student file store, else None."""
+    if not isinstance(store, storage.JSONFileStore):
+        return None
+    ids = set()
+
+    def check(rows):
+        ids.update(student_id for student_id, _ in rows)
+        if len(ids) > 1:
+            raise ValueError("The file backend holds a single student; use sqlite: or sharded:")
+
+    return check
+
+
+def _process_pool(workers):
+    """A process pool of ``workers`` spawned (not forked) processes.
+
+    The jobs runner starts pools from its worker threads, and a child
+    forked from a threaded process can inherit a lock some other thread
+    held, then deadlock on it.
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+def results(batches, work, workers):
+    """Yield ``(work(batch), extra)`` for each (batch, *extra), in order.
+
+    The shared batch pipeline for bulk imports, fitting and datagen: with
+    ``workers`` the work runs in that many spawned processes with at most
+    ``2 * workers`` batches in flight, so memory stays flat; ``work``
+    must be a module-level function.
+    """
+    if workers <= 0:
+        for batch, *extra in batches:
+            yield work(batch), extra
+        return
+    with _process_pool(workers) as pool:
+        pending = []
+        for batch, *extra in batches:
+            pending.append((pool.submit(work, batch), extra))
+            if len(pending) >= 2 * workers:
+                future, extra = pending.pop(0)
+                yield future.result(), extra
+        for future, extra in pending:
+            yield future.result(), extra
+
+
+def pipeline(batches, work, workers, commit):
+    """Run ``work(batch)`` for each (batch, *extra) and ``commit(result, *extra)`` in order.
+
+    Commits stay on this thread; see ``results`` for how work is spread.
+    """
+    for result, extra in results(batches, work, workers):
+        commit(result, *extra)
+
+
+def import_ndjson(store, fp, batch_size=BATCH_SIZE, workers=0, checkpoint=None,
+                  source=None, progress=None):
+    """Import NDJSON student records from a binary file object.
+
+    Lines are parsed and validated in ``workers`` processes (in-process
+    when 0) while the main thread writes finished batches, one store
+    transaction per batch. At most ``2 * workers`` batches are in flight,
+    so memory stays constant however large the input is.
+
+    With ``checkpoint`` set, progress is recorded after every committed
+    batch and a later call with the same ``source`` resumes from there.
+    Input with more than one student raises ValueError for the
+    single-student file store, before the second student is written.
+    """
+    summary = {"imported": 0, "skipped": 0, "errors": [], "offset": 0, "lines": 0}
+    single = _single_student_check(store)
+    resumed = _load_checkpoint(checkpoint, source)
+    if resumed:
+        fp.seek(resumed["offset"])
+        for key in ("imported", "skipped", "offset", "lines"):
+            summary[key] = resumed[key]
+
+    def commit(result, end_offset, lineno):
+        rows, errors = result
+        if single:
+            single(rows)
+        summary["imported"] += store.put_many(rows)
+        summary["skipped"] += len(errors)
+        room = MAX_ERRORS - len(summary["errors"])
+        summary["errors"].extend(errors[:max(room, 0)])
+        summary["offset"], summary["lines"] = end_offset, lineno
+        if checkpoint:
+            _save_checkpoint(checkpoint, {"source": source, "offset": end_offset, "lines": lineno,
+                                          "imported": summary["imported"],
+                                          "skipped": summary["skipped"]})
+        if progress:
+            progress(summary)
+
+    batches = _read_batches(fp, batch_size, summary["offset"], summary["lines"])
+    pipeline(batches, parse_batch, workers, commit)
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return summary
+
+
+# =========================
+# BASELINE IMPORT
+# =========================
+BASELINE_COLUMNS = ("id", "username", "class_id")
+
+
+def _read_baseline_csv(fp):
+    """Yield (line number, record) from a CSV with one column per topic."""
+    reader = csv.DictReader(io.TextIOWrapper(fp, encoding="utf-8-sig", newline=""))
+    if not reader.fieldnames or "id" not in reader.fieldnames:
+        raise ValidationError("CSV needs a header row with an id column")
+    topics = [name for name in reader.fieldnames if name not in BASELINE_COLUMNS]
+    unknown = [topic for topic in topics if topic not in get_pack().topic_subject]
+    if unknown:
+        raise ValidationError(f"Unknown topic columns: {', '.join(unknown)}")
+    for row in reader:
+        record = {key: row[key] for key in BASELINE_COLUMNS if row.get(key)}
+        record["answers"] = {topic: row[topic] or "" for topic in topics}
+        yield reader.line_num, record
+
+
+def _read_baseline_ndjson(fp):
+    for lineno, raw in enumerate(iter(fp.readline, b""), 1):
+        if raw.strip():
+            yield lineno, raw
+
+
+def score_baseline(record, topics=None):
+    """(student id, document) for one baseline record, scored by engine.apply_baseline."""
+    if isinstance(record, bytes):
+        record = serialization.loads(record)
+    if not isinstance(record, dict):
+        raise ValidationError("record must be an object")
+    student_id = record.get("id")
+    if not isinstance(student_id, str) or not student_id.strip():
+        raise ValidationError("id must be a non-empty string")
+    answers = record.get("answers")
+    if not isinstance(answers, dict) or not answers:
+        raise ValidationError("answers must be a non-empty object")
+    topics = topics or get_pack().topic_subject
+    for topic, answer in answers.items():
+        if topic not in topics:
+            raise ValidationError(f"unknown topic {topic!r}")
+        if not isinstance(answer, str):
+            raise ValidationError(f"answers[{topic!r}] must be a string")
+    data = storage.new_student()
+    for key in ("username", "class_id"):
+        if isinstance(record.get(key), str) and record[key].strip():
+            data[key] = record[key].strip()
+    student = StudentModel.from_dict(data)
+    engine.apply_baseline(student, answers)
+    record_progress(student)
+    return student_id.strip(), student.to_dict()
+
+
+def score_batch(batch):
+    """Score (line number, record) pairs; runs in worker processes.
+
+    Returns encoded rows for ``store.put_many`` and a list of (line
+    number, error) pairs.
+    """
+    topics = get_pack().topic_subject
+    rows, errors = [], []
+    for lineno, record in batch:
+        try:
+            student_id, data = score_baseline(record, topics)
+            rows.append((student_id, serialization.encode_student(data)))
+        except ValueError as e:
+            errors.append((lineno, str(e)))
+    return rows, errors
+
+
+def import_baseline(store, fp, fmt="csv", batch_size=BATCH_SIZE, workers=0, replace=False,
+                    progress=None):
+    """Score baseline answers for many students and write their initial records.
+
+    Records are streamed from ``fp`` (binary, ``fmt`` "csv" or "ndjson"),
+    scored in ``workers`` processes and written one store transaction per
+    batch. Students that already exist are skipped unless ``replace``, so
+    running an interrupted import again picks up where it stopped.
+    ``progress`` gets the summary, including students per second, after
+    every batch.
+    """
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"Unknown baseline format: {fmt}")
+    records = _read_baseline_csv(fp) if fmt == "csv" else _read_baseline_ndjson(fp)
+    single = _single_student_check(store)
+    summary = {"imported": 0, "skipped": 0, "errors": [], "rows": 0, "elapsed": 0.0, "rate": 0.0}
+    started = time.perf_counter()
+
+    def batches():
+        batch = []
+        for item in records:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch, len(batch)
+                batch = []
+        if batch:
+            yield batch, len(batch)
+
+    def commit(result, count):
+        rows, errors = result
+        if not replace:
+            existing = {student_id for student_id, _ in rows if store.load(student_id) is not None}
+            errors = errors + [(None, f"{student_id} already exists") for student_id in sorted(existing)]
+            rows = [row for row in rows if row[0] not in existing]
+        if single:
+            single(rows)
+        summary["imported"] += store.put_many(rows)
+        summary["skipped"] += len(errors)
+        room = MAX_ERRORS - len(summary["errors"])
+        summary["errors"].extend(errors[:max(room, 0)])
+        summary["rows"] += count
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        summary["rate"] = round(summary["rows"] / summary["elapsed"], 1) if summary["elapsed"] else 0.0
+        if progress:
+            progress(summary)
+
+    pipeline(batches(), score_batch, workers, commit)
+    return summary
+
+
+# =========================
+# COMMAND LINE
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NEXA AI bulk student export/import")
+    parser.add_argument("command", choices=["export", "import", "baseline"])
+    parser.add_argument("path", help="NDJSON file ('-' for stdin/stdout)")
+    parser.add_argument("--store", default=None, help="storage URL, e.g. sqlite:students.db")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", default=None,
+                        help="resume file for imports (default: <path>.checkpoint)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                        help="baseline input format (default: from the file extension)")
+    parser.add_argument("--replace", action="store_true",
+                        help="overwrite students that already exist when importing baselines")
+    args = parser.parse_args(argv)
+
+    store = storage.open_store(args.store)
+    if args.command == "export":
+        out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        try:
+            count = export_ndjson(store, out, progress=lambda n: print(f"  {n} exported", file=sys.stderr))
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        print(f"✅ Exported {count} students", file=sys.stderr)
+        return 0
+
+    if args.command == "baseline":
+        fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+        fp = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        try:
+            summary = import_baseline(
+                store, fp, fmt, args.batch_size, args.workers, args.replace,
+                progress=lambda s: print(f"  {s['imported']} scored, {s['skipped']} skipped, "
+                                         f"{s['rate']:.0f} rows/s", file=sys.stderr))
+        finally:
+            if fp is not sys.stdin.buffer:
+                fp.close()
+        for lineno, error in summary["errors"]:
+            print(f"⚠️ {f'line {lineno}' if lineno else 'skipped'}: {error}", file=sys.stderr)
+        print(f"✅ Scored {summary['imported']} baselines ({summary['skipped']} skipped) "
+              f"in {summary['elapsed']:.1f}s", file=sys.stderr)
+        return 0
+
+    if args.path == "-":
+        summary = import_ndjson(store, sys.stdin.buffer, args.batch_size, args.workers)
+    else:
+        checkpoint = args.checkpoint or f"{args.path}.checkpoint"
+        with open(args.path, "rb") as fp:
+            summary = import_ndjson(
+                store, fp, args.batch_size, args.workers, checkpoint=checkpoint,
+                source=os.path.abspath(args.path),
+                progress=lambda s: print(f"  {s['imported']} imported, {s['skipped']} skipped",
+                                         file=sys.stderr))
+    for lineno, error in summary["errors"]:
+        print(f"⚠️ line {lineno}: {error}", file=sys.stderr)
+    print(f"✅ Imported {summary['imported']} students ({summary['skipped']} skipped)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+NEXA AI response compression
+Negotiated gzip/deflate/brotli compression for API payloads
+"""
+
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli  # type: ignore
+except Exception:
+    # brotli is optional; gzip and deflate are always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+DEFAULTS = {
+    "COMPRESS_MIN_SIZE": int(os.getenv("COMPRESS_MIN_SIZE", 500)),
+    "COMPRESS_STREAM_THRESHOLD": int(os.getenv("COMPRESS_STREAM_THRESHOLD", 256 * 1024)),
+    "COMPRESS_LEVEL": int(os.getenv("COMPRESS_LEVEL", 6)),
+    "COMPRESS_CACHE_SIZE": int(os.getenv("COMPRESS_CACHE_SIZE", 128)),
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings():
+    """Encodings this worker can produce, in server preference order."""
+    if brotli is not None:
+        return ["br", "gzip", "deflate"]
+    return ["gzip", "deflate"]
+
+
+class _BrotliCompressor:
+    """Adapter giving brotli the zlib compressobj interface."""
+
+    def __init__(self, level):
+        self._c = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self, mode=zlib.Z_FINISH):
+        if mode == zlib.Z_FINISH:
+            return self._c.finish()
+        return self._c.flush()
+
+
+def compressor(encoding, level=6):
+    """Return a streaming compressor object for the given content-coding."""
+    if encoding == "gzip":
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliCompressor(level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_bytes(data, encoding, level=6):
+    """Compress a complete body in one call."""
+    c = compressor(encoding, level)
+    return c.compress(data) + c.flush()
+
+
+def compress_stream(chunks, encoding, level=6, sync_flush=False):
+    """Compress an iterable of byte chunks lazily.
+
+    With ``sync_flush`` every input chunk is flushed to the client as soon
+    as it is compressed, which keeps streamed listings responsive.
+    """
+    c = compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            out = c.compress(chunk)
+            if sync_flush:
+                out += c.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        tail = c.flush()
+        if tail:
+            yield tail
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _split(data, size=CHUNK_SIZE):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+class CompressedBodyCache:
+    """Small thread-safe LRU of compressed bodies keyed by (ETag, encoding)."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def nbytes(self):
+        with self._lock:
+            return sum(len(body) for body in self._entries.values())
+
+
+def _is_compressible(response):
+    mimetype = response.mimetype or ""
+    return any(mimetype.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+
+def init_compression(app):
+    """Register the compression middleware on a Flask app."""
+    from flask import request
+
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    cache = CompressedBodyCache(app.config["COMPRESS_CACHE_SIZE"])
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        if request.method == "HEAD" or not _is_compressible(response):
+            return response
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        if "Content-Encoding" in response.headers or "Range" in request.headers:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        level = app.config["COMPRESS_LEVEL"]
+
+        if response.is_streamed or response.direct_passthrough:
+            response.direct_passthrough = False
+            response.response = compress_stream(
+                response.response, encoding, level, sync_flush=True
+            )
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+            return response
+
+        etag, weak = response.get_etag()
+        data = response.get_data()
+        if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        if etag:
+            key = (etag, encoding)
+            body = cache.get(key)
+            if body is None:
+                body = compress_bytes(data, encoding, level)
+                cache.put(key, body)
+            # The compressed variant is only semantically equivalent
+            response.set_etag(etag, weak=True)
+        elif len(data) > app.config["COMPRESS_STREAM_THRESHOLD"]:
+            response.response = compress_stream(_split(data), encoding, level)
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            return response
+        else:
+            body = compress_bytes(data, encoding, level)
+
+        if len(body) >= len(data):
+            return response
+
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return cache
@@ -0,0 +1,17 @@
+"""
+Shared fixtures for the NEXA AI tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A web test client saving the default student to a fresh data file."""
+    import app as web
+    import storage
+
+    monkeypatch.setattr(storage, "DATA_FILE", str(tmp_path / "student.json"))
+    web._student_cache.clear()
+    yield web.app.test_client()
+    web._student_cache.clear()
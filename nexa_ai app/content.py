@@ -0,0 +1,343 @@
+"""
+NEXA AI content
+Subjects, topics and offline explanations shared by the web app and CLI
+
+The active ContentPack is published through a single module reference.
+reload_pack() builds a new pack and every registered index (question
+bank, reflection phrase index) off the request path, then swaps the
+reference: readers never lock, and a reader keeps a consistent pack for
+as long as it holds it. Each pack has a ``version``, increasing in the
+process, for keying caches derived from content. PackWatcher reloads
+the pack when its files change.
+"""
+
+import itertools
+import os
+import threading
+from array import array
+
+# Optional JSON content pack replacing the built-in curriculum
+CONTENT_PACK = os.getenv("NEXA_CONTENT_PACK")
+# Seconds between checks of the pack file for changes; 0 never checks
+CONTENT_WATCH = float(os.getenv("NEXA_CONTENT_WATCH", 0))
+
+# ==================
+# BUILT-IN CONTENT
+# ==================
+SUBJECT_TOPICS = {
+    "math": ["linear equations", "algebra", "ratio"],
+    "biology": ["cells", "photosynthesis", "respiration"],
+    "chemistry": ["states of matter", "separation of mixtures"],
+    "physics": ["force", "energy", "motion"],
+    "geography": ["weather", "climate"]
+}
+
+SIMPLE_EXPLANATIONS = {
+    "linear equations": "A linear equation has power of x as 1. Example: 2x + 3 = 7.",
+    "algebra": "Algebra uses letters to represent numbers.",
+    "ratio": "Ratio compares two quantities.",
+    "cells": "Cells are the basic units of life.",
+    "photosynthesis": "Plants use sunlight to make food.",
+    "respiration": "Respiration releases energy from food.",
+    "states of matter": "Matter exists as solid, liquid, or gas.",
+    "separation of mixtures": "Mixtures can be separated by filtration or evaporation.",
+    "force": "A force is a push or pull.",
+    "energy": "Energy is the ability to do work.",
+    "motion": "Motion is a change in position.",
+    "weather": "Weather is daily atmospheric condition.",
+    "climate": "Climate is average weather over long time."
+}
+
+# (topic, difficulty 1-3, prompt, keywords any of which marks an answer correct;
+#  several plain numbers are all needed, and numbers only match whole values)
+QUIZ_QUESTIONS = [
+    ("linear equations", 1, "Explain: linear equations", ["linear", "equation"]),
+    ("linear equations", 2, "Solve 2x + 3 = 7 and explain your steps.", ["x = 2", "x=2", "x is 2"]),
+    ("algebra", 1, "Explain: algebra", ["algebra", "letter", "variable"]),
+    ("algebra", 2, "Why do we use letters like x in algebra?", ["unknown", "number", "variable"]),
+    ("ratio", 1, "Explain: ratio", ["ratio", "compare"]),
+    ("ratio", 3, "Share 20 sweets in the ratio 3:2.", ["12", "8"]),
+    ("cells", 1, "Explain: cells", ["cell", "unit of life"]),
+    ("cells", 2, "Name a part found in plant cells but not animal cells.", ["cell wall", "chloroplast", "vacuole"]),
+    ("photosynthesis", 1, "Explain: photosynthesis", ["photosynthesis", "sunlight", "light"]),
+    ("photosynthesis", 2, "Which gas do plants take in for photosynthesis?", ["carbon dioxide", "co2"]),
+    ("respiration", 1, "Explain: respiration", ["respiration", "energy"]),
+    ("respiration", 2, "What does respiration release from glucose?", ["energy"]),
+    ("states of matter", 1, "Explain: states of matter", ["solid", "liquid", "gas"]),
+    ("states of matter", 2, "What is it called when a liquid turns into a gas?", ["evaporation", "boiling"]),
+    ("separation of mixtures", 1, "Explain: separation of mixtures", ["filtration", "evaporation", "separat"]),
+    ("separation of mixtures", 2, "How would you get salt back from salt water?", ["evaporat", "crystallis", "crystalliz"]),
+    ("force", 1, "Explain: force", ["force", "push", "pull"]),
+    ("force", 2, "What unit is force measured in?", ["newton"]),
+    ("energy", 1, "Explain: energy", ["energy", "work"]),
+    ("energy", 3, "Name the energy stored in a stretched spring.", ["elastic"]),
+    ("motion", 1, "Explain: motion", ["motion", "position", "move"]),
+    ("motion", 2, "A car travels 100 m in 10 s. What is its speed?", ["10"]),
+    ("weather", 1, "Explain: weather", ["weather", "daily", "atmosphere"]),
+    ("weather", 2, "What instrument measures rainfall?", ["rain gauge"]),
+    ("climate", 1, "Explain: climate", ["climate", "average", "long"]),
+    ("climate", 2, "How is climate different from weather?", ["average", "long"]),
+]
+
+# ==================
+# TOPIC INTERNING
+# ==================
+# Topic names are interned to small integer ids so student records can
+# store per-topic columns in flat arrays. Ids are append-only and never
+# reused, so they stay valid for the lifetime of the process.
+TOPIC_NAMES = []
+TOPIC_IDS = {}
+_intern_lock = threading.Lock()
+
+
+def topic_id(name, create=True):
+    """Return the interned id for a topic name, or None if unknown."""
+    tid = TOPIC_IDS.get(name)
+    if tid is not None or not create:
+        return tid
+    with _intern_lock:
+        tid = TOPIC_IDS.get(name)
+        if tid is None:
+            tid = len(TOPIC_NAMES)
+            TOPIC_NAMES.append(name)
+            TOPIC_IDS[name] = tid
+        return tid
+
+
+def topic_name(tid):
+    """Return the topic name for an interned id."""
+    return TOPIC_NAMES[tid]
+
+
+# ==================
+# CONTENT PACKS
+# ==================
+_versions = itertools.count(1)
+_builders = {}
+
+
+def register_index(name, build):
+    """Register an index derived from a pack; ``build(pack)`` runs once per pack."""
+    _builders[name] = build
+
+
+class ContentPack:
+    """Subjects and explanations plus the indexes built from them.
+
+    Reverse index from topic to subject: ``subject_of`` maps a topic id to
+    a subject id (-1 for topics outside the curriculum) and
+    ``subject_topic_ids`` lists each subject's topic ids, so rollups never
+    scan ``subject_topics``. ``exam_weight`` holds each topic's syllabus
+    weight by topic id (1.0 unless the pack says otherwise). Packs are
+    never mutated once built, apart from memoising registered indexes.
+    """
+
+    def __init__(self, subject_topics, explanations, exam_weights=None, questions=None,
+                 base_dir=None):
+        self.version = next(_versions)
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+        self.subject_topics = subject_topics
+        self.explanations = explanations
+        self.exam_weights = exam_weights or {}
+        # A list of question objects, or the path of an NDJSON question file
+        # (relative to ``base_dir``); questions.get_bank() reads it lazily
+        self.questions = questions
+        if isinstance(questions, str) and base_dir:
+            self.questions = os.path.join(base_dir, questions)
+        self.subject_names = list(subject_topics)
+        self.subject_ids = {name: sid for sid, name in enumerate(self.subject_names)}
+        self.topic_subject = {}
+        self.subject_topic_ids = []
+        pairs = []
+        for sid, topics in enumerate(subject_topics.values()):
+            self.subject_topic_ids.append([])
+            for topic in topics:
+                if topic in self.topic_subject:
+                    continue
+                tid = topic_id(topic)
+                self.topic_subject[topic] = self.subject_names[sid]
+                self.subject_topic_ids[sid].append(tid)
+                pairs.append((tid, sid))
+        self.subject_of = array("i", [-1]) * (1 + max((tid for tid, _ in pairs), default=-1))
+        for tid, sid in pairs:
+            self.subject_of[tid] = sid
+        weighted = [(topic_id(topic), float(w)) for topic, w in self.exam_weights.items()]
+        self.exam_weight = array("d", [1.0]) * (1 + max(
+            (tid for tid, _ in pairs + weighted), default=-1))
+        for tid, weight in weighted:
+            self.exam_weight[tid] = weight
+
+    def index(self, name):
+        """A registered index of this pack, built on first use."""
+        built = self._indexes.get(name)
+        if built is None:
+            with self._index_lock:
+                built = self._indexes.get(name)
+                if built is None:
+                    built = self._indexes[name] = _builders[name](self)
+        return built
+
+    def build_indexes(self):
+        """Build every registered index now, so no request has to."""
+        for name in list(_builders):
+            self.index(name)
+        return self
+
+    def built(self, name):
+        """An index if it has been built, else None."""
+        return self._indexes.get(name)
+
+    def subject_for(self, tid):
+        """Return the subject id of a topic id, or -1 if it has none."""
+        return self.subject_of[tid] if tid < len(self.subject_of) else -1
+
+    def all_topics(self):
+        return list(self.topic_subject)
+
+    def weight_for(self, tid):
+        """Return the exam weight of a topic id."""
+        return self.exam_weight[tid] if tid < len(self.exam_weight) else 1.0
+
+
+def load_pack(path=None, strict=False):
+    """Build a ContentPack from a JSON pack file, or the built-in content.
+
+    A pack file looks like ``{"subjects": {subject: [topics]},
+    "explanations": {topic: text}, "exam_weights": {topic: weight},
+    "questions": [question] or "questions.ndjson"}``; only ``subjects``
+    is required. A question is ``{"topic", "difficulty", "prompt",
+    "keywords"}``. A pack that cannot be read falls back to the built-in
+    content, or raises when ``strict``.
+    """
+    path = path or CONTENT_PACK
+    if path:
+        import serialization  # keeps the JSON backend off the CLI's start-up path
+
+        try:
+            with open(path, "rb") as f:
+                data = serialization.load(f)
+            return ContentPack(data["subjects"], data.get("explanations", {}),
+                               data.get("exam_weights"), data.get("questions"),
+                               os.path.dirname(os.path.abspath(path)))
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            if strict:
+                raise
+            print(f"⚠️ Error loading content pack {path}: {e}. Using built-in content.")
+    return ContentPack(SUBJECT_TOPICS, SIMPLE_EXPLANATIONS, questions=[
+        {"topic": t, "difficulty": d, "prompt": p, "keywords": k} for t, d, p, k in QUIZ_QUESTIONS
+    ])
+
+
+_pack = None
+_pack_lock = threading.Lock()
+
+
+def get_pack():
+    """The active content pack, loaded on first use."""
+    global _pack
+    pack = _pack
+    if pack is None:
+        with _pack_lock:
+            if _pack is None:
+                _pack = load_pack()
+            pack = _pack
+    return pack
+
+
+def reload_pack(path=None):
+    """Build a fresh content pack and its indexes, then swap it in for every later caller.
+
+    A pack that fails to load raises and leaves the current one in place.
+    """
+    global _pack
+    pack = load_pack(path, strict=True).build_indexes()
+    with _pack_lock:
+        _pack = pack
+    return pack
+
+
+# ==================
+# WATCHING
+# ==================
+class PackWatcher:
+    """Reloads the content pack from a background thread when its files change.
+
+    A change is acted on once the files have stayed the same for one
+    check, so a pack caught half-written is not loaded; a pack that fails
+    to load is retried on later checks and the current one stays active.
+    """
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.loaded = self.signature()
+        self.pending = None
+        self.failed = None
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def files(self):
+        # Loads the pack if needed, so even the first signature has its question file
+        questions = getattr(get_pack(), "questions", None)
+        return [self.path] + ([questions] if isinstance(questions, str) else [])
+
+    def signature(self):
+        """(path, mtime, size) of the pack file and its question file."""
+        signature = []
+        for path in self.files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def check(self):
+        """Reload if the files changed and have settled; True when a new pack went live."""
+        signature = self.signature()
+        if signature == self.loaded:
+            self.pending = None
+            return False
+        if signature != self.pending:
+            self.pending = signature
+            return False
+        try:
+            pack = reload_pack(self.path)
+        except (IOError, ValueError, KeyError, TypeError) as e:
+            if self.failed != signature:
+                self.failed = signature
+                print(f"⚠️ Content pack {self.path} changed but could not be loaded: {e}")
+            return False
+        self.loaded, self.pending, self.failed = signature, None, None
+        self.reloads += 1
+        print(f"✅ Content pack reloaded: {len(pack.subject_names)} subjects, "
+              f"version {pack.version}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Content watcher error: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def watch_pack(path=None, interval=None):
+    """Start watching the pack file; returns the watcher, or None when there is nothing to watch."""
+    path = path or CONTENT_PACK
+    interval = CONTENT_WATCH if interval is None else interval
+    if not path or interval <= 0:
+        return None
+    return PackWatcher(path, interval).start()
@@ -0,0 +1,274 @@
+"""
+NEXA AI synthetic students
+Deterministic, seeded student records in the current schema for scale tests
+
+Usage:
+    python datagen.py 1000000 --store sqlite:students.db [--workers 4]
+    python datagen.py 100000 --out students.ndjson [--topics 200 --pack-out pack.json]
+
+Student ``i`` is generated from its own RNG seeded with ``(seed, i)``, so
+the same seed always produces the same students whatever the batch size or
+worker count. Each student gets an ability and each topic a difficulty;
+strengths, mistakes, study times, quiz histories and reflections all
+follow from those, so weak topics have more mistakes, older study times
+and "found it hard" reflections, the way real records do.
+
+Records are generated and written one batch at a time through the store's
+``put_many``, so memory stays flat for any count. Topics beyond the 13
+built-in ones are named ``topic N`` in subjects of SUBJECT_SIZE; write the
+matching content pack with ``--pack-out`` so the app knows them.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from array import array
+from datetime import datetime, timezone
+
+import bulk
+import serialization
+import storage
+from content import SUBJECT_TOPICS
+from history import TopicHistory
+from models import HISTORY_LIMIT
+
+BATCH_SIZE = 1000
+SUBJECT_SIZE = 25
+NOW = 1770000000.0          # fixed so output never depends on the clock
+DAY = 86400.0
+
+DEFAULTS = {
+    "topics": 13,            # topics in the curriculum
+    "coverage": 0.9,         # share of topics a student has been assessed on
+    "mistake_rate": 1.5,     # mean mistakes on a topic the student finds hard
+    "history": 12,           # mean quiz answers kept per assessed topic
+    "reflections": 3,        # mean reflections per student
+    "days": 60,              # mean days since a topic was last studied
+    "classes": 0,            # students are dealt round-robin into this many classes
+}
+
+FEELINGS = {
+    "hard": ["Found {topic} hard today", "Still confused by {topic}",
+             "{topic} was difficult, need to go over it again",
+             "Struggled with {topic} questions"],
+    "easy": ["{topic} finally makes sense", "Felt confident about {topic}",
+             "Got most {topic} questions right", "{topic} was easy today"],
+    "neutral": ["Revised {topic} for an hour", "Made notes on {topic}",
+                "Watched a video about {topic}"],
+}
+
+
+def topic_names(count):
+    """The built-in topics followed by ``topic N`` up to ``count``."""
+    builtin = [t for topics in SUBJECT_TOPICS.values() for t in topics]
+    return builtin[:count] + [f"topic {i}" for i in range(len(builtin), count)]
+
+
+def content_pack(count):
+    """A content pack whose subjects cover ``topic_names(count)``."""
+    names = topic_names(count)
+    included = set(names)
+    subjects = {name: [t for t in topics if t in included]
+                for name, topics in SUBJECT_TOPICS.items()}
+    extra = names[sum(len(t) for t in SUBJECT_TOPICS.values()):]
+    for start in range(0, len(extra), SUBJECT_SIZE):
+        subjects[f"subject {start // SUBJECT_SIZE + 1}"] = extra[start:start + SUBJECT_SIZE]
+    return {"subjects": {name: topics for name, topics in subjects.items() if topics}}
+
+
+def _poisson(rng, mean):
+    """Knuth's method; the means used here are small."""
+    if mean <= 0:
+        return 0
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def topic_difficulty(topics, seed=0):
+    """Each topic's difficulty; it depends only on the seed, so every student shares it."""
+    return [random.Random(f"{seed}:topic:{t}").gauss(0.0, 0.15) for t in topics]
+
+
+def make_student(index, seed=0, names=None, difficulty=None, **profile):
+    """Generate student ``index`` as a (student id, document) pair."""
+    profile = {**DEFAULTS, **profile}
+    topics = names or topic_names(profile["topics"])
+    difficulty = difficulty or topic_difficulty(topics, seed)
+    rng = random.Random(f"{seed}:{index}")
+    ability = rng.betavariate(2.5, 2)
+    random_, expovariate, gap = rng.random, rng.expovariate, 1 / (2 * DAY)
+
+    strength, mistakes, study_log, histories, weak, strong = {}, {}, {}, {}, [], []
+    for topic, hardness in zip(topics, difficulty):
+        if rng.random() >= profile["coverage"]:
+            continue
+        # Engine updates move strengths in steps of 0.05
+        value = min(1.0, max(0.0, ability - hardness + rng.gauss(0.0, 0.12)))
+        value = round(round(value * 20) / 20, 2)
+        strength[topic] = value
+        count = _poisson(rng, profile["mistake_rate"] * 2 * (1 - value))
+        if count:
+            mistakes[topic] = count
+        # Weak topics tend to have been left alone for longer
+        last = NOW - rng.expovariate(1 / (profile["days"] * DAY * (1.5 - value)))
+        study_log[topic] = round(last, 3)
+        answers = min(HISTORY_LIMIT, _poisson(rng, profile["history"]))
+        if answers:
+            # Answers every couple of days, back from the last study time
+            times, ts = [], last
+            for _ in range(answers):
+                times.append(ts)
+                ts -= expovariate(gap)
+            times.reverse()
+            # Never wrapped, so slot i is the i-th oldest answer
+            history = TopicHistory(HISTORY_LIMIT)
+            history.times = array("d", times)
+            recall = 0.2 + 0.75 * value
+            history.bits = sum(1 << i for i in range(answers) if random_() < recall)
+            histories[topic] = history.encode()
+        (weak if value < 0.5 else strong if value >= 0.75 else []).append(topic)
+
+    reflections = []
+    for _ in range(_poisson(rng, profile["reflections"])):
+        if weak and rng.random() < 0.6:
+            feeling, topic = "hard", rng.choice(weak)
+        elif strong and rng.random() < 0.5:
+            feeling, topic = "easy", rng.choice(strong)
+        else:
+            feeling, topic = "neutral", rng.choice(topics)
+        when = NOW - rng.random() * profile["days"] * DAY
+        reflections.append({
+            "entry": rng.choice(FEELINGS[feeling]).format(topic=topic),
+            "timestamp": datetime.fromtimestamp(when, timezone.utc).replace(
+                tzinfo=None).isoformat(timespec="seconds"),
+        })
+    reflections.sort(key=lambda r: r["timestamp"])
+
+    data = {
+        "username": f"Student {index}",
+        "baseline_done": bool(strength),
+        "topic_strength": strength,
+        "mistakes": mistakes,
+        "study_log": study_log,
+        "reflections": reflections,
+    }
+    if histories:
+        data["quiz_history"] = histories
+    if profile["classes"]:
+        data["class_id"] = f"class-{index % profile['classes']}"
+    return f"student-{index:07d}", data
+
+
+def generate(count, seed=0, start=0, **profile):
+    """Yield (student id, document) for students ``start`` .. ``start + count - 1``."""
+    names = topic_names(profile.get("topics", DEFAULTS["topics"]))
+    difficulty = topic_difficulty(names, seed)
+    for index in range(start, start + count):
+        yield make_student(index, seed, names, difficulty, **profile)
+
+
+def encode_range(args):
+    """Generate and encode one batch; runs in worker processes."""
+    start, count, seed, profile = args
+    return [(student_id, serialization.encode_student(data))
+            for student_id, data in generate(count, seed, start, **profile)]
+
+
+def _batches(count, seed, profile, batch_size):
+    for start in range(0, count, batch_size):
+        yield start, min(batch_size, count - start), seed, profile
+
+
+def encoded(count, seed=0, batch_size=BATCH_SIZE, workers=0, **profile):
+    """Yield batches of encoded (student id, bytes) pairs, in student order.
+
+    With ``workers`` the batches are built in that many processes with at
+    most ``2 * workers`` in flight.
+    """
+    batches = ((batch,) for batch in _batches(count, seed, profile, batch_size))
+    for rows, _ in bulk.results(batches, encode_range, workers):
+        yield rows
+
+
+def write_store(store, count, seed=0, batch_size=BATCH_SIZE, workers=0, progress=None,
+                **profile):
+    """Write ``count`` generated students to a store; returns how many were written."""
+    if isinstance(store, storage.JSONFileStore) and count > 1:
+        raise ValueError("The file backend holds a single student; use sqlite: or sharded:")
+    written = 0
+    for rows in encoded(count, seed, batch_size, workers, **profile):
+        written += store.put_many(rows)
+        if progress:
+            progress(written)
+    return written
+
+
+def write_ndjson(out, count, seed=0, batch_size=BATCH_SIZE, workers=0, progress=None,
+                 **profile):
+    """Write generated students to a binary file in the bulk import format."""
+    written = 0
+    for rows in encoded(count, seed, batch_size, workers, **profile):
+        for student_id, raw in rows:
+            out.write(b'{"id":' + serialization.dumps(student_id) + b',"student":' + raw + b"}\n")
+        written += len(rows)
+        if progress:
+            progress(written)
+    return written
+
+
+# =========================
+# COMMAND LINE
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic NEXA AI students.")
+    parser.add_argument("count", type=int)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--store", help="storage URL, e.g. sqlite:students.db or sharded:students/")
+    target.add_argument("--out", help="NDJSON file for bulk.py import ('-' for stdout)")
+    parser.add_argument("--pack-out", help="also write a content pack covering the topics")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--topics", type=int, default=DEFAULTS["topics"])
+    parser.add_argument("--coverage", type=float, default=DEFAULTS["coverage"])
+    parser.add_argument("--mistake-rate", type=float, default=DEFAULTS["mistake_rate"])
+    parser.add_argument("--history", type=float, default=DEFAULTS["history"])
+    parser.add_argument("--reflections", type=float, default=DEFAULTS["reflections"])
+    parser.add_argument("--days", type=float, default=DEFAULTS["days"])
+    parser.add_argument("--classes", type=int, default=DEFAULTS["classes"])
+    args = parser.parse_args(argv)
+
+    profile = {key: getattr(args, key) for key in DEFAULTS}
+    if args.pack_out:
+        with open(args.pack_out, "wb") as f:
+            f.write(serialization.dumps(content_pack(args.topics)))
+
+    def progress(n):
+        print(f"  {n} generated", file=sys.stderr)
+
+    options = dict(seed=args.seed, batch_size=args.batch_size, workers=args.workers,
+                   progress=progress, **profile)
+    if args.store:
+        store = storage.open_store(args.store)
+        try:
+            count = write_store(store, args.count, **options)
+        finally:
+            store.close()
+    else:
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            count = write_ndjson(out, args.count, **options)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    print(f"✅ Generated {count} students", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
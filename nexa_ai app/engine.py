@@ -0,0 +1,279 @@
+"""
+NEXA AI core engine
+Learning rules shared by the Flask web app and the offline CLI
+"""
+
+import heapq
+import math
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import reflections
+from content import TOPIC_NAMES, get_pack
+from models import SCALE
+
+DECAY_RATE = 0.15          # retention lost per hour, forgetting curve
+DEFAULT_STRENGTH = 0.5     # strength assumed for a topic never assessed
+MIN_STRENGTH = 0.1
+MISTAKE_PENALTY = 0.1
+CORRECT_BONUS = 0.05
+BASELINE_STRONG = 0.7
+BASELINE_WEAK = 0.3
+BASELINE_MIN_LENGTH = 5    # answers longer than this count as known
+REVIEW_RETENTION = 0.7     # a topic is due once predicted retention drops below this
+MAX_STREAK = 6             # correct answers in a row that keep stretching the interval
+REFLECTION_WEIGHT = 0.2    # strength discount for a topic reflections keep finding hard
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+# =========================
+# PURE FUNCTIONS
+# =========================
+def retention(last_time, now, rate=DECAY_RATE):
+    """Forgetting-curve retention after studying at ``last_time``."""
+    hours = (now - last_time) / 3600
+    return round(math.exp(-rate * hours), 2)
+
+
+def readiness(strength_total, count):
+    """Readiness percentage from a fixed-point strength total and count."""
+    if not count:
+        return 0
+    return strength_total * 100 // (count * SCALE)
+
+
+def baseline_strength(answer):
+    """Initial strength for a baseline answer."""
+    return BASELINE_STRONG if len(answer.strip()) > BASELINE_MIN_LENGTH else BASELINE_WEAK
+
+
+@lru_cache(maxsize=1024)
+def _keyword_pattern(keyword):
+    """Substring match, but only whole numbers at a keyword's digit ends ("10" is not in "100")."""
+    pattern = re.escape(keyword)
+    if keyword[:1].isdigit():
+        pattern = r"(?<![\w.])" + pattern
+    if keyword[-1:].isdigit():
+        pattern += r"(?!\w|\.\d)"
+    return re.compile(pattern)
+
+
+def is_correct(topic, answer, keywords=None):
+    """Quiz marking rule: the answer must mention the topic or a question keyword.
+
+    A question listing several plain numbers ("12", "8") needs all of them.
+    """
+    answer = answer.strip().lower()
+    keywords = keywords or (topic,)
+    values = [k for k in keywords if NUMBER.fullmatch(k)]
+    if len(values) > 1:
+        if all(_keyword_pattern(k).search(answer) for k in values):
+            return True
+        keywords = [k for k in keywords if k not in values]
+    return any(_keyword_pattern(k).search(answer) for k in keywords)
+
+
+def priority(strength):
+    """Study-plan priority label for a strength value."""
+    return "High" if strength < 0.4 else "Medium" if strength < 0.7 else "Low"
+
+
+# =========================
+# STUDENT OPERATIONS
+# =========================
+def forgetting_retention(student, topic, now=None):
+    """Retention for one topic, using the student's fitted rate if any."""
+    now = time.time() if now is None else now
+    return retention(student.last_studied(topic, now), now, student.decay_rate(topic, DECAY_RATE))
+
+
+def readiness_score(student):
+    """Overall readiness score, O(1) from the model's running totals."""
+    return readiness(student.strength_total, student.strength_count)
+
+
+def recompute_readiness(student):
+    """Readiness from a full scan; used to check the running totals."""
+    total = count = 0
+    for _, value in student.strength_items():
+        total += round(value * SCALE)
+        count += 1
+    return readiness(total, count)
+
+
+def subject_summary(student, now=None):
+    """Per-subject aggregates, O(number of subjects)."""
+    now = time.time() if now is None else now
+    summary = []
+    for sid, subject in enumerate(get_pack().subject_names):
+        total, count, mistakes, oldest = student.subject_rollup(sid)
+        summary.append({
+            "subject": subject,
+            "topics": count,
+            "mean_strength": round(total / (count * SCALE), 2) if count else None,
+            "min_retention": 1.0 if math.isnan(oldest) else retention(
+                oldest, now, student.subject_decay_rate(sid, DECAY_RATE)),
+            "mistakes": mistakes
+        })
+    return summary
+
+
+def dashboard_topics(student, since=None, now=None):
+    """(full, rows): every topic's dashboard row, or only the rows changed after ``since``.
+
+    When the student's change log cannot answer ``since`` (None, 0, older
+    than the log's floor or newer than the student) every row is returned
+    with ``full`` True. Retention is computed when a row is sent, so rows
+    a client keeps between deltas slowly go stale.
+    """
+    full, rows = iter_dashboard_topics(student, since, now)
+    return full, list(rows)
+
+
+def iter_dashboard_topics(student, since=None, now=None):
+    """dashboard_topics() with the rows as a generator, one row built at a time."""
+    now = time.time() if now is None else now
+    full = since is None or not student.can_diff(since)
+    if full:
+        items = student.strength_items()
+    else:
+        items = ((TOPIC_NAMES[tid], student.get_strength(TOPIC_NAMES[tid]))
+                 for tid in student.changed_since(since))
+
+    def rows():
+        for topic, strength in items:
+            if strength is None:
+                continue
+            yield {
+                "topic": topic,
+                "strength": round(strength, 2),
+                "retention": forgetting_retention(student, topic, now),
+                "mistakes": student.get_mistakes(topic)
+            }
+
+    return full, rows()
+
+
+def register_mistake(student, topic):
+    """Register a mistake and lower topic strength."""
+    student.add_mistake(topic)
+    student.set_strength(topic, max(
+        MIN_STRENGTH, student.get_strength(topic, DEFAULT_STRENGTH) - MISTAKE_PENALTY
+    ))
+
+
+def register_correct(student, topic):
+    """Reward a correct answer."""
+    student.set_strength(topic, student.get_strength(topic, DEFAULT_STRENGTH) + CORRECT_BONUS)
+
+
+def answer_quiz(student, topic, answer, now=None, keywords=None):
+    """Mark a quiz answer, update the model and return whether it was correct."""
+    correct = bool(answer.strip()) and is_correct(topic, answer, keywords)
+    now = time.time() if now is None else now
+    if correct:
+        register_correct(student, topic)
+    else:
+        register_mistake(student, topic)
+    student.record_outcome(topic, now, correct)
+    student.mark_studied(topic, now)
+    return correct
+
+
+def apply_baseline(student, answers):
+    """Score baseline answers and return the initial readiness percentage.
+
+    Raises ValueError, before changing anything, for a topic that is not
+    in the content pack or an answer that is not a string.
+    """
+    topics = get_pack().topic_subject
+    for topic, answer in answers.items():
+        if topic not in topics:
+            raise ValueError(f"Unknown topic: {topic!r}")
+        if not isinstance(answer, str):
+            raise ValueError(f"Answer for {topic!r} must be a string")
+    score = 0
+    for topic, answer in answers.items():
+        strength = baseline_strength(answer)
+        student.set_strength(topic, strength)
+        if strength == BASELINE_STRONG:
+            score += 1
+    student.baseline_done = True
+    student.touch()
+    return int((score / len(answers)) * 100) if answers else 0
+
+
+def recent_recall(student, topic):
+    """Share of the topic's recent quiz answers that were correct, or None."""
+    history = student.topic_history(topic)
+    return None if history is None else history.recall()
+
+
+def next_review(student, topic):
+    """When the topic is next due, or None if it was never studied.
+
+    The base interval is how long the student's decay rate takes to bring
+    retention down to REVIEW_RETENTION; each correct answer in a row
+    doubles it.
+    """
+    last = student.last_studied(topic)
+    if last is None:
+        return None
+    hours = -math.log(REVIEW_RETENTION) / student.decay_rate(topic, DECAY_RATE)
+    history = student.topic_history(topic)
+    if history is not None:
+        hours *= 2 ** min(history.streak(), MAX_STREAK)
+    return last + hours * 3600
+
+
+def weakest_topics(student, n=None):
+    """Topics ordered from weakest to strongest."""
+    ranked = sorted(student.strength_items(), key=lambda item: item[1])
+    return [topic for topic, _ in ranked[:n]]
+
+
+def add_reflection(student, entry, when=None):
+    """Append a timestamped reflection entry and analyse it."""
+    when = when or datetime.now()
+    student.reflections.append({"entry": entry, "timestamp": when.isoformat()})
+    student.touch()
+    reflections.stats(student, new=1)
+
+
+def plan_strength(student, topic, now=None):
+    """Strength used to rank the study plan, lowered by "found it hard" reflections."""
+    signal = reflections.topic_signal(student, topic, now)
+    return student.get_strength(topic) - REFLECTION_WEIGHT * max(-1.0, min(1.0, signal))
+
+
+def study_plan(student, n=5, now=None):
+    """The ``n`` topics to study next, with why each one is on the plan."""
+    return list(iter_study_plan(student, n, now))
+
+
+def iter_study_plan(student, n=5, now=None):
+    """Yield study plan rows in order; every topic when ``n`` is None.
+
+    Only the (strength, topic) ranking keys are held at once: a heap of
+    ``n`` of them, or all of them for the whole plan. Rows are built as
+    they are yielded.
+    """
+    now = time.time() if now is None else now
+    keys = ((plan_strength(student, topic, now), topic) for topic, _ in student.strength_items())
+    if n is None:
+        ranked = sorted(keys, key=lambda item: item[0])
+    else:
+        ranked = heapq.nsmallest(n, keys, key=lambda item: item[0])
+    for effective, topic in ranked:
+        recall = recent_recall(student, topic)
+        yield {
+            "topic": topic,
+            "strength": round(student.get_strength(topic), 2),
+            "retention": forgetting_retention(student, topic, now),
+            "priority": priority(effective),
+            "reflection": round(reflections.topic_signal(student, topic, now), 2),
+            "recent_recall": None if recall is None else round(recall, 2),
+            "next_review": next_review(student, topic)
+        }
@@ -0,0 +1,213 @@
+"""
+NEXA AI forgetting-rate fitting
+Fits a decay rate per student and subject from quiz outcome history
+
+Recall ``t`` hours after the last quiz on a topic is modelled as
+``exp(-k * t)``, the same curve engine.retention uses. Each student's
+outcomes are binned by elapsed time into one flat array of sufficient
+statistics per subject and bin, in a single pass; each subject's ``k`` is
+then fitted to its bins by iteratively reweighted least squares, with a
+few pseudo-observations pulling it towards engine.DECAY_RATE when there
+is little data. Rates are stored in the student document as
+``decay_rates`` and read back in O(1) by engine.forgetting_retention.
+
+Usage:
+    python fitting.py [--store sqlite:students.db] [--workers 4]
+"""
+
+import argparse
+import math
+import os
+import sys
+from array import array
+
+import bulk
+import engine
+import serialization
+import storage
+from content import get_pack
+from history import TopicHistory
+from models import HISTORY_LIMIT
+
+CHUNK_SIZE = 500
+# Upper edges, in hours, of the elapsed-time bins
+BIN_EDGES = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, float("inf"))
+MIN_OBSERVATIONS = 5         # per subject, below this the default rate stays
+PRIOR_WEIGHT = 2.0           # pseudo-observations at the default rate, one hour out
+MIN_RATE, MAX_RATE = 0.005, 2.0
+MAX_ITERATIONS = 50
+DIGITS = 4
+
+# Layout of the statistics array: per subject and bin
+N, CORRECT, HOURS = range(3)
+WIDTH = 3
+
+
+def _bin(hours):
+    for b, edge in enumerate(BIN_EDGES):
+        if hours <= edge:
+            return b
+    return len(BIN_EDGES) - 1
+
+
+def collect(histories, subject_of, subjects):
+    """One pass over ``{topic: TopicHistory}`` into flat statistics.
+
+    Each outcome is paired with the time since the previous quiz on the
+    same topic; a topic's first outcome has nothing to pair with.
+    """
+    bins = len(BIN_EDGES)
+    stats = array("d", [0.0]) * (subjects * bins * WIDTH)
+    for topic, history in histories.items():
+        sid = subject_of(topic)
+        if sid < 0 or len(history) < 2:
+            continue
+        base = sid * bins * WIDTH
+        previous = history.time_at(0)
+        for i in range(1, len(history)):
+            ts = history.time_at(i)
+            hours = max(0.0, ts - previous) / 3600
+            previous = ts
+            slot = base + _bin(hours) * WIDTH
+            stats[slot + N] += 1
+            stats[slot + CORRECT] += history.outcome_at(i)
+            stats[slot + HOURS] += hours
+    return stats
+
+
+def _irls(bins):
+    """Fit k to [(n, correct, hours)] by iteratively reweighted least squares.
+
+    Each round is a weighted least-squares fit of the linearised model
+    ``ln(recall) = -k * t`` through the origin, with weights ``n p / (1 - p)``
+    from the current estimate; this converges on the binomial maximum
+    likelihood, which unlike a plain log fit copes with bins where every
+    answer was wrong.
+    """
+    k = engine.DECAY_RATE
+    for _ in range(MAX_ITERATIONS):
+        num = den = 0.0
+        for n, correct, t in bins:
+            p = min(math.exp(-k * t), 1 - 1e-9)
+            w = n * p / (1 - p)
+            z = -k * t + (correct / n - p) / p
+            num -= w * t * z
+            den += w * t * t
+        if not den:
+            break
+        new = min(MAX_RATE, max(MIN_RATE, num / den))
+        if abs(new - k) < 1e-7:
+            return new
+        k = new
+    return k
+
+
+def solve(stats, subjects):
+    """Fitted rate per subject id, or None where there is too little data."""
+    width = len(BIN_EDGES) * WIDTH
+    # The prior: PRIOR_WEIGHT answers an hour out, recalled at the default rate
+    prior = (PRIOR_WEIGHT, PRIOR_WEIGHT * math.exp(-engine.DECAY_RATE), 1.0)
+    rates = []
+    for sid in range(subjects):
+        bins, seen = [prior], 0
+        for slot in range(sid * width, (sid + 1) * width, WIDTH):
+            n = stats[slot + N]
+            if n and stats[slot + HOURS]:
+                bins.append((n, stats[slot + CORRECT], stats[slot + HOURS] / n))
+                seen += n
+        rates.append(round(_irls(bins), DIGITS) if seen >= MIN_OBSERVATIONS else None)
+    return rates
+
+
+def fit_student(data):
+    """Return ``{subject: rate}`` for a student document."""
+    pack = get_pack()
+    topic_subject, subject_ids = pack.topic_subject, pack.subject_ids
+
+    def subject_of(topic):
+        subject = topic_subject.get(topic)
+        return -1 if subject is None else subject_ids[subject]
+
+    histories = {topic: TopicHistory.decode(value, HISTORY_LIMIT)
+                 for topic, value in data.get("quiz_history", {}).items()}
+    subjects = len(pack.subject_names)
+    rates = solve(collect(histories, subject_of, subjects), subjects)
+    return {pack.subject_names[sid]: rate for sid, rate in enumerate(rates) if rate is not None}
+
+
+def fit_chunk(chunk):
+    """Fit a chunk of (student id, document) pairs; runs in worker processes.
+
+    Returns (student id, rates) only for students whose rates changed.
+    """
+    fitted = []
+    for student_id, data in chunk:
+        rates = fit_student(data)
+        if rates and rates != data.get("decay_rates"):
+            fitted.append((student_id, rates))
+    return fitted
+
+
+def _rows(store, fitted):
+    """Encoded rows setting fitted rates on each student's current record.
+
+    Records are re-read just before writing, so answers saved since the
+    scan are kept, and get a new revision so cached copies notice.
+    """
+    for student_id, rates in fitted:
+        data = store.load(student_id)
+        if data is None or data.get("decay_rates") == rates:
+            continue
+        data["decay_rates"] = rates
+        # Retention moves for whole subjects: version readers start over
+        data["version"] = data["version_floor"] = data.get("version", 0) + 1
+        data["revision"] = storage.new_revision()
+        yield student_id, serialization.encode_student(data)
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def fit_all(store, workers=0, chunk_size=CHUNK_SIZE, progress=None):
+    """Fit every student in ``store`` and write back changed rates.
+
+    Chunks are fitted in ``workers`` processes (in-process when 0) with at
+    most ``2 * workers`` in flight, so memory stays flat for any store.
+    """
+    summary = {"students": 0, "updated": 0}
+
+    def commit(fitted, size):
+        summary["updated"] += store.put_many(list(_rows(store, fitted)))
+        summary["students"] += size
+        if progress:
+            progress(summary)
+
+    chunks = ((chunk, len(chunk)) for chunk in _chunks(store.iter_students(), chunk_size))
+    bulk.pipeline(chunks, fit_chunk, workers, commit)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit NEXA AI forgetting rates")
+    parser.add_argument("--store", default=None, help="storage URL, e.g. sqlite:students.db")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    summary = fit_all(storage.open_store(args.store), args.workers, args.chunk_size,
+                      progress=lambda s: print(f"  {s['students']} fitted", file=sys.stderr))
+    print(f"✅ Fitted {summary['students']} students ({summary['updated']} updated)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
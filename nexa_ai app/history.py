@@ -0,0 +1,138 @@
+"""
+NEXA AI study history
+Fixed-capacity ring buffer of (timestamp, outcome) per topic
+
+Timestamps live in an ``array('d')`` and outcomes in the bits of one
+int, both indexed by ring slot, so appending is O(1) and queries read
+the arrays directly instead of building lists of pairs. In the student
+document a history is stored as base64 of
+
+    <uint16 count> <count float64 timestamps> <ceil(count / 8) outcome bytes>
+
+little-endian, oldest entry first.
+"""
+
+import base64
+import struct
+import sys
+from array import array
+
+_COUNT = struct.Struct("<H")
+
+
+class TopicHistory:
+    """The last ``capacity`` quiz outcomes for one topic."""
+
+    __slots__ = ("capacity", "times", "bits", "start")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("d")
+        self.bits = 0          # outcome of ring slot i is bit i
+        self.start = 0         # slot of the oldest entry once full
+
+    def append(self, ts, outcome):
+        """Add an outcome, dropping the oldest once at capacity."""
+        if len(self.times) < self.capacity:
+            slot = len(self.times)
+            self.times.append(ts)
+        else:
+            slot = self.start
+            self.times[slot] = ts
+            self.start = (slot + 1) % self.capacity
+        if outcome:
+            self.bits |= 1 << slot
+        else:
+            self.bits &= ~(1 << slot)
+
+    def __len__(self):
+        return len(self.times)
+
+    def _slot(self, i):
+        """Ring slot of the i-th entry, oldest first; negative counts from newest."""
+        n = len(self.times)
+        if not -n <= i < n:
+            raise IndexError("history index out of range")
+        return (self.start + i) % n
+
+    def time_at(self, i):
+        return self.times[self._slot(i)]
+
+    def outcome_at(self, i):
+        return self.bits >> self._slot(i) & 1
+
+    def last_time(self, default=None):
+        return self.time_at(-1) if self.times else default
+
+    def correct(self):
+        """Number of correct outcomes held."""
+        return bin(self.bits).count("1")
+
+    def recall(self, default=None):
+        """Share of held outcomes that were correct."""
+        return self.correct() / len(self.times) if self.times else default
+
+    def streak(self):
+        """Correct answers in a row, counting back from the newest."""
+        n = len(self.times)
+        for back in range(n):
+            if not self.bits >> self._slot(n - 1 - back) & 1:
+                return back
+        return n
+
+    # ------------------
+    # Serialisation
+    # ------------------
+    def _ordered(self):
+        """Timestamps and outcome bits rotated to oldest-first order."""
+        n, start = len(self.times), self.start
+        if not start:
+            return self.times, self.bits
+        times = self.times[start:] + self.times[:start]
+        bits = (self.bits >> start | self.bits << (n - start)) & ((1 << n) - 1)
+        return times, bits
+
+    def to_bytes(self):
+        times, bits = self._ordered()
+        if sys.byteorder != "little":
+            times = array("d", times)
+            times.byteswap()
+        n = len(times)
+        return _COUNT.pack(n) + times.tobytes() + bits.to_bytes((n + 7) // 8, "little")
+
+    @classmethod
+    def from_bytes(cls, data, capacity):
+        (n,) = _COUNT.unpack_from(data)
+        end = _COUNT.size + 8 * n
+        times = array("d")
+        times.frombytes(data[_COUNT.size:end])
+        if sys.byteorder != "little":
+            times.byteswap()
+        bits = int.from_bytes(data[end:end + (n + 7) // 8], "little")
+        if n > capacity:
+            # Stored with a larger capacity; keep the newest entries
+            times, bits, n = times[n - capacity:], bits >> (n - capacity), capacity
+        history = cls(capacity)
+        history.times = times
+        history.bits = bits & ((1 << n) - 1)
+        return history
+
+    def encode(self):
+        """Base64 text for the student document."""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, value, capacity):
+        """Read ``encode()`` output, or a list of [timestamp, outcome] pairs."""
+        if isinstance(value, str):
+            return cls.from_bytes(base64.b64decode(value), capacity)
+        history = cls(capacity)
+        for ts, outcome in value:
+            history.append(ts, outcome)
+        return history
+
+    def nbytes(self):
+        return sys.getsizeof(self) + sys.getsizeof(self.times) + sys.getsizeof(self.bits)
+
+    def __repr__(self):
+        return f"<TopicHistory {len(self)}/{self.capacity}>"
@@ -0,0 +1,188 @@
+"""
+NEXA AI background jobs
+Runs heavy admin operations off the request workers and tracks their progress
+
+A job is a registered function run on a small bounded thread pool. It gets
+its Job record and the submitted params, reports progress through
+``job.progress(...)`` (the bulk and fitting helpers already take such a
+callback) and returns a JSON-able result. Long operations still fan out to
+process pools of their own through their ``workers`` param; the job pool
+only orchestrates them, so it never needs more than a couple of threads.
+
+Cancellation is cooperative: a queued job is dropped at once, a running one
+stops with Cancelled at its next progress report. When JOBS_MAX_PENDING
+jobs are already waiting, submit() raises QueueFull and the API answers
+503 with Retry-After instead of queueing without bound.
+
+Jobs live in the worker process that accepted them, so with several
+gunicorn workers poll through the same worker, or run one worker for admin
+traffic.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULTS = {
+    "JOBS_WORKERS": int(os.getenv("JOBS_WORKERS", 2)),
+    "JOBS_MAX_PENDING": int(os.getenv("JOBS_MAX_PENDING", 8)),
+    # Finished jobs kept for polling before the oldest are forgotten
+    "JOBS_KEEP": int(os.getenv("JOBS_KEEP", 100)),
+}
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+JOB_TYPES = {}
+
+
+def job_type(name):
+    """Register ``func(job, **params)`` as the job type ``name``."""
+    def register(func):
+        JOB_TYPES[name] = func
+        return func
+    return register
+
+
+class QueueFull(Exception):
+    """Too many jobs are already waiting to run."""
+
+
+class Cancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class Job:
+    """One submitted operation and everything a poller needs to know about it."""
+
+    def __init__(self, kind, params):
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.params = params
+        self.state = QUEUED
+        self.progress_info = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def progress(self, info):
+        """Record progress; stops the job here if it has been cancelled."""
+        self.progress_info = dict(info) if isinstance(info, dict) else info
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "state": self.state,
+            "progress": self.progress_info,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Bounded pool of job threads plus the records of recent jobs."""
+
+    def __init__(self, workers=2, max_pending=8, keep=100, types=None):
+        self.max_pending = max_pending
+        self.keep = keep
+        self.types = JOB_TYPES if types is None else types
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers),
+                                        thread_name_prefix="nexa-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params=None):
+        func = self.types.get(kind)
+        if func is None:
+            raise ValueError(f"Unknown job type: {kind}")
+        job = Job(kind, params or {})
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.state == QUEUED)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs are already waiting")
+            self._jobs[job.id] = job
+            self._forget_finished()
+            job.future = self._pool.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        with self._lock:
+            if job.state != QUEUED:
+                return
+            job.state, job.started = RUNNING, time.time()
+        try:
+            result = func(job, **job.params)
+            state, error = DONE, None
+        except Cancelled:
+            result, state, error = None, CANCELLED, None
+        except Exception as e:
+            result, state, error = None, FAILED, str(e)
+            print(f"❌ Job {job.id} ({job.kind}) failed: {e}")
+        with self._lock:
+            job.result, job.state, job.error, job.finished = result, state, error, time.time()
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a job; returns the job, or None when it does not exist."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job._cancel.set()
+            if job.state == QUEUED:
+                job.future.cancel()
+                job.state, job.finished = CANCELLED, time.time()
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes (for the CLI and tests)."""
+        job = self._jobs[job_id]
+        try:
+            job.future.result(timeout)
+        except Exception:
+            pass
+        return job
+
+    def shutdown(self, wait=True):
+        for job in self.jobs():
+            if job.state not in FINISHED:
+                self.cancel(job.id)
+        self._pool.shutdown(wait=wait)
+
+
+def init_jobs(app):
+    """Create the worker's job queue, kept in ``app.extensions["jobs"]``."""
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    queue = JobQueue(app.config["JOBS_WORKERS"], app.config["JOBS_MAX_PENDING"],
+                     app.config["JOBS_KEEP"])
+    app.extensions["jobs"] = queue
+    return queue
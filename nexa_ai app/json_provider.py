@@ -0,0 +1,35 @@
+"""
+NEXA AI Flask JSON provider
+Plugs the serialisation layer into Flask's jsonify and request parsing
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from serialization import encode_default, dumps, loads
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by :func:`dumps` and :func:`loads`."""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent") or kwargs.get("sort_keys"):
+            kwargs.setdefault("default", encode_default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = json.dumps(obj, indent=2, default=encode_default) + "\n"
+        else:
+            body = dumps(obj) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
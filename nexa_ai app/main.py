@@ -1,108 +1,63 @@
-import json
-import os
-import time
-import math
 import random
-import socket
 
-DATA_FILE = "nexa-ai-student-data.json"
+import engine
+import predictor
+from content import get_pack
+from models import StudentModel
 
 # =========================
 # INTERNET / OFFLINE CHECK
 # =========================
 def is_online():
+    import socket  # only needed once an action asks for it
+
     try:
         socket.create_connection(("8.8.8.8", 53), timeout=2)
         return True
     except:
         return False
 
-# =========================
-# CORE SUBJECT & CONTENT DB
-# =========================
-SUBJECT_TOPICS = {
-    "math": ["linear equations", "algebra", "ratio"],
-    "biology": ["cells", "photosynthesis", "respiration"],
-    "chemistry": ["states of matter", "separation of mixtures"],
-    "physics": ["force", "energy", "motion"],
-    "geography": ["weather", "climate"]
-}
-
-SIMPLE_EXPLANATIONS = {
-    "linear equations": "A linear equation has power of x as 1. Example: 2x + 3 = 7.",
-    "algebra": "Algebra uses letters to represent numbers.",
-    "ratio": "Ratio compares two quantities.",
-    "cells": "Cells are the basic units of life.",
-    "photosynthesis": "Plants use sunlight to make food.",
-    "respiration": "Respiration releases energy from food.",
-    "states of matter": "Matter exists as solid, liquid, or gas.",
-    "separation of mixtures": "Mixtures can be separated by filtration or evaporation.",
-    "force": "A force is a push or pull.",
-    "energy": "Energy is the ability to do work.",
-    "motion": "Motion is a change in position.",
-    "weather": "Weather is daily atmospheric condition.",
-    "climate": "Climate is average weather over long time."
-}
-
 # =========================
 # STUDENT MODEL (ML-STYLE)
 # =========================
-def load_student():
-    """Load student data from JSON file with error handling."""
-    try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                return data
-    except json.JSONDecodeError:
-        print("⚠️  WARNING: Corrupted student data file. Starting fresh.")
-    except IOError as e:
-        print(f"⚠️  ERROR reading file: {e}. Starting fresh.")
-    
-    return {
-        "baseline_done": False,
-        "topic_strength": {},
-        "mistakes": {},
-        "study_log": {},
-        "reflections": []
-    }
-
-def save_student(data):
-    """Save student data to JSON file with error handling."""
-    try:
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
-    except IOError as e:
-        print(f"❌ ERROR saving data: {e}")
+# Loaded on first use so importing this module, or rendering the menu,
+# never touches the data file.
+_student = None
+
+def get_student():
+    global _student
+    if _student is None:
+        import storage  # loads the JSON backend, so not until it is needed
 
-student = load_student()
+        _student = StudentModel.from_dict(storage.load_student())
+    return _student
+
+def save():
+    import progress
+    import storage
+
+    student = get_student()
+    progress.record(student)
+    storage.save_student(student.to_dict())
 
 # =========================
 # BASELINE ASSESSMENT
 # =========================
 def baseline_assessment():
     """Baseline assessment with input validation."""
+    student = get_student()
     print("\n📋 NEXA AI Baseline Assessment")
-    total = 0
-    score = 0
+    answers = {}
 
     try:
-        for subject, topics in SUBJECT_TOPICS.items():
+        for subject, topics in get_pack().subject_topics.items():
             for topic in topics:
                 print(f"\nWhat do you know about {topic}?")
-                ans = input("Your answer: ").strip()
-                total += 1
-
-                if len(ans) > 5:
-                    student["topic_strength"][topic] = 0.7
-                    score += 1
-                else:
-                    student["topic_strength"][topic] = 0.3
+                answers[topic] = input("Your answer: ").strip()
 
-        student["baseline_done"] = True
-        save_student(student)
+        readiness = engine.apply_baseline(student, answers)
+        save()
 
-        readiness = int((score / total) * 100) if total > 0 else 0
         print(f"\n✅ Baseline completed. Initial Readiness Score: {readiness}%")
     except KeyboardInterrupt:
         print("\n⚠️  Baseline assessment cancelled.")
@@ -113,25 +68,19 @@ def baseline_assessment():
 # FORGETTING CURVE
 # =========================
 def forgetting_retention(topic):
-    last_time = student["study_log"].get(topic, time.time())
-    hours = (time.time() - last_time) / 3600
-    retention = math.exp(-0.15 * hours)
-    return round(retention, 2)
+    return engine.forgetting_retention(get_student(), topic)
 
 # =========================
 # READINESS SCORE
 # =========================
 def readiness_score():
-    if not student["topic_strength"]:
-        return 0
-    avg = sum(student["topic_strength"].values()) / len(student["topic_strength"])
-    return int(avg * 100)
+    return engine.readiness_score(get_student())
 
 # =========================
 # SIMPLE LANGUAGE EXPLAINER
 # =========================
 def simple_explain(topic):
-    return SIMPLE_EXPLANATIONS.get(topic, "Topic not found in database.")
+    return get_pack().explanations.get(topic, "Topic not found in database.")
 
 # =========================
 # ONLINE AI PLACEHOLDER
@@ -144,35 +93,35 @@ def online_ai_explain(topic):
 # MISTAKE PATTERN ANALYSIS
 # =========================
 def register_mistake(topic):
-    student["mistakes"].setdefault(topic, 0)
-    student["mistakes"][topic] += 1
-
-    student["topic_strength"][topic] = max(
-        0.1, student["topic_strength"].get(topic, 0.5) - 0.1
-    )
+    engine.register_mistake(get_student(), topic)
 
 # =========================
 # ADAPTIVE QUIZ ENGINE
 # =========================
 def adaptive_quiz():
     """Adaptive quiz with error handling."""
+    student = get_student()
     try:
-        if not student["topic_strength"]:
+        if not len(student):
             print("⚠️  No topics to quiz on. Complete baseline assessment first.")
             return
         
-        topic = min(student["topic_strength"], key=lambda t: student["topic_strength"][t])
+        import questions  # builds the question bank on first use
+
+        topic = engine.weakest_topics(student, 1)[0]
+        question = questions.draw(student, topic)
 
         print(f"\n🎯 Adaptive Question on: {topic}")
-        print(f"Explain: {topic}")
+        print(question.prompt if question else f"Explain: {topic}")
         ans = input("Your answer: ").strip().lower()
 
+        correct = engine.answer_quiz(student, topic, ans,
+                                     keywords=question.keywords if question else None)
+
         if not ans:
             print("⚠️  Empty answer. Marking as incorrect.")
-            register_mistake(topic)
-        elif topic in ans:
+        elif correct:
             print("✅ Correct understanding!")
-            student["topic_strength"][topic] += 0.05
         else:
             print("❌ Not correct.")
 
@@ -183,10 +132,7 @@ def adaptive_quiz():
                 print("📴 Offline mode.")
                 print("Correct (simple):", simple_explain(topic))
 
-            register_mistake(topic)
-
-        student["study_log"][topic] = time.time()
-        save_student(student)
+        save()
     except Exception as e:
         print(f"❌ ERROR in quiz: {e}")
 
@@ -195,35 +141,39 @@ def adaptive_quiz():
 # =========================
 def study_planner():
     print("\n🗓 Personalized Study Plan (NEXA AI)")
-    ranked = sorted(student["topic_strength"], key=lambda t: student["topic_strength"][t])
-
-    for topic in ranked[:5]:
-        retention = forgetting_retention(topic)
-        strength = round(student["topic_strength"][topic], 2)
-        print(f"- {topic:20} | Strength: {strength} | Retention: {retention}")
+    for item in engine.study_plan(get_student(), 5):
+        note = " | Found hard lately" if item["reflection"] >= 0.5 else ""
+        print(f"- {item['topic']:20} | Strength: {item['strength']} | "
+              f"Retention: {item['retention']} | Priority: {item['priority']}{note}")
 
 # =========================
 # EXAM QUESTION PREDICTOR
 # =========================
 def exam_predictor():
     print("\n📈 Likely Exam Focus Topics")
-    predicted = sorted(student["topic_strength"], key=lambda t: student["topic_strength"][t])
-    for t in predicted[:3]:
-        print("-", t)
+    for topic, score in predictor.ranking(get_student())[:3]:
+        print(f"- {topic:20} | Score: {score}")
 
 # =========================
 # MULTI-SUBJECT DASHBOARD
 # =========================
 def dashboard():
     print("\n📊 NEXA AI MULTI-SUBJECT DASHBOARD")
+    student = get_student()
 
     status = "🌐 ONLINE" if is_online() else "📴 OFFLINE"
     print("System Status:", status)
 
-    for topic, strength in student["topic_strength"].items():
+    for topic, strength in student.strength_items():
         retention = forgetting_retention(topic)
         print(f"{topic:22} | Strength: {round(strength,2)} | Retention: {retention}")
 
+    print("\nBy subject:")
+    for row in engine.subject_summary(student):
+        if row["topics"]:
+            print(f"{row['subject']:22} | Mean strength: {row['mean_strength']} | "
+                  f"Min retention: {row['min_retention']} | Mistakes: {row['mistakes']}")
+
     print("\nOverall Readiness Score:", readiness_score(), "%")
 
 # =========================
@@ -239,58 +189,96 @@ def reflection_journal():
             print("⚠️  Empty entry. Reflection not saved.")
             return
         
-        student["reflections"].append(entry)
-        save_student(student)
+        engine.add_reflection(get_student(), entry)
+        save()
         print("✅ Reflection saved.")
     except Exception as e:
         print(f"❌ ERROR saving reflection: {e}")
 
+# =========================
+# SYNC WITH WEB SERVER
+# =========================
+def sync_with_server():
+    """Send local changes to the web server and pull its changes."""
+    import sync  # pulls in urllib/http.client, so only when syncing
+
+    print(f"\n🔄 Syncing with {sync.SYNC_URL}")
+    try:
+        state = sync.SyncState.load()
+        sent, received = sync.sync(get_student(), state, sync.http_transport())
+        save()
+        state.save()
+        print(f"✅ Sync complete ({sent} bytes sent, {received} bytes received).")
+    except sync.SyncError as e:
+        print(f"❌ ERROR: {e}")
+    except OSError as e:
+        print(f"📴 Server unreachable ({e}). Your progress is saved locally.")
+
 # =========================
 # MAIN NEXA AI SYSTEM
 # =========================
-def main():
-    print("========================================")
-    print("              NEXA AI")
-    print(" Grade 9 Hybrid AI Revision Platform")
-    print(" Offline-First • Online-Boosted AI")
-    print("========================================")
-    
-    print("\n📚 APP OVERVIEW:")
-    print("NEXA AI is an intelligent revision platform for Grade 9 students")
-    print("covering Math, Biology, Chemistry, Physics, and Geography.")
-    print("\n🎯 KEY FEATURES:")
-    print("  • Baseline Assessment - Initial knowledge evaluation")
-    print("  • Dashboard - Track progress across all topics")
-    print("  • Personalized Study Plan - Focuses on your weak areas")
-    print("  • Adaptive Quiz - Questions adapt to your level")
-    print("  • Exam Predictor - Identifies likely exam topics")
-    print("  • Smart Explainer - Offline mode + Online AI assistance")
-    print("  • Reflection Journal - Track what you find difficult")
-    print("\n🔄 SMART FEATURES:")
-    print("  • Forgetting Curve Algorithm - Predicts retention rates")
-    print("  • Mistake Tracking - Learns from your errors")
-    print("  • Auto-saves Progress - Your data is preserved")
-    print("\n🌐 CONNECTIVITY:")
-    print("  • Works OFFLINE with simplified explanations")
-    print("  • Activates ONLINE mode for advanced AI help (if internet available)")
-    print("========================================\n")
-
-    if not student["baseline_done"]:
+BANNER = """========================================
+              NEXA AI
+ Grade 9 Hybrid AI Revision Platform
+ Offline-First • Online-Boosted AI
+========================================"""
+
+OVERVIEW = """
+📚 APP OVERVIEW:
+NEXA AI is an intelligent revision platform for Grade 9 students
+covering Math, Biology, Chemistry, Physics, and Geography.
+
+🎯 KEY FEATURES:
+  • Baseline Assessment - Initial knowledge evaluation
+  • Dashboard - Track progress across all topics
+  • Personalized Study Plan - Focuses on your weak areas
+  • Adaptive Quiz - Questions adapt to your level
+  • Exam Predictor - Identifies likely exam topics
+  • Smart Explainer - Offline mode + Online AI assistance
+  • Reflection Journal - Track what you find difficult
+
+🔄 SMART FEATURES:
+  • Forgetting Curve Algorithm - Predicts retention rates
+  • Mistake Tracking - Learns from your errors
+  • Auto-saves Progress - Your data is preserved
+
+🌐 CONNECTIVITY:
+  • Works OFFLINE with simplified explanations
+  • Activates ONLINE mode for advanced AI help (if internet available)
+========================================"""
+
+MENU = """
+Menu:
+1. Dashboard
+2. Personalized study plan
+3. Adaptive quiz
+4. Exam question predictor
+5. Topic explainer (Offline/Online)
+6. Reflection journal
+7. Sync with server
+8. Exit"""
+
+def render_menu():
+    print(MENU)
+
+def ensure_baseline():
+    """Run the baseline first if this student has never done it."""
+    if not get_student().baseline_done:
+        print(OVERVIEW)
         baseline_assessment()
 
+def main():
+    print(BANNER)
+
     while True:
         try:
-            print("\nMenu:")
-            print("1. Dashboard")
-            print("2. Personalized study plan")
-            print("3. Adaptive quiz")
-            print("4. Exam question predictor")
-            print("5. Topic explainer (Offline/Online)")
-            print("6. Reflection journal")
-            print("7. Exit")
+            render_menu()
 
             choice = input("Choose option: ").strip()
 
+            if choice in ("1", "2", "3", "4"):
+                ensure_baseline()
+
             if choice == "1":
                 dashboard()
 
@@ -321,11 +309,14 @@ def main():
                 reflection_journal()
 
             elif choice == "7":
+                sync_with_server()
+
+            elif choice == "8":
                 print("Goodbye! Keep improving with NEXA AI 💪📚")
                 break
 
             else:
-                print("❌ Invalid option. Please choose 1-7.")
+                print("❌ Invalid option. Please choose 1-8.")
         
         except KeyboardInterrupt:
             print("\n⚠️  App interrupted. Exiting...")
@@ -0,0 +1,352 @@
+"""
+NEXA AI memory accounting
+Approximate per-worker memory use by subsystem, budgets and tracemalloc snapshots
+
+Every gunicorn worker keeps its own student cache, content pack, question
+bank and compression cache. ``report()`` estimates what each of them holds
+(``sys.getsizeof`` walks, so shared and interned objects are approximate)
+next to the process RSS, so a growing worker can be pinned on a subsystem
+or on individual students, e.g. one whose reflections keep piling up.
+
+Two budgets trigger eviction. The student cache is an LRU capped at
+MEMORY_STUDENT_CACHE_BYTES (and MEMORY_STUDENT_CACHE_SIZE entries); every
+MEMORY_CHECK_EVERY requests the worker also compares its RSS with
+MEMORY_RSS_BUDGET and, when over, halves the student cache and empties the
+compression cache. Evicted students are reloaded from the store on their
+next request, so eviction never loses data.
+"""
+
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+DEFAULTS = {
+    "MEMORY_STUDENT_CACHE_BYTES": int(os.getenv("MEMORY_STUDENT_CACHE_BYTES", 64 * 1024 * 1024)),
+    "MEMORY_STUDENT_CACHE_SIZE": int(os.getenv("MEMORY_STUDENT_CACHE_SIZE", 10000)),
+    # 0 disables the RSS check
+    "MEMORY_RSS_BUDGET": int(os.getenv("MEMORY_RSS_BUDGET", 0)),
+    "MEMORY_CHECK_EVERY": int(os.getenv("MEMORY_CHECK_EVERY", 100)),
+    "MEMORY_TRACE_FRAMES": int(os.getenv("MEMORY_TRACE_FRAMES", 1)),
+}
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by a tree of builtin containers."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, array, int, float)):
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def rss_bytes():
+    """Resident set size of this process, or the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ==================
+# STUDENT CACHE
+# ==================
+class StudentCache:
+    """LRU of StudentModel records kept under a byte and an entry budget.
+
+    Sizes come from ``StudentModel.nbytes()`` when a student is put, which
+    happens on every save, so the total follows the records as they grow.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=10000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()     # student id -> (model, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, student_id):
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(student_id)
+            return entry[0]
+
+    def __getitem__(self, student_id):
+        student = self.get(student_id)
+        if student is None:
+            raise KeyError(student_id)
+        return student
+
+    def put(self, student_id, student):
+        size = student.nbytes()
+        with self._lock:
+            old = self._entries.pop(student_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[student_id] = (student, size)
+            self._bytes += size
+            self._evict(self.max_bytes, self.max_entries, keep=1)
+
+    def pop(self, student_id, default=None):
+        with self._lock:
+            entry = self._entries.pop(student_id, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def shrink(self, max_bytes):
+        """Evict least recently used students until under ``max_bytes``."""
+        with self._lock:
+            return self._evict(max_bytes, self.max_entries)
+
+    def _evict(self, max_bytes, max_entries, keep=0):
+        evicted = 0
+        while len(self._entries) > keep and (self._bytes > max_bytes
+                                             or len(self._entries) > max_entries):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def sizes(self):
+        """(student id, bytes) for every cached student, largest first."""
+        with self._lock:
+            sizes = [(student_id, size) for student_id, (_, size) in self._entries.items()]
+        return sorted(sizes, key=lambda item: -item[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def nbytes(self):
+        return self._bytes
+
+    def __contains__(self, student_id):
+        return student_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ==================
+# TRACEMALLOC
+# ==================
+class Snapshots:
+    """tracemalloc snapshots taken on demand, each diffed against the last."""
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.previous = None
+        self.count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self):
+        import tracemalloc
+        return tracemalloc.is_tracing()
+
+    def take(self, limit=20):
+        """Snapshot now and return the allocation sites that grew the most.
+
+        The first call starts tracing, so its diff is against an empty
+        snapshot and only shows what was allocated since.
+        """
+        import tracemalloc
+
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self.previous, self.count = None, 0
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ))
+            if self.previous is None:
+                stats = snapshot.statistics("lineno")
+                top = [self._describe(stat, stat.size, stat.count) for stat in stats[:limit]]
+            else:
+                stats = snapshot.compare_to(self.previous, "lineno")
+                top = [self._describe(stat, stat.size_diff, stat.count_diff)
+                       for stat in stats[:limit]]
+            self.previous = snapshot
+            self.count += 1
+            current, peak = tracemalloc.get_traced_memory()
+            return {"snapshot": self.count, "traced_bytes": current,
+                    "traced_peak": peak, "top": top}
+
+    @staticmethod
+    def _describe(stat, size_diff, count_diff):
+        frame = stat.traceback[0]
+        return {"file": frame.filename, "line": frame.lineno, "size": stat.size,
+                "size_diff": size_diff, "count_diff": count_diff}
+
+    def stop(self):
+        import tracemalloc
+
+        with self._lock:
+            tracemalloc.stop()
+            self.previous, self.count = None, 0
+
+
+# ==================
+# REPORTING
+# ==================
+class MemoryMonitor:
+    """Per-worker accounting, session sampling and the RSS budget check."""
+
+    def __init__(self, cache, rss_budget=0, check_every=100, frames=1):
+        self.cache = cache
+        self.rss_budget = rss_budget
+        self.check_every = check_every
+        self.snapshots = Snapshots(frames)
+        self.caches = {}            # name -> rebuildable cache with nbytes() and clear()
+        self.accounted = {}         # name -> other state with nbytes(), reported only
+        self.requests = 0
+        self.sessions = [0, 0, 0]   # sampled count, total bytes, largest
+        self.over_budget = 0
+        self._sized = {}            # subsystem -> (object, bytes) for immutable objects
+
+    def _size_once(self, name, obj, exclude=()):
+        """Size of an object that is never mutated, measured once per object.
+
+        Objects in ``exclude`` are reported elsewhere and not counted.
+        """
+        if obj is None:
+            return 0
+        cached = self._sized.get(name)
+        if cached is None or cached[0] is not obj:
+            seen = {id(other) for other in exclude if other is not None}
+            cached = self._sized[name] = (obj, deep_sizeof(obj, seen))
+        return cached[1]
+
+    def sample_session(self, session):
+        """Record the size of one session's contents."""
+        size = deep_sizeof(dict(session))
+        count, total, largest = self.sessions
+        self.sessions = [count + 1, total + size, max(largest, size)]
+
+    def tick(self):
+        """Count a request; every ``check_every`` requests check the RSS budget.
+
+        Returns True on the requests that were sampled.
+        """
+        self.requests += 1
+        if self.check_every <= 0 or self.requests % self.check_every:
+            return False
+        if self.rss_budget and rss_bytes() > self.rss_budget:
+            self.relieve()
+        return True
+
+    def relieve(self):
+        """Free what this worker can rebuild: half the students, every cache."""
+        self.over_budget += 1
+        evicted = self.cache.shrink(self.cache.nbytes() // 2)
+        for cache in self.caches.values():
+            cache.clear()
+        print(f"⚠️ Worker {os.getpid()} over its memory budget, "
+              f"evicted {evicted} cached students")
+        return evicted
+
+    def subsystems(self):
+        """Approximate bytes held by each subsystem of this worker."""
+        import content
+
+        pack = content._pack
+        bank = pack.built("questions") if pack else None
+        totals = {
+            "student_cache": self.cache.nbytes(),
+            "content_pack": self._size_once("content_pack", pack, exclude=(bank,)),
+            "question_bank": self._size_once("question_bank", bank),
+        }
+        for name, part in {**self.caches, **self.accounted}.items():
+            totals[name] = part.nbytes()
+        return totals
+
+    def report(self, top=10):
+        count, total, largest = self.sessions
+        students = self.cache.sizes()
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "rss_budget": self.rss_budget,
+            "over_budget": self.over_budget,
+            "subsystems": self.subsystems(),
+            "students": {
+                "cached": len(students),
+                "bytes": self.cache.nbytes(),
+                "bytes_per_student": self.cache.nbytes() // len(students) if students else 0,
+                "budget_bytes": self.cache.max_bytes,
+                "budget_entries": self.cache.max_entries,
+                "evictions": self.cache.evictions,
+                "largest": [{"id": student_id, "bytes": size}
+                            for student_id, size in students[:top]],
+            },
+            "sessions": {
+                "sampled": count,
+                "bytes_per_session": total // count if count else 0,
+                "largest": largest,
+            },
+            "tracing": self.snapshots.tracing,
+            "requests": self.requests,
+            "time": time.time(),
+        }
+
+
+def init_memory(app):
+    """Create the worker's student cache and register memory accounting.
+
+    Returns the StudentCache; the MemoryMonitor is kept in
+    ``app.extensions["memory"]``.
+    """
+    from flask import session
+
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    cache = StudentCache(app.config["MEMORY_STUDENT_CACHE_BYTES"],
+                         app.config["MEMORY_STUDENT_CACHE_SIZE"])
+    monitor = MemoryMonitor(cache, app.config["MEMORY_RSS_BUDGET"],
+                            app.config["MEMORY_CHECK_EVERY"], app.config["MEMORY_TRACE_FRAMES"])
+    if "compression_cache" in app.extensions:
+        monitor.caches["compression_cache"] = app.extensions["compression_cache"]
+    limiter = app.extensions.get("rate_limiter")
+    if limiter is not None and hasattr(limiter.buckets, "nbytes"):
+        monitor.accounted["rate_limit_buckets"] = limiter.buckets
+    app.extensions["memory"] = monitor
+
+    @app.after_request
+    def account_memory(response):
+        if monitor.tick():
+            monitor.sample_session(session)
+        return response
+
+    return cache
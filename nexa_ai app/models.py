@@ -0,0 +1,459 @@
+"""
+NEXA AI student model
+Compact in-memory representation of a student document
+"""
+
+import math
+import sys
+from array import array
+
+from content import TOPIC_NAMES, get_pack, topic_id
+from history import TopicHistory
+
+NAN = float("nan")
+# Strengths are summed in fixed point so the running total never drifts
+SCALE = 10 ** 6
+# Per-subject rollup layout: [strength total, strength count, mistakes, oldest study]
+ROLLUP_WIDTH = 4
+TOTAL, COUNT, MISTAKES, OLDEST = range(ROLLUP_WIDTH)
+# Quiz outcomes kept per topic for fitting forgetting rates
+HISTORY_LIMIT = 32
+STANDARD_KEYS = ("username", "baseline_done", "topic_strength", "mistakes",
+                 "study_log", "reflections", "version", "topic_versions", "version_floor",
+                 "quiz_history", "decay_rates", "question_state", "reflection_stats", "progress",
+                 "revision")
+
+
+class StudentModel:
+    """A student record with per-topic columns indexed by interned topic id.
+
+    ``strength`` and ``studied`` hold NaN for topics the student has no
+    value for; ``mistakes`` holds counts, with ``mistake_mask`` recording
+    which topics have an entry at all so the JSON shape round-trips
+    exactly. A missing ``username`` is kept as None, and keys this class
+    does not model are kept in ``extra``.
+
+    ``strength_total`` and ``strength_count`` are maintained on every
+    strength change so readiness can be read in O(1). ``rollup`` holds the
+    same aggregates per subject, plus mistakes and the oldest study time,
+    ``ROLLUP_WIDTH`` slots per subject id.
+
+    ``version`` increases on every change made through the public
+    mutators, and ``topic_version`` records the version at which each
+    topic last changed, so callers can ask what changed since a version.
+    ``floor`` is the oldest version that question can be answered from;
+    compact() raises it after changes the per-topic log cannot express.
+
+    ``history`` maps a topic id to a TopicHistory ring buffer of its last
+    HISTORY_LIMIT quiz outcomes, and ``decay`` holds the forgetting rate
+    fitted for each subject id (NaN where none has been fitted). Subject
+    ids are those of ``pack``, the content pack the record was built
+    against; after a reload, is_current() is False and the record should
+    be rebuilt with from_dict(to_dict()) before it is used again.
+
+    ``saved`` is (version, revision, reflection count) of the stored
+    document the record was loaded from or last saved as. The revision
+    is a token written with every save, so is_stale() can tell when the
+    stored document was replaced by someone else (a decay fit, an import
+    or another worker) and rebase() can move this record's own changes
+    onto it.
+
+    ``derived`` caches results computed from the record, such as exam
+    predictions; every change through touch() clears it. ``questions``
+    holds the student's question-bank draw state, ``insights`` the
+    reflection analytics and ``progress`` the readiness history, all
+    decoded on first use.
+    """
+
+    __slots__ = ("username", "baseline_done", "strength", "studied",
+                 "mistakes", "mistake_mask", "reflections", "extra",
+                 "strength_total", "strength_count", "rollup",
+                 "version", "floor", "topic_version", "history", "decay", "derived",
+                 "questions", "insights", "progress", "pack", "saved")
+
+    def __init__(self, username="Student", baseline_done=False):
+        self.username = username
+        self.baseline_done = baseline_done
+        self.strength = array("d")
+        self.studied = array("d")
+        self.mistakes = array("I")
+        self.mistake_mask = 0
+        self.reflections = []
+        self.extra = None
+        self.strength_total = 0
+        self.strength_count = 0
+        self.rollup = array("d")
+        self.version = 0
+        self.floor = 0
+        self.topic_version = array("I")
+        self.history = {}
+        self.decay = array("d")
+        self.derived = None
+        self.questions = None
+        self.insights = None
+        self.progress = None
+        self.pack = get_pack()
+        self.saved = (0, None, 0)
+
+    # ------------------
+    # Conversion
+    # ------------------
+    @classmethod
+    def from_dict(cls, data):
+        """Build a model from the persisted JSON shape."""
+        username = data.get("username")
+        if isinstance(username, str):
+            username = sys.intern(username)
+        model = cls(username, data.get("baseline_done", False))
+        strength = [(topic_id(t), v) for t, v in data.get("topic_strength", {}).items()]
+        mistakes = [(topic_id(t), v) for t, v in data.get("mistakes", {}).items()]
+        studied = [(topic_id(t), v) for t, v in data.get("study_log", {}).items()]
+        versions = [(topic_id(t), v) for t, v in data.get("topic_versions", {}).items()]
+        size = 1 + max((tid for tid, _ in strength + mistakes + studied + versions),
+                       default=-1)
+        model._resize(size)
+        for tid, value in strength:
+            model._store_strength(tid, value)
+        for tid, count in mistakes:
+            model._store_mistakes(tid, count)
+        for tid, ts in studied:
+            model._store_studied(tid, ts)
+        for tid, version in versions:
+            model.topic_version[tid] = version
+        for topic, value in data.get("quiz_history", {}).items():
+            model.history[topic_id(topic)] = TopicHistory.decode(value, HISTORY_LIMIT)
+        subject_ids = model.pack.subject_ids
+        for subject, rate in data.get("decay_rates", {}).items():
+            if subject in subject_ids:
+                model._store_decay(subject_ids[subject], rate)
+        model.version = data.get("version", 0)
+        model.floor = data.get("version_floor", 0)
+        model.questions = data.get("question_state")
+        model.insights = data.get("reflection_stats")
+        model.progress = data.get("progress")
+        # Early versions saved reflections as plain strings
+        model.reflections = [{"entry": entry} if isinstance(entry, str) else entry
+                             for entry in data.get("reflections", [])]
+        model.saved = (model.version, data.get("revision"), len(model.reflections))
+        extra = {k: v for k, v in data.items() if k not in STANDARD_KEYS}
+        model.extra = extra or None
+        return model
+
+    def to_dict(self):
+        """Return the persisted JSON shape."""
+        data = {}
+        if self.username is not None:
+            data["username"] = self.username
+        data["baseline_done"] = self.baseline_done
+        data["topic_strength"] = dict(self.strength_items())
+        data["mistakes"] = {TOPIC_NAMES[tid]: self.mistakes[tid]
+                            for tid in self._mistake_ids()}
+        data["study_log"] = {TOPIC_NAMES[tid]: ts for tid, ts in enumerate(self.studied)
+                             if not math.isnan(ts)}
+        data["reflections"] = list(self.reflections)
+        if self.history:
+            data["quiz_history"] = {TOPIC_NAMES[tid]: history.encode()
+                                    for tid, history in sorted(self.history.items())}
+        if self.decay:
+            names = self.pack.subject_names
+            rates = {names[sid]: rate for sid, rate in enumerate(self.decay)
+                     if sid < len(names) and not math.isnan(rate)}
+            if rates:
+                data["decay_rates"] = rates
+        if self.questions:
+            state = self.questions
+            data["question_state"] = state if isinstance(state, dict) else state.encode()
+        if self.insights:
+            state = self.insights
+            data["reflection_stats"] = state if isinstance(state, dict) else state.encode()
+        if self.progress:
+            state = self.progress
+            data["progress"] = state if isinstance(state, dict) else state.encode()
+        if self.version:
+            data["version"] = self.version
+            data["topic_versions"] = {TOPIC_NAMES[tid]: v for tid, v in enumerate(self.topic_version)
+                                      if v}
+        if self.floor:
+            data["version_floor"] = self.floor
+        if self.saved[1]:
+            data["revision"] = self.saved[1]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def is_stale(self, data):
+        """Whether the stored document ``data`` was written by someone else since this record was saved."""
+        return (data.get("version", 0), data.get("revision")) != self.saved[:2]
+
+    def rebase(self, data):
+        """A record of the newer stored ``data`` with this record's unsaved changes on top.
+
+        Topics changed since the last save and reflections written since
+        are copied over; fitted rates, progress and anything this record
+        did not change come from ``data``.
+        """
+        model = StudentModel.from_dict(data)
+        for tid in self.changed_since(self.saved[0]):
+            if tid >= len(model.strength):
+                model._resize(tid + 1)
+            if not math.isnan(self.strength[tid]):
+                model._store_strength(tid, self.strength[tid])
+            if self.mistake_mask >> tid & 1:
+                model._store_mistakes(tid, self.mistakes[tid])
+            if not math.isnan(self.studied[tid]):
+                model._store_studied(tid, self.studied[tid])
+            if tid in self.history:
+                model.history[tid] = self.history[tid]
+            model.touch(tid)
+        added = self.reflections[self.saved[2]:]
+        if added:
+            model.reflections.extend(added)
+            model.touch()
+        if self.baseline_done and not model.baseline_done:
+            model.baseline_done = True
+            model.touch()
+        if self.questions is not None:
+            model.questions = self.questions
+        if self.extra:
+            model.extra = dict(model.extra or {}, **self.extra)
+        return model
+
+    # ------------------
+    # Column access
+    # ------------------
+    def _resize(self, size):
+        """Grow every column to exactly ``size`` entries."""
+        missing = size - len(self.strength)
+        if missing > 0:
+            # Concatenation allocates exactly; extend() would over-allocate
+            self.strength = self.strength + array("d", [NAN]) * missing
+            self.studied = self.studied + array("d", [NAN]) * missing
+            self.mistakes = self.mistakes + array("I", [0]) * missing
+            self.topic_version = self.topic_version + array("I", [0]) * missing
+
+    def _column(self, topic):
+        """Return the topic id, growing the columns to include it."""
+        tid = topic_id(topic)
+        if tid >= len(self.strength):
+            self._resize(tid + 1)
+        return tid
+
+    def _existing(self, topic):
+        tid = topic_id(topic, create=False)
+        if tid is None or tid >= len(self.strength):
+            return None
+        return tid
+
+    def _mistake_ids(self):
+        mask, tid = self.mistake_mask, 0
+        while mask:
+            if mask & 1:
+                yield tid
+            mask >>= 1
+            tid += 1
+
+    def has_topic(self, topic):
+        tid = self._existing(topic)
+        return tid is not None and not math.isnan(self.strength[tid])
+
+    def get_strength(self, topic, default=None):
+        tid = self._existing(topic)
+        if tid is None or math.isnan(self.strength[tid]):
+            return default
+        return self.strength[tid]
+
+    def _subject_slot(self, tid):
+        """Offset of the topic's subject in ``rollup``, or -1."""
+        sid = self.pack.subject_for(tid)
+        if sid < 0:
+            return -1
+        if (sid + 1) * ROLLUP_WIDTH > len(self.rollup):
+            missing = sid + 1 - len(self.rollup) // ROLLUP_WIDTH
+            self.rollup = self.rollup + array("d", [0.0, 0.0, 0.0, NAN]) * missing
+        return sid * ROLLUP_WIDTH
+
+    def _store_strength(self, tid, value):
+        old = self.strength[tid]
+        delta = round(value * SCALE)
+        added = math.isnan(old)
+        if not added:
+            delta -= round(old * SCALE)
+        self.strength_total += delta
+        self.strength_count += added
+        self.strength[tid] = value
+        slot = self._subject_slot(tid)
+        if slot >= 0:
+            self.rollup[slot + TOTAL] += delta
+            self.rollup[slot + COUNT] += added
+
+    def _store_mistakes(self, tid, count):
+        slot = self._subject_slot(tid)
+        if slot >= 0:
+            self.rollup[slot + MISTAKES] += count - self.mistakes[tid]
+        self.mistakes[tid] = count
+        self.mistake_mask |= 1 << tid
+
+    def _store_studied(self, tid, ts):
+        old = self.studied[tid]
+        self.studied[tid] = ts
+        slot = self._subject_slot(tid)
+        if slot < 0:
+            return
+        oldest = self.rollup[slot + OLDEST]
+        if math.isnan(oldest) or ts < oldest:
+            self.rollup[slot + OLDEST] = ts
+        elif old == oldest and ts > old:
+            # The subject's oldest topic moved forward; rescan that subject only
+            self.rollup[slot + OLDEST] = min(
+                (self.studied[t] for t in self.pack.subject_topic_ids[slot // ROLLUP_WIDTH]
+                 if t < len(self.studied) and not math.isnan(self.studied[t])),
+                default=NAN,
+            )
+
+    def _store_decay(self, sid, rate):
+        missing = sid + 1 - len(self.decay)
+        if missing > 0:
+            self.decay = self.decay + array("d", [NAN]) * missing
+        self.decay[sid] = rate
+
+    def touch(self, tid=None):
+        """Record a change, optionally to one topic, and return the new version."""
+        self.version += 1
+        self.derived = None
+        if tid is not None:
+            self.topic_version[tid] = self.version
+        return self.version
+
+    def changed_since(self, version):
+        """Topic ids changed after ``version``."""
+        return [tid for tid, v in enumerate(self.topic_version) if v > version]
+
+    def can_diff(self, version):
+        """Whether changed_since(version) covers everything changed after it."""
+        return 0 < version and self.floor <= version <= self.version
+
+    def compact(self, version=None):
+        """Start a new version history, optionally continuing from ``version``.
+
+        Changes up to here can no longer be listed per topic, so anyone
+        holding an older version needs the full record.
+        """
+        self.version = max(self.version, version or 0)
+        self.floor = self.touch()
+        return self.floor
+
+    def set_strength(self, topic, value):
+        tid = self._column(topic)
+        self._store_strength(tid, value)
+        self.touch(tid)
+
+    def topics(self):
+        """Topic names with a strength value, in topic-id order."""
+        return [TOPIC_NAMES[tid] for tid, s in enumerate(self.strength) if not math.isnan(s)]
+
+    def strength_items(self):
+        for tid, s in enumerate(self.strength):
+            if not math.isnan(s):
+                yield TOPIC_NAMES[tid], s
+
+    def get_mistakes(self, topic):
+        tid = self._existing(topic)
+        return 0 if tid is None else self.mistakes[tid]
+
+    def add_mistake(self, topic, count=1):
+        tid = self._column(topic)
+        self._store_mistakes(tid, self.mistakes[tid] + count)
+        self.touch(tid)
+
+    def last_studied(self, topic, default=None):
+        tid = self._existing(topic)
+        if tid is None or math.isnan(self.studied[tid]):
+            return default
+        return self.studied[tid]
+
+    def mark_studied(self, topic, ts):
+        tid = self._column(topic)
+        self._store_studied(tid, ts)
+        self.touch(tid)
+
+    def record_outcome(self, topic, ts, correct):
+        """Append a quiz outcome to the topic's ring buffer, in O(1)."""
+        tid = self._column(topic)
+        history = self.history.get(tid)
+        if history is None:
+            history = self.history[tid] = TopicHistory(HISTORY_LIMIT)
+        history.append(ts, correct)
+        self.touch(tid)
+
+    def topic_history(self, topic):
+        """The topic's TopicHistory, or None if it was never quizzed."""
+        tid = self._existing(topic)
+        return None if tid is None else self.history.get(tid)
+
+    def set_decay_rate(self, sid, rate):
+        self._store_decay(sid, rate)
+        # Retention of every topic in the subject changes with the rate
+        version = self.touch()
+        topic_ids = self.pack.subject_topic_ids
+        for tid in topic_ids[sid] if sid < len(topic_ids) else ():
+            if tid < len(self.topic_version):
+                self.topic_version[tid] = version
+
+    def decay_rate(self, topic, default=None):
+        """The fitted forgetting rate for the topic's subject, in O(1)."""
+        tid = self._existing(topic)
+        if tid is None:
+            return default
+        return self.subject_decay_rate(self.pack.subject_for(tid), default)
+
+    def subject_decay_rate(self, sid, default=None):
+        if 0 <= sid < len(self.decay) and not math.isnan(self.decay[sid]):
+            return self.decay[sid]
+        return default
+
+    def subject_rollup(self, sid):
+        """(strength total, strength count, mistakes, oldest study) for a subject."""
+        slot = sid * ROLLUP_WIDTH
+        if slot >= len(self.rollup):
+            return 0, 0, 0, NAN
+        total, count, mistakes, oldest = self.rollup[slot:slot + ROLLUP_WIDTH]
+        return int(total), int(count), int(mistakes), oldest
+
+    def is_current(self):
+        """Whether the record's subject ids are those of the active content pack."""
+        return self.pack is get_pack()
+
+    def __len__(self):
+        return self.strength_count
+
+    def nbytes(self):
+        """Approximate memory held by this record, excluding shared strings."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.reflections)
+        for column in (self.strength, self.studied, self.mistakes, self.rollup,
+                       self.topic_version, self.decay):
+            size += sys.getsizeof(column)
+        size += sys.getsizeof(self.history)
+        for history in self.history.values():
+            size += history.nbytes()
+        size += sys.getsizeof(self.mistake_mask)
+        for entry in self.reflections:
+            size += sys.getsizeof(entry)
+            if isinstance(entry, dict):
+                size += sum(sys.getsizeof(value) for value in entry.values())
+        if self.extra:
+            size += sys.getsizeof(self.extra)
+        if self.derived:
+            size += sys.getsizeof(self.derived)
+            for _, value in self.derived.values():
+                size += sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+        if self.questions is not None:
+            nbytes = getattr(self.questions, "nbytes", None)
+            size += nbytes() if nbytes else sys.getsizeof(self.questions)
+        for state in (self.insights, self.progress):
+            if state is not None:
+                nbytes = getattr(state, "nbytes", None)
+                size += nbytes() if nbytes else sys.getsizeof(state)
+        return size
+
+    def __repr__(self):
+        return f"<StudentModel {self.username!r} topics={len(self)}>"
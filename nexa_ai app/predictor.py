@@ -0,0 +1,86 @@
+"""
+NEXA AI exam predictor
+Ranks a student's topics by how much they need revising before the exam
+
+Each assessed topic scores
+
+    exam weight * (WEAKNESS * (1 - strength)
+                   + MISTAKES * min(mistakes, MISTAKE_CAP) / MISTAKE_CAP
+                   + FORGETTING * (1 - retention))
+
+computed in one pass over the StudentModel's columns. The ranking is
+cached on the model until its next change, for the same content pack
+version and RETENTION_BUCKET of time, so repeated hits and class-wide runs only
+pay for students that changed.
+"""
+
+import math
+import time
+
+import engine
+from content import TOPIC_NAMES, get_pack
+
+WEAKNESS = 0.5
+MISTAKES = 0.3
+FORGETTING = 0.2
+MISTAKE_CAP = 5            # mistakes beyond this add nothing more
+RETENTION_BUCKET = 300     # seconds a cached ranking's retention is trusted for
+DIGITS = 3
+
+
+def score_topics(student, pack, now):
+    """(score, topic id) for every assessed topic, one pass over the columns."""
+    strength, studied, mistakes = student.strength, student.studied, student.mistakes
+    weights, subject_of = pack.exam_weight, pack.subject_of
+    n_weights, n_subjects = len(weights), len(subject_of)
+    # Decay per second for each subject id; the last entry covers topics outside any subject
+    rates = [student.subject_decay_rate(sid, engine.DECAY_RATE) / 3600
+             for sid in range(len(pack.subject_names))] + [engine.DECAY_RATE / 3600]
+    exp = math.exp
+    scores = []
+    for tid, s in enumerate(strength):
+        if s != s:                 # NaN: never assessed
+            continue
+        last = studied[tid]
+        if last != last or last >= now:
+            forgotten = 0.0
+        else:
+            rate = rates[subject_of[tid] if tid < n_subjects else -1]
+            forgotten = 1 - exp(-rate * (now - last))
+        weight = weights[tid] if tid < n_weights else 1.0
+        score = weight * (WEAKNESS * (1 - s)
+                          + MISTAKES * min(mistakes[tid], MISTAKE_CAP) / MISTAKE_CAP
+                          + FORGETTING * forgotten)
+        scores.append((score, tid))
+    return scores
+
+
+def ranking(student, now=None):
+    """Every assessed topic as (topic, score), most exam-critical first."""
+    now = time.time() if now is None else now
+    pack = get_pack()
+    key = (pack.version, int(now // RETENTION_BUCKET))
+    derived = student.derived
+    cached = derived.get("exam") if derived else None
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    scores = score_topics(student, pack, now)
+    scores.sort(key=lambda item: (-item[0], item[1]))
+    ranked = [(TOPIC_NAMES[tid], round(score, DIGITS)) for score, tid in scores]
+    if student.derived is None:
+        student.derived = {}
+    student.derived["exam"] = (key, ranked)
+    return ranked
+
+
+def predict(student, n=3, now=None):
+    """The ``n`` topics most likely to cost marks in the exam."""
+    return [topic for topic, _ in ranking(student, now)[:n]]
+
+
+def predict_many(students, n=3, now=None):
+    """Yield (student id, predictions) for (student id, StudentModel) pairs."""
+    now = time.time() if now is None else now
+    for student_id, student in students:
+        yield student_id, ranking(student, now)[:n]
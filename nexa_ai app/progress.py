@@ -0,0 +1,235 @@
+"""
+NEXA AI progress history
+Per-student readiness and subject strength over time, downsampled as it ages
+
+Every saved change records one sample. A series keeps three tiers:
+
+    raw     every sample from the last RAW_WINDOW (at most RAW_LIMIT)
+    hourly  one bucket per hour for HOURLY_RETENTION
+    daily   one bucket per UTC day for DAILY_RETENTION
+
+Each sample updates the current hourly and daily bucket in place (count,
+sum, min, max and last readiness, plus each subject's last mean strength),
+so recording is O(subjects) and a series never holds more than
+RAW_LIMIT + hourly + daily rows, however long a student uses the app.
+Queries pick the finest tier that covers the range and bisect into it, so
+a chart never aggregates anything at request time.
+
+In the student document a series is stored as base64 float64 rows, one
+string per tier, with the subject names its columns belong to.
+"""
+
+import base64
+import bisect
+import math
+import sys
+import time
+from array import array
+
+from content import get_pack
+from engine import readiness_score
+from models import SCALE
+
+RAW_WINDOW = 6 * 3600
+RAW_LIMIT = 500
+HOUR = 3600
+DAY = 86400
+HOURLY_RETENTION = 7 * DAY
+DAILY_RETENTION = 400 * DAY
+NAN = float("nan")
+
+RESOLUTIONS = {"raw": RAW_WINDOW, "hour": HOURLY_RETENTION, "day": DAILY_RETENTION}
+RANGES = {"h": HOUR, "d": DAY, "w": 7 * DAY, "m": 30 * DAY, "y": 365 * DAY}
+
+# Bucket row: start, samples, readiness sum, min, max, last, then one column per subject
+START, SAMPLES, TOTAL, LOW, HIGH, LAST = range(6)
+BUCKET_FIELDS = 6
+
+
+def parse_range(text):
+    """Seconds in a range like ``6h``, ``7d``, ``3m``, ``1y``, ``all`` or plain seconds."""
+    text = (text or "7d").strip().lower()
+    if text == "all":
+        return DAILY_RETENTION
+    try:
+        if text[-1] in RANGES:
+            seconds = float(text[:-1]) * RANGES[text[-1]]
+        else:
+            seconds = float(text)
+    except (IndexError, ValueError):
+        raise ValueError(f"Invalid range: {text!r}")
+    if not 0 < seconds <= DAILY_RETENTION:
+        raise ValueError(f"Range must be between 1 second and {DAILY_RETENTION // DAY} days")
+    return seconds
+
+
+def _value(x, digits=2):
+    return None if math.isnan(x) else round(x, digits)
+
+
+class ProgressSeries:
+    """Raw samples plus hourly and daily buckets for one student."""
+
+    __slots__ = ("subjects", "raw", "hourly", "daily")
+
+    def __init__(self, subjects=()):
+        self.subjects = list(subjects)
+        self.raw = []          # (time, readiness, *subject strengths)
+        self.hourly = []       # bucket rows, oldest first
+        self.daily = []
+
+    def record(self, ts, readiness, strengths):
+        """Add one sample; ``strengths`` lines up with ``subjects``.
+
+        Returns False when nothing changed since the previous sample.
+        """
+        row = (ts, float(readiness), *strengths)
+        if self.raw and self.raw[-1][1:] == row[1:]:
+            return False
+        self.raw.append(row)
+        cutoff = ts - RAW_WINDOW
+        drop = 0
+        while drop < len(self.raw) and (self.raw[drop][0] < cutoff
+                                         or len(self.raw) - drop > RAW_LIMIT):
+            drop += 1
+        if drop:
+            del self.raw[:drop]
+        self._bucket(self.hourly, ts, row, HOUR, HOURLY_RETENTION)
+        self._bucket(self.daily, ts, row, DAY, DAILY_RETENTION)
+        return True
+
+    @staticmethod
+    def _bucket(rows, ts, row, width, retention):
+        start = ts - ts % width
+        readiness = row[1]
+        current = rows[-1] if rows else None
+        if current is not None and current[START] >= start:
+            # Same bucket (or a clock that stepped back): fold the sample in
+            current[SAMPLES] += 1
+            current[TOTAL] += readiness
+            current[LOW] = min(current[LOW], readiness)
+            current[HIGH] = max(current[HIGH], readiness)
+            current[LAST] = readiness
+            current[BUCKET_FIELDS:] = row[2:]
+            return
+        rows.append([start, 1, readiness, readiness, readiness, readiness, *row[2:]])
+        cutoff = start - retention
+        drop = 0
+        while drop < len(rows) and rows[drop][START] < cutoff:
+            drop += 1
+        if drop:
+            del rows[:drop]
+
+    def relayout(self, subjects):
+        """Move subject columns to a new subject list, matching them by name."""
+        subjects = list(subjects)
+        if subjects == self.subjects:
+            return
+        where = {name: i for i, name in enumerate(self.subjects)}
+        picks = [where.get(name) for name in subjects]
+
+        def remap(rows, offset):
+            return [type(row)((*row[:offset],
+                               *(NAN if i is None else row[offset + i] for i in picks)))
+                    for row in rows]
+
+        self.raw = remap(self.raw, 2)
+        self.hourly = remap(self.hourly, BUCKET_FIELDS)
+        self.daily = remap(self.daily, BUCKET_FIELDS)
+        self.subjects = subjects
+
+    def resolution_for(self, seconds):
+        for name, covered in RESOLUTIONS.items():
+            if seconds <= covered:
+                return name
+        return "day"
+
+    def query(self, start, end, resolution=None):
+        """Points between ``start`` and ``end`` from the tier covering the range."""
+        resolution = resolution or self.resolution_for(end - start)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        rows = {"raw": self.raw, "hour": self.hourly, "day": self.daily}[resolution]
+        lo = bisect.bisect_left(rows, start, key=lambda row: row[0])
+        hi = bisect.bisect_right(rows, end, key=lambda row: row[0])
+        names = self.subjects
+        points = []
+        for row in rows[lo:hi]:
+            if resolution == "raw":
+                point = {"t": row[0], "readiness": row[1]}
+                offset = 2
+            else:
+                point = {"t": row[START], "readiness": round(row[TOTAL] / row[SAMPLES], 1),
+                         "min": row[LOW], "max": row[HIGH], "last": row[LAST],
+                         "samples": int(row[SAMPLES])}
+                offset = BUCKET_FIELDS
+            point["subjects"] = {name: _value(row[offset + i]) for i, name in enumerate(names)}
+            points.append(point)
+        return resolution, points
+
+    # ------------------
+    # Encoding
+    # ------------------
+    @staticmethod
+    def _pack(rows):
+        values = array("d")
+        for row in rows:
+            values.extend(row)
+        if sys.byteorder != "little":
+            values.byteswap()
+        return base64.b64encode(values.tobytes()).decode("ascii")
+
+    @staticmethod
+    def _unpack(text, width, as_list):
+        values = array("d", base64.b64decode(text))
+        if sys.byteorder != "little":
+            values.byteswap()
+        make = list if as_list else tuple
+        return [make(values[i:i + width]) for i in range(0, len(values), width)]
+
+    def encode(self):
+        return {"subjects": self.subjects, "raw": self._pack(self.raw),
+                "hourly": self._pack(self.hourly), "daily": self._pack(self.daily)}
+
+    @classmethod
+    def decode(cls, data):
+        series = cls(data.get("subjects", []))
+        n = len(series.subjects)
+        series.raw = cls._unpack(data.get("raw", ""), 2 + n, False)
+        series.hourly = cls._unpack(data.get("hourly", ""), BUCKET_FIELDS + n, True)
+        series.daily = cls._unpack(data.get("daily", ""), BUCKET_FIELDS + n, True)
+        return series
+
+    def nbytes(self):
+        size = sys.getsizeof(self)
+        for rows in (self.raw, self.hourly, self.daily):
+            size += sys.getsizeof(rows) + sum(sys.getsizeof(row) + 24 * len(row) for row in rows)
+        return size
+
+
+def series(student):
+    """The student's progress series, decoded and lined up with the content pack."""
+    state = student.progress
+    if not isinstance(state, ProgressSeries):
+        state = student.progress = ProgressSeries.decode(state) if state else ProgressSeries()
+    state.relayout(get_pack().subject_names)
+    return state
+
+
+def record(student, now=None):
+    """Sample the student's current readiness and subject strengths."""
+    now = time.time() if now is None else now
+    strengths = []
+    for sid in range(len(get_pack().subject_names)):
+        total, count, _, _ = student.subject_rollup(sid)
+        strengths.append(total / (count * SCALE) if count else NAN)
+    return series(student).record(now, readiness_score(student), strengths)
+
+
+def history(student, seconds, now=None, resolution=None):
+    """(resolution, points) covering the last ``seconds``."""
+    now = time.time() if now is None else now
+    state = student.progress
+    if not state:
+        return resolution or ProgressSeries().resolution_for(seconds), []
+    return series(student).query(now - seconds, now, resolution)
@@ -0,0 +1,224 @@
+"""
+NEXA AI question bank
+Quiz questions indexed by topic and difficulty, drawn without replacement
+
+The bank keeps questions in flat columns (prompts, keywords, topic id,
+difficulty) with one ``array('I')`` of question ids per (topic id,
+difficulty) pool. It is built from the content pack on the first draw.
+
+Each student draws from a pool with a sparse Fisher-Yates shuffle: the
+pool is a virtual permutation whose first ``remaining`` positions are
+still undrawn, and ``swaps`` records only the positions moved so far, so
+a draw is O(1) however big the pool is. ``seen`` is a bitset over pool
+positions. Once a pool is used up it starts a new cycle.
+"""
+
+import base64
+import random
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+
+from content import TOPIC_NAMES, get_pack, register_index, topic_id
+
+DIFFICULTIES = (1, 2, 3)
+
+Question = namedtuple("Question", "qid topic difficulty prompt keywords")
+
+
+class QuestionBank:
+    """Questions in flat columns plus the (topic id, difficulty) index."""
+
+    def __init__(self, questions=()):
+        self.prompts = []
+        self.keywords = []
+        self.topic = array("I")
+        self.difficulty = array("B")
+        self.position = array("I")      # index of each question within its pool
+        self.pools = {}
+        for item in questions:
+            self.add(item["topic"], item.get("difficulty", 1), item["prompt"],
+                     item.get("keywords") or [item["topic"]])
+        self.fingerprint = self._fingerprint()
+
+    def add(self, topic, difficulty, prompt, keywords):
+        difficulty = min(max(int(difficulty), DIFFICULTIES[0]), DIFFICULTIES[-1])
+        qid = len(self.prompts)
+        tid = topic_id(topic)
+        self.prompts.append(prompt)
+        self.keywords.append(tuple(k.lower() for k in keywords))
+        self.topic.append(tid)
+        self.difficulty.append(difficulty)
+        pool = self.pools.get((tid, difficulty))
+        if pool is None:
+            pool = self.pools[(tid, difficulty)] = array("I")
+        self.position.append(len(pool))
+        pool.append(qid)
+        return qid
+
+    def _fingerprint(self):
+        """Changes whenever pool positions could mean different questions."""
+        crc = 0
+        for prompt in self.prompts:
+            crc = zlib.crc32(prompt.encode("utf-8"), crc)
+        return f"{len(self.prompts)}-{crc:08x}"
+
+    def question(self, qid):
+        return Question(qid, TOPIC_NAMES[self.topic[qid]], self.difficulty[qid],
+                        self.prompts[qid], self.keywords[qid])
+
+    def pool(self, topic, difficulty):
+        tid = topic_id(topic, create=False)
+        return self.pools.get((tid, difficulty)) if tid is not None else None
+
+    def difficulties(self, topic):
+        """Difficulties that have at least one question for the topic."""
+        return [d for d in DIFFICULTIES if self.pool(topic, d)]
+
+    def __len__(self):
+        return len(self.prompts)
+
+
+def load_bank(source):
+    """Build a bank from a list of questions or an NDJSON file path."""
+    if source is None:
+        return QuestionBank()
+    if isinstance(source, str):
+        import serialization
+
+        def lines():
+            with open(source, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield serialization.loads(line)
+
+        return QuestionBank(lines())
+    return QuestionBank(source)
+
+
+def _build_bank(pack):
+    try:
+        return load_bank(pack.questions)
+    except (IOError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Error loading question bank: {e}. Quizzes will use topic prompts.")
+        return QuestionBank()
+
+
+register_index("questions", _build_bank)
+
+
+def get_bank():
+    """The question bank for the active content pack, built once per pack."""
+    return get_pack().index("questions")
+
+
+# ==================
+# PER-STUDENT DRAWS
+# ==================
+class Pool:
+    """One student's progress through one (topic, difficulty) pool."""
+
+    __slots__ = ("remaining", "swaps", "seen")
+
+    def __init__(self, remaining, swaps=None, seen=0):
+        self.remaining = remaining
+        self.swaps = swaps if swaps is not None else {}
+        self.seen = seen
+
+    def draw(self, size, rng):
+        """Return the next undrawn pool position, in O(1)."""
+        if self.remaining <= 0 or self.remaining > size:
+            self.remaining, self.swaps, self.seen = size, {}, 0
+        last = self.remaining - 1
+        r = rng.randrange(self.remaining)
+        if r == last:
+            position = self.swaps.pop(last, last)
+        else:
+            position = self.swaps.get(r, r)
+            self.swaps[r] = self.swaps.pop(last, last)
+        self.remaining = last
+        self.seen |= 1 << position
+        return position
+
+
+class DrawState:
+    """Every pool a student has drawn from, tied to one bank fingerprint."""
+
+    __slots__ = ("fingerprint", "pools")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.pools = {}
+
+    def encode(self):
+        pools = {}
+        for (tid, difficulty), pool in self.pools.items():
+            seen = pool.seen.to_bytes((pool.seen.bit_length() + 7) // 8, "little")
+            pools[f"{TOPIC_NAMES[tid]}|{difficulty}"] = [
+                pool.remaining, base64.b64encode(seen).decode("ascii"),
+                [n for pair in pool.swaps.items() for n in pair]]
+        return {"bank": self.fingerprint, "pools": pools}
+
+    def nbytes(self):
+        size = sys.getsizeof(self) + sys.getsizeof(self.pools)
+        for pool in self.pools.values():
+            size += sys.getsizeof(pool) + sys.getsizeof(pool.swaps) + sys.getsizeof(pool.seen)
+        return size
+
+    @classmethod
+    def decode(cls, data):
+        state = cls(data.get("bank"))
+        for key, (remaining, seen, swaps) in data.get("pools", {}).items():
+            topic, _, difficulty = key.rpartition("|")
+            state.pools[(topic_id(topic), int(difficulty))] = Pool(
+                remaining, dict(zip(swaps[::2], swaps[1::2])),
+                int.from_bytes(base64.b64decode(seen), "little"))
+        return state
+
+
+def _state(student, bank):
+    state = student.questions
+    if isinstance(state, dict):
+        state = DrawState.decode(state)
+    if state is None or state.fingerprint != bank.fingerprint:
+        # A new or changed bank: old positions no longer mean the same questions
+        state = DrawState(bank.fingerprint)
+    student.questions = state
+    return state
+
+
+def difficulty_for(strength):
+    """Question difficulty matching a topic strength."""
+    if strength is None or strength < 0.4:
+        return 1
+    return 2 if strength < 0.7 else 3
+
+
+def draw(student, topic, difficulty=None, rng=random, bank=None):
+    """Draw the student's next unseen question on a topic, or None.
+
+    Without ``difficulty`` it follows the topic strength, falling back to
+    the nearest difficulty that has questions.
+    """
+    bank = bank or get_bank()
+    available = bank.difficulties(topic)
+    if not available:
+        return None
+    wanted = difficulty or difficulty_for(student.get_strength(topic))
+    difficulty = min(available, key=lambda d: (abs(d - wanted), d))
+    questions = bank.pool(topic, difficulty)
+
+    state = _state(student, bank)
+    key = (topic_id(topic), difficulty)
+    pool = state.pools.get(key)
+    if pool is None:
+        pool = state.pools[key] = Pool(len(questions))
+    return bank.question(questions[pool.draw(len(questions), rng)])
+
+
+def has_seen(student, qid, bank=None):
+    """Whether the student has drawn a question in its pool's current cycle."""
+    bank = bank or get_bank()
+    pool = _state(student, bank).pools.get((bank.topic[qid], bank.difficulty[qid]))
+    return pool is not None and bool(pool.seen >> bank.position[qid] & 1)
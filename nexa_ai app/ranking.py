@@ -0,0 +1,229 @@
+"""
+NEXA AI class ranking
+Order-statistics index of students by readiness, per class
+
+Readiness is a whole percentage, so each class keeps a Fenwick tree over
+the 101 possible scores plus the set of students at each score. Moving a
+student to a new score is two tree updates, and a student's rank (one
+plus the students scoring strictly higher) or percentile (share scoring
+strictly lower) is one prefix sum: O(log 101) whatever the class size.
+Top N walks the score buckets down from 100, O(101 + N).
+
+A student's class is the ``class_id`` field of their document (students
+without one are in DEFAULT_CLASS). The index is built from the store on
+first use and kept current by every save in this worker; it is rebuilt
+after RANK_REFRESH seconds so changes saved by other workers show up too.
+Only the first build blocks a request: later rebuilds scan the store in a
+background thread while the current index keeps answering, and saves made
+during the scan are applied to the new index before it is swapped in.
+"""
+
+import heapq
+import os
+import threading
+import time
+
+from engine import readiness
+from models import SCALE
+
+SCORES = 101                 # readiness 0..100
+DEFAULT_CLASS = "default"
+RANK_REFRESH = float(os.getenv("RANK_REFRESH", 300))
+
+
+class Fenwick:
+    """Binary indexed tree of counts over positions 0..size-1."""
+
+    __slots__ = ("size", "tree")
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of positions 0..i (0 when i < 0)."""
+        i = min(i, self.size - 1) + 1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class ClassRanking:
+    """Readiness scores of one class with rank, percentile and top N queries."""
+
+    def __init__(self):
+        self.scores = {}                          # student id -> score
+        self.tree = Fenwick(SCORES)
+        self.buckets = [set() for _ in range(SCORES)]
+
+    def update(self, student_id, score):
+        score = max(0, min(SCORES - 1, int(score)))
+        old = self.scores.get(student_id)
+        if old == score:
+            return
+        if old is not None:
+            self.tree.add(old, -1)
+            self.buckets[old].discard(student_id)
+        self.scores[student_id] = score
+        self.tree.add(score, 1)
+        self.buckets[score].add(student_id)
+
+    def remove(self, student_id):
+        old = self.scores.pop(student_id, None)
+        if old is not None:
+            self.tree.add(old, -1)
+            self.buckets[old].discard(student_id)
+
+    def rank(self, student_id):
+        """1 for the best score; students on the same score share a rank."""
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        return 1 + len(self.scores) - self.tree.prefix(score)
+
+    def percentile(self, student_id):
+        """Percentage of the class scoring strictly lower."""
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        return round(100 * self.tree.prefix(score - 1) / len(self.scores), 1)
+
+    def top(self, n):
+        """(student id, score, rank) for the ``n`` best students."""
+        result = []
+        for score in range(SCORES - 1, -1, -1):
+            bucket = self.buckets[score]
+            if not bucket:
+                continue
+            rank = len(result) + 1
+            # Ties in id order, without sorting a whole bucket of a big class
+            for student_id in heapq.nsmallest(n - len(result), bucket):
+                result.append((student_id, score, rank))
+            if len(result) >= n:
+                break
+        return result
+
+    def __len__(self):
+        return len(self.scores)
+
+
+def class_of(data):
+    """The class of a student document or StudentModel."""
+    if isinstance(data, dict):
+        class_id = data.get("class_id")
+    else:
+        class_id = (data.extra or {}).get("class_id")
+    return class_id if isinstance(class_id, str) and class_id else DEFAULT_CLASS
+
+
+def document_readiness(data):
+    """Readiness straight from a student document, without building a model."""
+    total = count = 0
+    for value in data.get("topic_strength", {}).values():
+        total += round(value * SCALE)
+        count += 1
+    return readiness(total, count)
+
+
+class RankIndex:
+    """Every class's ranking, plus which class each student is in."""
+
+    def __init__(self):
+        self.classes = {}
+        self.member = {}          # student id -> class id
+        self.built = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._pending = None      # saves made while a rebuild scans the store
+
+    def _update(self, student_id, class_id, score):
+        old = self.member.get(student_id)
+        if old is not None and old != class_id:
+            self.classes[old].remove(student_id)
+        self.member[student_id] = class_id
+        ranking = self.classes.get(class_id)
+        if ranking is None:
+            ranking = self.classes[class_id] = ClassRanking()
+        ranking.update(student_id, score)
+
+    def update(self, student_id, class_id, score):
+        with self._lock:
+            self._update(student_id, class_id, score)
+            if self._pending is not None:
+                self._pending[student_id] = (class_id, score)
+
+    def rebuild(self, students):
+        """Replace the index from (student id, document) pairs in one pass."""
+        with self._lock:
+            self._pending = {}
+        classes, member = {}, {}
+        try:
+            for student_id, data in students:
+                class_id = class_of(data)
+                ranking = classes.get(class_id)
+                if ranking is None:
+                    ranking = classes[class_id] = ClassRanking()
+                ranking.update(student_id, document_readiness(data))
+                member[student_id] = class_id
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self.classes, self.member, self.built = classes, member, time.time()
+            for student_id, (class_id, score) in pending.items():
+                self._update(student_id, class_id, score)
+
+    def stale(self, max_age=RANK_REFRESH):
+        return self.built is None or time.time() - self.built > max_age
+
+    def refresh(self, load, max_age=RANK_REFRESH):
+        """Rebuild from ``load()`` when older than ``max_age``; one thread rebuilds.
+
+        The first build runs in the caller. After that a stale index is
+        rebuilt in a background thread and the current one is returned.
+        """
+        if self.built is None:
+            with self._rebuild_lock:
+                if self.built is None:
+                    self.rebuild(load())
+        elif self.stale(max_age) and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, args=(load,),
+                             name="rank-index", daemon=True).start()
+        return self
+
+    def _rebuild_in_background(self, load):
+        try:
+            self.rebuild(load())
+        except Exception as e:
+            print(f"⚠️ Class ranking rebuild failed: {e}")
+        finally:
+            self._rebuild_lock.release()
+
+    def standing(self, student_id):
+        """Class, readiness, rank, percentile and class size of one student, or None."""
+        with self._lock:
+            class_id = self.member.get(student_id)
+            if class_id is None:
+                return None
+            ranking = self.classes[class_id]
+            return {"class_id": class_id, "readiness": ranking.scores[student_id],
+                    "rank": ranking.rank(student_id),
+                    "percentile": ranking.percentile(student_id), "size": len(ranking)}
+
+    def top(self, class_id, n):
+        """(class size, top ``n`` rows) for a class; (0, []) when it has no students."""
+        with self._lock:
+            ranking = self.classes.get(class_id)
+            if ranking is None:
+                return 0, []
+            return len(ranking), ranking.top(n)
@@ -0,0 +1,247 @@
+"""
+NEXA AI rate limiting
+Token buckets per session and per client IP for write-heavy API routes
+
+Every limited request takes one token from its session's bucket and one
+from its IP's bucket. A bucket holds up to ``count`` tokens and refills
+at ``count`` per period, so short bursts are fine but a client cannot
+sustain more than the configured rate. When either bucket is empty the
+route answers 429 with a Retry-After header.
+
+Buckets live in worker memory by default. Multi-worker deployments point
+RATELIMIT_STORAGE at a SQLite file (``sqlite:nexa-ai-ratelimit.db``) so
+all workers on the host share one set of buckets.
+
+Behind a reverse proxy every request comes from the proxy's address, so
+all clients would share one IP bucket. PROXY_HOPS sets how many proxies
+to trust (Render adds one); their X-Forwarded-For entries then give the
+client address. Entries beyond those hops are client-supplied and ignored.
+"""
+
+import math
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Routes that write the student document on every call, by endpoint name
+DEFAULT_LIMITS = {
+    "api_baseline": "5/minute",
+    "api_quiz": "30/minute",
+    "api_quiz_question": "60/minute",
+    "api_reflection": "10/minute",
+    "api_replay": "10/minute",
+    "api_sync": "30/minute",
+    "api_reset": "5/minute",
+    "api_class_join": "10/minute",
+}
+
+DEFAULTS = {
+    "RATELIMIT_ENABLED": os.getenv("RATELIMIT_ENABLED", "true").lower() == "true",
+    "RATELIMIT_STORAGE": os.getenv("RATELIMIT_STORAGE", "memory"),
+    # Classrooms share one address, so an IP gets this many sessions' worth
+    "RATELIMIT_IP_FACTOR": int(os.getenv("RATELIMIT_IP_FACTOR", 10)),
+    # Reverse proxies in front of the app whose X-Forwarded-* headers are trusted
+    "PROXY_HOPS": int(os.getenv("PROXY_HOPS", 0)),
+}
+
+
+def parse_rate(text):
+    """Parse ``"30/minute"`` into (capacity, tokens refilled per second)."""
+    try:
+        count, _, period = text.partition("/")
+        count = int(count)
+        period = period.strip().lower().rstrip("s") or "second"
+        seconds = PERIODS[period] if period in PERIODS else float(period)
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit: {text!r}")
+    if count <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit: {text!r}")
+    return count, count / seconds
+
+
+def parse_limits(text):
+    """Parse ``"api_quiz=30/minute,api_reflection=10/minute"``."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        endpoint, _, rate = item.partition("=")
+        parse_rate(rate)
+        limits[endpoint.strip()] = rate.strip()
+    return limits
+
+
+def refill(tokens, updated, now, capacity, rate):
+    """Take one token from a bucket.
+
+    Returns (allowed, tokens left, seconds until the next token).
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+# ==================
+# BUCKET BACKENDS
+# ==================
+class MemoryBuckets:
+    """Buckets for one worker; the least recently used are dropped first."""
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            allowed, tokens, retry = refill(tokens, updated, now, capacity, rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def nbytes(self):
+        with self._lock:
+            # One key string and one (tokens, updated) tuple of floats per bucket
+            return sys.getsizeof(self._buckets) + sum(
+                sys.getsizeof(key) + 104 for key in self._buckets)
+
+
+class SQLiteBuckets:
+    """Buckets shared by every worker process that opens the same file."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        self._calls = 0
+        self._connect().execute("CREATE TABLE IF NOT EXISTS buckets "
+                                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate):
+        conn = self._connect()
+        now = self.clock()
+        # BEGIN IMMEDIATE serialises the read-modify-write across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry = refill(tokens, updated, now, capacity, rate)
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                # Any bucket idle for a day is full again, same as no row
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - PERIODS["day"],))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry
+
+    def clear(self):
+        self._connect().execute("DELETE FROM buckets")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def open_buckets(url):
+    """Open a bucket backend from ``memory`` or ``sqlite:<path>``."""
+    backend, _, location = url.partition(":")
+    if backend == "memory":
+        return MemoryBuckets()
+    if backend == "sqlite":
+        return SQLiteBuckets(location or "nexa-ai-ratelimit.db")
+    raise ValueError(f"Unknown rate limit storage: {backend}")
+
+
+# ==================
+# FLASK INTEGRATION
+# ==================
+class RateLimiter:
+    """Per-route limits checked against session and IP buckets."""
+
+    def __init__(self, buckets, limits, ip_factor=10):
+        self.buckets = buckets
+        self.ip_factor = ip_factor
+        self.limits = {endpoint: parse_rate(rate) for endpoint, rate in limits.items() if rate}
+
+    def check(self, endpoint, session_key, ip):
+        """Return 0 when the request may go ahead, else seconds to wait."""
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return 0
+        capacity, rate = limit
+        allowed, retry = self.buckets.take(f"s:{endpoint}:{session_key}", capacity, rate)
+        if allowed:
+            factor = self.ip_factor
+            allowed, retry = self.buckets.take(f"ip:{endpoint}:{ip}", capacity * factor, rate * factor)
+        return 0 if allowed else max(1, math.ceil(retry))
+
+
+def init_rate_limits(app):
+    """Register the rate limiter on a Flask app.
+
+    Limits come from DEFAULT_LIMITS, then the RATELIMIT_ROUTES setting
+    (a dict, or ``endpoint=rate`` pairs separated by commas); a rate of
+    None in the dict removes a default limit.
+    """
+    from flask import jsonify, request, session
+
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    routes = app.config.get("RATELIMIT_ROUTES", os.getenv("RATELIMIT_ROUTES", ""))
+    if isinstance(routes, str):
+        routes = parse_limits(routes)
+
+    hops = app.config["PROXY_HOPS"]
+    if hops > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    limiter = RateLimiter(open_buckets(app.config["RATELIMIT_STORAGE"]),
+                          {**DEFAULT_LIMITS, **routes}, app.config["RATELIMIT_IP_FACTOR"])
+    app.extensions["rate_limiter"] = limiter
+
+    @app.before_request
+    def limit_request():
+        if not app.config["RATELIMIT_ENABLED"] or request.endpoint not in limiter.limits:
+            return None
+        session_key = session.setdefault("client_key", secrets.token_hex(8))
+        retry = limiter.check(request.endpoint, session_key, request.remote_addr or "-")
+        if retry:
+            response = jsonify({"status": "error", "message": "Too many requests, slow down"})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(retry)
+            return response
+        return None
+
+    return limiter
@@ -0,0 +1,277 @@
+"""
+NEXA AI reflection analytics
+Incremental text analytics over reflection journal entries
+
+Each reflection is tokenised once, when it is saved. That single pass
+
+- adds its terms to the student's term counts and to this worker's
+  global counts,
+- finds the curriculum topics it mentions through a phrase index built
+  from the content pack (first word -> topic phrases), and
+- scores each clause for "found it hard" or "felt confident" wording,
+  crediting the signal to the topics named in the same clause.
+
+Topic signals decay with a half-life of SIGNAL_HALF_LIFE, stored as
+(score, timestamp) and decayed lazily when read or updated, so every
+update is O(length of the new entry) and history is never rescanned.
+A student document saved before this existed is caught up once, on the
+first new entry.
+
+The study plan reads ``topic_signal()``: a positive signal means recent
+reflections found the topic hard and pulls it forward.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from content import TOPIC_NAMES, get_pack, register_index, topic_id
+
+SIGNAL_HALF_LIFE = 7 * 86400      # seconds for a reflection's signal to halve
+TERM_LIMIT = 200                  # terms kept per student
+GLOBAL_TERM_LIMIT = 20000         # terms kept per worker
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+CLAUSE_BREAKS = {"but", "though", "although", "however", "whereas"}
+CLAUSE_END = re.compile(r"[.!?;\n]+")
+
+HARD = {"hard", "difficult", "confused", "confusing", "struggled", "struggle", "struggling",
+        "stuck", "lost", "tricky", "forgot", "forget", "weak", "failed", "wrong", "unsure"}
+EASY = {"easy", "confident", "clear", "sense", "understood", "understand", "right",
+        "correct", "simple", "strong", "mastered", "fine", "enjoyed"}
+NEGATIONS = {"not", "no", "never", "don't", "didn't", "doesn't", "isn't", "wasn't", "can't",
+             "cannot", "couldn't"}
+STOPWORDS = {"a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "at", "by",
+             "i", "me", "my", "it", "is", "was", "am", "are", "be", "been", "this", "that",
+             "today", "so", "very", "really", "again", "about", "some", "all", "still", "need",
+             "had", "have", "did", "do", "after", "then", "too", "more", "most", "we", "our"}
+
+
+def tokenize(text):
+    """Lower-case word tokens, clause breaks as None."""
+    tokens = []
+    for clause in CLAUSE_END.split(text.lower()):
+        for word in TOKEN.findall(clause):
+            tokens.append(None if word in CLAUSE_BREAKS else word)
+        tokens.append(None)
+    return tokens
+
+
+# ==================
+# TOPIC INDEX
+# ==================
+class PhraseIndex:
+    """Topic phrases keyed by their first word, longest phrase first."""
+
+    def __init__(self, topics):
+        self.phrases = {}
+        for topic in topics:
+            words = tuple(TOKEN.findall(topic.lower()))
+            if words:
+                self.phrases.setdefault(words[0], []).append((words, topic_id(topic)))
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+
+    def match(self, tokens, i):
+        """(topic id, phrase length) of the topic starting at tokens[i], or None."""
+        for words, tid in self.phrases.get(tokens[i], ()):
+            if tuple(tokens[i:i + len(words)]) == words:
+                return tid, len(words)
+        return None
+
+
+register_index("phrases", lambda pack: PhraseIndex(pack.topic_subject))
+
+
+def get_index():
+    """The phrase index for the active content pack, built once per pack."""
+    return get_pack().index("phrases")
+
+
+def analyse(text, index=None):
+    """One pass over an entry: (terms, {topic id: signal}).
+
+    A clause's signal is +1 per hard word and -1 per confident word
+    (flipped by a negation up to three words before), credited to every
+    topic the clause names. Topic words are not counted as terms.
+    """
+    index = index or get_index()
+    tokens = tokenize(text)
+    terms, signals = Counter(), {}
+    clause_topics, clause_score, negated_until = [], 0, -1
+    i = 0
+    while i < len(tokens):
+        word = tokens[i]
+        if word is None:
+            for tid in clause_topics:
+                signals[tid] = signals.get(tid, 0) + clause_score
+            clause_topics, clause_score, negated_until = [], 0, -1
+            i += 1
+            continue
+        found = index.match(tokens, i)
+        if found:
+            clause_topics.append(found[0])
+            i += found[1]
+            continue
+        if word in NEGATIONS:
+            negated_until = i + 3
+        else:
+            polarity = 1 if word in HARD else -1 if word in EASY else 0
+            if polarity:
+                clause_score += -polarity if i <= negated_until else polarity
+            if word not in STOPWORDS and len(word) > 1:
+                terms[word] += 1
+        i += 1
+    return terms, signals
+
+
+def _decay(score, since, now):
+    if not score or now <= since:
+        return score
+    return score * 0.5 ** ((now - since) / SIGNAL_HALF_LIFE)
+
+
+def _prune(counts, limit):
+    """Keep the ``limit`` most frequent terms once the table doubles."""
+    if len(counts) > 2 * limit:
+        keep = counts.most_common(limit)
+        counts.clear()
+        counts.update(dict(keep))
+
+
+# ==================
+# PER-STUDENT STATE
+# ==================
+class ReflectionStats:
+    """Term counts and decaying topic signals for one student."""
+
+    __slots__ = ("processed", "terms", "signals")
+
+    def __init__(self, processed=0, terms=None, signals=None):
+        self.processed = processed          # reflections analysed so far
+        self.terms = Counter(terms or {})
+        self.signals = signals or {}         # topic id -> (score, timestamp)
+
+    def add(self, text, when, index=None, new=True):
+        """Analyse one entry; only ``new`` entries reach this worker's global counts."""
+        terms, signals = analyse(text, index)
+        self.terms.update(terms)
+        _prune(self.terms, TERM_LIMIT)
+        for tid, delta in signals.items():
+            if delta:
+                score, since = self.signals.get(tid, (0.0, when))
+                if when >= since:
+                    self.signals[tid] = (_decay(score, since, when) + delta, when)
+                else:
+                    # An older entry (replayed or synced) decays to the newer timestamp
+                    self.signals[tid] = (score + _decay(delta, when, since), since)
+        self.processed += 1
+        if new:
+            _global.add(terms, signals)
+        return signals
+
+    def signal(self, tid, now):
+        score, since = self.signals.get(tid, (0.0, now))
+        return _decay(score, since, now)
+
+    def encode(self):
+        return {"n": self.processed, "terms": dict(self.terms),
+                "topics": {TOPIC_NAMES[tid]: [round(score, 4), since]
+                           for tid, (score, since) in self.signals.items()}}
+
+    @classmethod
+    def decode(cls, data):
+        return cls(data.get("n", 0), data.get("terms"),
+                   {topic_id(topic): (score, since)
+                    for topic, (score, since) in data.get("topics", {}).items()})
+
+    def nbytes(self):
+        return (sys.getsizeof(self) + sys.getsizeof(self.terms) + sys.getsizeof(self.signals)
+                + sum(sys.getsizeof(term) for term in self.terms))
+
+
+class GlobalTerms:
+    """Term and topic-signal counts across every reflection this worker saw."""
+
+    def __init__(self):
+        self.terms = Counter()
+        self.hard = Counter()     # topic id -> clauses that found it hard
+        self.easy = Counter()
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    def add(self, terms, signals):
+        with self._lock:
+            self.entries += 1
+            self.terms.update(terms)
+            _prune(self.terms, GLOBAL_TERM_LIMIT)
+            for tid, delta in signals.items():
+                if delta > 0:
+                    self.hard[tid] += 1
+                elif delta < 0:
+                    self.easy[tid] += 1
+
+    def summary(self, top=20):
+        with self._lock:
+            return {
+                "entries": self.entries,
+                "terms": self.terms.most_common(top),
+                "hard_topics": [(TOPIC_NAMES[tid], n) for tid, n in self.hard.most_common(top)],
+                "easy_topics": [(TOPIC_NAMES[tid], n) for tid, n in self.easy.most_common(top)],
+            }
+
+
+_global = GlobalTerms()
+
+
+def global_summary(top=20):
+    return _global.summary(top)
+
+
+def _timestamp(entry):
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def stats(student, new=0):
+    """The student's ReflectionStats, caught up with any unanalysed entries.
+
+    The last ``new`` entries were just written by this worker and are also
+    added to the global counts; older ones were counted where they were written.
+    """
+    state = student.insights
+    if state is None or isinstance(state, dict):
+        state = student.insights = ReflectionStats.decode(state or {})
+    if state.processed > len(student.reflections):
+        state = student.insights = ReflectionStats()
+    if state.processed < len(student.reflections):
+        index = get_index()
+        first_new = len(student.reflections) - new
+        for i in range(state.processed, len(student.reflections)):
+            entry = student.reflections[i]
+            text = entry.get("entry", "") if isinstance(entry, dict) else entry
+            state.add(str(text), _timestamp(entry), index, new=i >= first_new)
+    return state
+
+
+def topic_signal(student, topic, now=None):
+    """Decayed reflection signal for a topic: > 0 found hard, < 0 confident."""
+    if not student.reflections:
+        return 0.0
+    state = student.insights
+    if (isinstance(state, ReflectionStats) and not state.signals
+            and state.processed == len(student.reflections)):
+        return 0.0
+    tid = topic_id(topic, create=False)
+    if tid is None:
+        return 0.0
+    return stats(student).signal(tid, time.time() if now is None else now)
+
+
+def top_terms(student, n=10):
+    return stats(student).terms.most_common(n)
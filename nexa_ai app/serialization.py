@@ -0,0 +1,88 @@
+"""
+NEXA AI JSON serialisation layer
+Uses orjson when it is installed, with a compact stdlib fallback
+"""
+
+import json
+import sys
+from datetime import date
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    # orjson is optional; the stdlib encoder is used in minimal environments
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# topic_strength and similar scores never need more than this many digits
+FLOAT_DIGITS = 6
+
+
+def encode_default(o):
+    """Encode the types Flask's provider accepts but JSON does not."""
+    if isinstance(o, date):
+        return o.isoformat()
+    # Looked up rather than imported: an instance can only exist once its
+    # module is loaded, and importing them would slow the CLI's start-up
+    decimal, uuid, dataclasses = (sys.modules.get(m) for m in ("decimal", "uuid", "dataclasses"))
+    if (decimal and isinstance(o, decimal.Decimal)) or (uuid and isinstance(o, uuid.UUID)):
+        return str(o)
+    if dataclasses and dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    if hasattr(o, "to_dict"):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        """Serialise ``obj`` to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=encode_default, option=_OPTIONS)
+
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(
+        separators=(",", ":"), ensure_ascii=False, default=encode_default
+    )
+
+    def dumps(obj):
+        """Serialise ``obj`` to compact UTF-8 JSON bytes."""
+        return _encoder.encode(obj).encode("utf-8")
+
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return json.loads(data)
+
+
+def dump(obj, fp):
+    """Write ``obj`` as compact JSON to a binary file object."""
+    fp.write(dumps(obj))
+
+
+def load(fp):
+    """Read JSON from a binary or text file object."""
+    return loads(fp.read())
+
+
+def compact_scores(scores):
+    """Round a topic -> float mapping so it encodes without float noise."""
+    return {topic: round(value, FLOAT_DIGITS) if isinstance(value, float) else value
+            for topic, value in scores.items()}
+
+
+def encode_student(data):
+    """Serialise a student document for persistence.
+
+    Repeated +0.05/-0.1 updates leave values like 0.19999999999999998 in
+    ``topic_strength``; they are rounded before encoding.
+    """
+    if isinstance(data.get("topic_strength"), dict):
+        data = dict(data, topic_strength=compact_scores(data["topic_strength"]))
+    return dumps(data)
@@ -0,0 +1,252 @@
+/*
+ * NEXA AI service worker
+ * Keeps the web client usable offline and queues writes until the server is back
+ *
+ * - The app shell, /api/topics and the offline pack are precached. Pages
+ *   and per-student reads are network first with the last copy as fallback;
+ *   topics and the pack are served from the cache and refreshed behind it.
+ * - /api/explain falls back to the cached pack when the server is unreachable.
+ * - Quiz answers and reflections that cannot reach the server are queued in
+ *   IndexedDB and replayed through /api/replay, oldest first and in batches,
+ *   when the browser is back online.
+ */
+
+const CACHE = 'nexa-ai-v1';
+const SHELL = ['/', '/api/topics', '/api/offline-pack'];
+const CACHED = ['/api/topics', '/api/offline-pack'];
+const LAST_KNOWN = ['/api/student-info', '/api/dashboard', '/api/study-plan', '/api/exam-predictor'];
+const QUEUED = { '/api/quiz': 'quiz', '/api/reflection': 'reflection' };
+const DB_NAME = 'nexa-ai-offline';
+const QUEUE = 'queue';
+const BATCH = 50;
+const SYNC_TAG = 'nexa-ai-replay';
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key !== CACHE).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+            .then(() => replay())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (request.method === 'POST') {
+        if (url.pathname in QUEUED) event.respondWith(sendOrQueue(request, QUEUED[url.pathname]));
+        else if (url.pathname === '/api/explain') event.respondWith(explain(request));
+        return;
+    }
+    if (request.method !== 'GET') return;
+    if (request.mode === 'navigate' || LAST_KNOWN.includes(url.pathname)) {
+        event.respondWith(networkFirst(request));
+    } else if (CACHED.includes(url.pathname)) {
+        event.respondWith(cacheFirst(event, request));
+    }
+});
+
+// Background Sync where the browser has it; pages also post 'replay' when they come online
+self.addEventListener('sync', event => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replay().then(done => {
+            if (!done) throw new Error('Still offline');
+        }));
+    }
+});
+
+self.addEventListener('message', event => {
+    if (event.data === 'replay') event.waitUntil(replay());
+});
+
+// ==================
+// CACHING
+// ==================
+async function networkFirst(request) {
+    try {
+        const response = await fetch(request);
+        // Only whole responses are kept: a ?since delta means nothing on its own
+        if (response.ok && !new URL(request.url).search) {
+            const cache = await caches.open(CACHE);
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await caches.match(request, { ignoreSearch: request.mode !== 'navigate' });
+        if (cached) return cached;
+        if (request.mode === 'navigate') return caches.match('/');
+        return offlineResponse('You are offline and this has not been loaded before.', 503);
+    }
+}
+
+function cacheFirst(event, request) {
+    const update = fetch(request).then(async response => {
+        if (response.ok) {
+            const cache = await caches.open(CACHE);
+            await cache.put(request, response.clone());
+        }
+        return response;
+    });
+    event.waitUntil(update.then(() => undefined, () => undefined));
+    return caches.match(request).then(cached => cached || update);
+}
+
+function jsonResponse(body, status = 200) {
+    return new Response(JSON.stringify(body), {
+        status,
+        headers: { 'Content-Type': 'application/json' }
+    });
+}
+
+function offlineResponse(message, status) {
+    return jsonResponse({ status: 'error', message: '📴 ' + message, offline: true }, status);
+}
+
+async function explain(request) {
+    const body = await request.clone().json().catch(() => ({}));
+    try {
+        return await fetch(request);
+    } catch (error) {
+        const cached = await caches.match('/api/offline-pack');
+        if (!cached) return offlineResponse('Explanations are not available offline yet.', 503);
+        const pack = await cached.json();
+        const topic = String(body.topic || '').trim();
+        return jsonResponse({
+            status: 'success',
+            explanation: '📴 ' + (pack.explanations[topic] || 'Topic not found in database.'),
+            online: false
+        });
+    }
+}
+
+// ==================
+// OFFLINE QUEUE
+// ==================
+function withQueue(mode, work) {
+    return new Promise((resolve, reject) => {
+        const open = indexedDB.open(DB_NAME, 1);
+        open.onupgradeneeded = () => open.result.createObjectStore(QUEUE, { keyPath: 'seq', autoIncrement: true });
+        open.onerror = () => reject(open.error);
+        open.onsuccess = () => {
+            const db = open.result;
+            const tx = db.transaction(QUEUE, mode);
+            const request = work(tx.objectStore(QUEUE));
+            tx.oncomplete = () => { db.close(); resolve(request ? request.result : undefined); };
+            tx.onerror = tx.onabort = () => { db.close(); reject(tx.error); };
+        };
+    });
+}
+
+const enqueue = op => withQueue('readwrite', queue => queue.add(op));
+const oldest = count => withQueue('readonly', queue => queue.getAll(null, count));
+const forget = ops => withQueue('readwrite', queue => { ops.forEach(op => queue.delete(op.seq)); });
+
+// Unknown until the queue has been read once, since the worker may have been restarted
+let pending = true;
+let replaying = null;
+
+function operation(type, body) {
+    const op = { id: self.crypto.randomUUID(), type, ts: Date.now() / 1000 };
+    if (type === 'quiz') {
+        op.topic = body.topic;
+        op.answer = body.answer || '';
+        if (body.question_id !== undefined && body.question_id !== null) op.question_id = body.question_id;
+    } else {
+        op.entry = body.entry || '';
+    }
+    return op;
+}
+
+function queuedResponse(type) {
+    if (type === 'quiz') {
+        return jsonResponse({
+            status: 'success',
+            correct: false,
+            queued: true,
+            explanation: '📴 Saved offline. Your answer will be marked when you are back online.'
+        });
+    }
+    return jsonResponse({
+        status: 'success',
+        queued: true,
+        message: '📴 Reflection saved offline. It will sync when you are back online.'
+    });
+}
+
+async function sendOrQueue(request, type) {
+    const body = await request.clone().json().catch(() => null);
+    // Older queued answers go first so the server sees them in order
+    if (pending && !(await replay())) {
+        return queue(type, body, request);
+    }
+    try {
+        return await fetch(request);
+    } catch (error) {
+        return queue(type, body, request);
+    }
+}
+
+async function queue(type, body, request) {
+    if (!body) return fetch(request);
+    await enqueue(operation(type, body));
+    pending = true;
+    if (self.registration.sync) {
+        self.registration.sync.register(SYNC_TAG).catch(() => undefined);
+    }
+    return queuedResponse(type);
+}
+
+function replay() {
+    // One replay at a time; concurrent callers wait for the running one
+    if (!replaying) {
+        replaying = drain().finally(() => { replaying = null; });
+    }
+    return replaying;
+}
+
+// Send queued operations in batches; resolves true once the queue is empty
+async function drain() {
+    let applied = 0;
+    try {
+        for (;;) {
+            const ops = await oldest(BATCH);
+            if (!ops.length) {
+                pending = false;
+                return true;
+            }
+            let response;
+            try {
+                response = await fetch('/api/replay', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ ops: ops.map(({ seq, ...op }) => op) })
+                });
+            } catch (error) {
+                return false;
+            }
+            // Server trouble or rate limited: keep the batch for the next attempt
+            if (response.status >= 500 || response.status === 429) return false;
+            // Otherwise every operation was applied, already seen or rejected for good
+            const result = await response.json().catch(() => ({}));
+            applied += result.applied || 0;
+            await forget(ops);
+        }
+    } finally {
+        if (applied) notify(applied);
+    }
+}
+
+async function notify(count) {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage({ type: 'replayed', count }));
+}
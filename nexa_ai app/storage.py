@@ -0,0 +1,409 @@
+"""
+NEXA AI student storage
+Shared by the Flask web app and the offline CLI
+
+``load_student``/``save_student`` read and write the single DATA_FILE the
+app has always used. Deployments with many students pick a multi-student
+backend with the NEXA_STORAGE setting, e.g. ``sqlite:students.db`` or
+``sharded:students/`` (one file per student, no database); every backend
+implements the same small store interface:
+
+    load(student_id) -> dict or None
+    save(student_id, data) -> bool
+    save_many(items) -> int           # batched, transactional where possible
+    put_many(items) -> int            # items already encoded as bytes
+    iter_students() -> (student_id, data) pairs, streamed
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+import serialization
+
+DATA_FILE = "nexa-ai-student-data.json"
+STORAGE_URL = os.getenv("NEXA_STORAGE", "file")
+
+
+def new_student():
+    """Return a fresh student document."""
+    return {
+        "username": "Student",
+        "baseline_done": False,
+        "topic_strength": {},
+        "mistakes": {},
+        "study_log": {},
+        "reflections": []
+    }
+
+
+def new_revision():
+    """A random token marking one write of a student record."""
+    return os.urandom(6).hex()
+
+
+def load_student(path=None):
+    """Load student data with error handling."""
+    path = path or DATA_FILE
+    try:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return serialization.load(f)
+    except ValueError:
+        print("⚠️ Corrupted data file. Starting fresh.")
+    except IOError as e:
+        print(f"⚠️ Error loading file: {e}")
+
+    return new_student()
+
+
+def save_student(data, path=None):
+    """Save student data as compact JSON with error handling."""
+    path = path or DATA_FILE
+    try:
+        with open(path, "wb") as f:
+            f.write(serialization.encode_student(data))
+        return True
+    except (IOError, TypeError) as e:
+        print(f"❌ Error saving data: {e}")
+        return False
+
+
+# ==================
+# STORE BACKENDS
+# ==================
+class JSONFileStore:
+    """The single-student DATA_FILE; every student id maps to it."""
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def load(self, student_id):
+        return load_student(self.path)
+
+    def save(self, student_id, data):
+        return save_student(data, self.path)
+
+    def save_many(self, items):
+        count = 0
+        for student_id, data in items:
+            count += self.save(student_id, data)
+        return count
+
+    def put_many(self, items):
+        return self.save_many((sid, serialization.loads(raw)) for sid, raw in items)
+
+    def iter_students(self):
+        path = self.path or DATA_FILE
+        if os.path.exists(path):
+            yield "default", load_student(path)
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """Many students in one SQLite file, one compact JSON row each."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS students "
+                         "(id TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, student_id):
+        row = self._connect().execute(
+            "SELECT data FROM students WHERE id = ?", (student_id,)).fetchone()
+        return serialization.loads(row[0]) if row else None
+
+    def save(self, student_id, data):
+        return self.save_many([(student_id, data)]) == 1
+
+    def save_many(self, items):
+        return self.put_many((sid, serialization.encode_student(data)) for sid, data in items)
+
+    def put_many(self, items):
+        """Write pre-encoded rows in one transaction."""
+        rows = list(items)
+        try:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO students (id, data) VALUES (?, ?)", rows)
+            return len(rows)
+        except sqlite3.Error as e:
+            print(f"❌ Error saving data: {e}")
+            return 0
+
+    def iter_students(self, batch_size=500):
+        # A separate connection keeps the read cursor independent of writes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute("SELECT id, data FROM students ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for student_id, raw in rows:
+                    yield student_id, serialization.loads(raw)
+        finally:
+            conn.close()
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _GroupCommit:
+    """Makes pending writes durable in batches.
+
+    Writers hand over temp files they have already written and closed.
+    The first writer to arrive while no flush is running becomes the
+    leader and flushes everything queued so far; writers arriving during
+    a flush queue up for the next batch. Each batch fsyncs its files one
+    at a time, renames them into place, then fsyncs each touched
+    directory once.
+    """
+
+    def __init__(self, durable=True):
+        self.durable = durable
+        self.batches = 0
+        self._cond = threading.Condition()
+        self._pending = []
+        self._batch = 0          # number of the batch being collected
+        self._done = 0           # batches below this are finished
+        self._flushing = False
+
+    def commit(self, entries):
+        """Block until every [tmp, path, error] entry is flushed."""
+        with self._cond:
+            self._pending.extend(entries)
+            mine = self._batch
+            while self._done <= mine and self._flushing:
+                self._cond.wait()
+            if self._done <= mine:
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                self._batch += 1
+                leader = True
+            else:
+                leader = False
+        if leader:
+            try:
+                self._flush(batch)
+            finally:
+                with self._cond:
+                    self._done = mine + 1
+                    self._flushing = False
+                    self.batches += 1
+                    self._cond.notify_all()
+        return [entry[2] for entry in entries]
+
+    def _flush(self, batch):
+        dirs = set()
+        for entry in batch:
+            tmp, path, _ = entry
+            try:
+                if self.durable:
+                    fd = os.open(tmp, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                os.replace(tmp, path)
+                dirs.add(os.path.dirname(path))
+            except OSError as e:
+                entry[2] = e
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        if self.durable and hasattr(os, "O_DIRECTORY"):
+            for directory in dirs:
+                try:
+                    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    for entry in batch:
+                        if entry[2] is None and os.path.dirname(entry[1]) == directory:
+                            entry[2] = e
+
+
+class ShardedFileStore:
+    """One compact JSON file per student under hashed subdirectories.
+
+    ``<root>/ab/cd/<quoted id>.json``, where ``abcd`` starts the SHA-1 of
+    the student id, keeps every directory small. Saves write a temp file
+    and rename it over the old one, so readers never see a partial
+    student, and concurrent saves share one flush of file and directory
+    fsyncs through _GroupCommit. The directory tree is scanned on open
+    and by every iter_students(); between scans an in-memory index
+    answers lookups, and an id it does not know is looked up at its
+    hashed path, so students saved by other workers are always found.
+    """
+
+    SUFFIX = ".json"
+    # Temp files older than this were left by a crash, not a save in progress
+    TEMP_MAX_AGE = 3600
+
+    def __init__(self, path, durable=True):
+        self.root = path
+        self._commit = _GroupCommit(durable)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._index = {}
+        self._dirs = set()
+        os.makedirs(self.root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        from urllib.parse import unquote
+
+        stale = time.time() - self.TEMP_MAX_AGE
+        for top in os.scandir(self.root):
+            if not top.is_dir():
+                continue
+            for shard in os.scandir(top.path):
+                if not shard.is_dir():
+                    continue
+                self._dirs.add(shard.path)
+                for entry in os.scandir(shard.path):
+                    if entry.name.startswith("."):
+                        # Another worker may be writing it; only clear crash leftovers
+                        try:
+                            if entry.stat().st_mtime < stale:
+                                os.remove(entry.path)
+                        except FileNotFoundError:
+                            pass
+                    elif entry.name.endswith(self.SUFFIX):
+                        with self._lock:
+                            self._index[unquote(entry.name[:-len(self.SUFFIX)])] = entry.path
+
+    def _path(self, student_id, create=True):
+        # Imported here rather than at the top so the CLI starts faster
+        import hashlib
+        from urllib.parse import quote
+
+        digest = hashlib.sha1(student_id.encode("utf-8")).hexdigest()
+        shard = os.path.join(self.root, digest[:2], digest[2:4])
+        if create and shard not in self._dirs:
+            os.makedirs(shard, exist_ok=True)
+            self._dirs.add(shard)
+        return os.path.join(shard, quote(student_id, safe="") + self.SUFFIX)
+
+    def load(self, student_id):
+        path = self._index.get(student_id)
+        if path is None:
+            # Possibly saved by another worker since this store was opened
+            path = self._path(student_id, create=False)
+        try:
+            with open(path, "rb") as f:
+                data = serialization.load(f)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._index[student_id] = path
+        return data
+
+    def save(self, student_id, data):
+        return self.save_many([(student_id, data)]) == 1
+
+    def save_many(self, items):
+        return self.put_many((sid, serialization.encode_student(data)) for sid, data in items)
+
+    def put_many(self, items):
+        """Write pre-encoded students and flush them as one batch.
+
+        Each temp file is closed as soon as it is written, so a batch holds
+        no file descriptors however many students it has; the group commit
+        syncs them together with other writers' files.
+        """
+        entries, ids = [], []
+        pid = os.getpid()
+        try:
+            # A student saved twice in one call keeps its last version
+            for student_id, raw in dict(items).items():
+                path = self._path(student_id)
+                tmp = os.path.join(os.path.dirname(path), f".{pid}.{next(self._seq)}.tmp")
+                entries.append([tmp, path, None])
+                with open(tmp, "wb") as f:
+                    f.write(raw)
+                ids.append(student_id)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error saving data: {e}")
+            for tmp, _, _ in entries:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return 0
+
+        count = 0
+        for student_id, (_, path, _), error in zip(ids, entries, self._commit.commit(entries)):
+            if error is None:
+                with self._lock:
+                    self._index[student_id] = path
+                count += 1
+            else:
+                print(f"❌ Error saving data: {error}")
+        return count
+
+    def iter_students(self):
+        self._scan()
+        for student_id in sorted(self._index):
+            data = self.load(student_id)
+            if data is not None:
+                yield student_id, data
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        pass
+
+
+BACKENDS = {
+    "file": JSONFileStore,
+    "sqlite": SQLiteStore,
+    "sharded": ShardedFileStore,
+}
+
+_store = None
+
+
+def open_store(url=None):
+    """Open a store from a ``backend[:location]`` URL such as ``sqlite:students.db``."""
+    backend, _, location = (url or STORAGE_URL).partition(":")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    if backend == "file":
+        return JSONFileStore(location or None)
+    return BACKENDS[backend](location or f"nexa-ai-students.{backend}")
+
+
+def get_store():
+    """The configured store, opened on first use."""
+    global _store
+    if _store is None:
+        _store = open_store()
+    return _store
+
+
+def set_store(store):
+    """Replace the configured store (used by tools and tests)."""
+    global _store
+    _store = store
@@ -0,0 +1,272 @@
+"""
+NEXA AI delta sync
+Reconciles the offline CLI's student file with the web server
+
+The client remembers a sync vector (the server version it last saw and
+how many reflections both sides share) plus a base snapshot of every
+topic as of that sync. A sync sends only topics that differ from the
+base and reflections written since, deflate-compressed. The server
+merges them and answers with every topic it changed since the client's
+vector, so both sides converge.
+
+Conflicts resolve deterministically:
+  * strength changes merge as deltas against the base, so concurrent
+    quiz results on two devices both count (floored at MIN_STRENGTH);
+    a topic first created on two devices keeps the server's value
+  * mistake counts are summed
+  * the latest study timestamp wins
+  * reflections are kept from both sides, in the order the server got them
+"""
+
+import math
+import os
+import uuid
+from datetime import datetime
+import zlib
+import urllib.request
+
+import engine
+import serialization
+from content import TOPIC_NAMES, get_pack
+
+SYNC_STATE_FILE = "nexa-ai-sync-state.json"
+SYNC_URL = os.getenv("NEXA_SYNC_URL", "http://localhost:5000")
+MAX_PAYLOAD = 1 << 20      # largest decompressed sync request accepted
+DIGITS = 6
+
+
+class SyncError(Exception):
+    """Raised when a sync payload cannot be decoded."""
+
+
+# =========================
+# TOPIC STATE
+# =========================
+def _round(value):
+    return None if value is None else round(value, DIGITS)
+
+
+def topic_state(student, topic):
+    """[strength, mistakes, last studied] for one topic."""
+    return [_round(student.get_strength(topic)), student.get_mistakes(topic),
+            student.last_studied(topic)]
+
+
+def _known_topics(student):
+    """Names of topics with any strength, mistake or study entry."""
+    mask = student.mistake_mask
+    for tid in range(len(student.strength)):
+        if (student.strength[tid] == student.strength[tid]      # not NaN
+                or student.studied[tid] == student.studied[tid]
+                or mask >> tid & 1):
+            yield TOPIC_NAMES[tid]
+
+
+def _set_topic_state(student, topic, state):
+    strength, mistakes, studied = state
+    if strength is not None:
+        student.set_strength(topic, strength)
+    diff = mistakes - student.get_mistakes(topic)
+    if diff:
+        student.add_mistake(topic, diff)
+    if studied is not None:
+        student.mark_studied(topic, studied)
+
+
+# =========================
+# CLIENT STATE
+# =========================
+class SyncState:
+    """Sync vector and base snapshot kept next to the CLI's data file."""
+
+    def __init__(self, client_id=None, version=0, reflections=0, base=None):
+        self.client_id = client_id or uuid.uuid4().hex[:12]
+        self.version = version
+        self.reflections = reflections
+        self.base = base or {}
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or SYNC_STATE_FILE
+        try:
+            with open(path, "rb") as f:
+                data = serialization.load(f)
+            return cls(data.get("client"), data.get("version", 0),
+                       data.get("reflections", 0), data.get("base", {}))
+        except (IOError, ValueError):
+            return cls()
+
+    def save(self, path=None):
+        path = path or SYNC_STATE_FILE
+        with open(path, "wb") as f:
+            serialization.dump({"client": self.client_id, "version": self.version,
+                                "reflections": self.reflections, "base": self.base}, f)
+
+
+def build_delta(student, state, student_id=None):
+    """Changes made locally since the last sync."""
+    topics = {}
+    for topic in _known_topics(student):
+        current = topic_state(student, topic)
+        base = state.base.get(topic, [None, 0, None])
+        if current != base:
+            topics[topic] = [
+                current[0],
+                base[0],
+                current[1] - base[1],
+                current[2] if current[2] != base[2] else None,
+            ]
+    delta = {"c": state.client_id, "v": state.version, "rc": state.reflections}
+    if student_id:
+        delta["s"] = student_id
+    if topics:
+        delta["t"] = topics
+    new_reflections = student.reflections[state.reflections:]
+    if new_reflections:
+        delta["r"] = new_reflections
+    if student.baseline_done:
+        delta["b"] = 1
+    return delta
+
+
+def apply_response(student, state, response):
+    """Adopt the server's merged state and advance the sync vector."""
+    for topic, server_state in response.get("t", {}).items():
+        _set_topic_state(student, topic, server_state)
+        state.base[topic] = topic_state(student, topic)
+    student.reflections[state.reflections:] = response.get("r", [])
+    student.baseline_done = bool(response.get("b")) or student.baseline_done
+    state.reflections = response["rc"]
+    state.version = response["v"]
+
+
+# =========================
+# SERVER MERGE
+# =========================
+def _reflection(item):
+    """(text, written at or None) of a client reflection; ValueError if malformed."""
+    if isinstance(item, str):
+        return item, None
+    if not isinstance(item, dict) or not isinstance(item.get("entry"), str):
+        raise ValueError("Reflections must be strings or objects with an entry")
+    try:
+        return item["entry"], datetime.fromisoformat(item.get("timestamp"))
+    except (TypeError, ValueError):
+        return item["entry"], None
+
+
+def _number(value, name):
+    """A finite number or None from a client delta; ValueError otherwise."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def _topic_change(topic, change, topics):
+    """(strength, base, mistakes, studied) of a client topic; ValueError if malformed."""
+    if topic not in topics:
+        raise ValueError(f"Unknown topic: {topic!r}")
+    if not isinstance(change, (list, tuple)) or len(change) != 4:
+        raise ValueError(f"{topic}: expected [strength, base, mistakes, studied]")
+    strength, base, mistakes, studied = change
+    if isinstance(mistakes, bool) or not isinstance(mistakes, int):
+        raise ValueError(f"{topic}: mistakes must be a whole number")
+    return (_number(strength, "strength"), _number(base, "base"), mistakes,
+            _number(studied, "studied"))
+
+
+def merge(student, delta):
+    """Merge a client delta into the server's StudentModel.
+
+    Returns the response for the client: every topic the client sent or
+    the server changed since the client's vector, and any reflections the
+    client has not seen.
+    """
+    known = delta.get("v", 0)
+    if not student.can_diff(known):
+        # The server lost or compacted state the client saw; resend everything
+        known = 0
+    seen = min(delta.get("rc", 0), len(student.reflections))
+    # Validate everything first so a bad entry leaves the student untouched
+    if not isinstance(delta.get("t", {}), dict) or not isinstance(delta.get("r", []), list):
+        raise ValueError("Topics must be an object and reflections a list")
+    topics = get_pack().topic_subject
+    changes = [(topic, _topic_change(topic, change, topics))
+               for topic, change in delta.get("t", {}).items()]
+    added = [_reflection(item) for item in delta.get("r", ())]
+
+    for topic, (strength, base, mistakes, studied) in changes:
+        if strength is not None:
+            current = student.get_strength(topic)
+            if current is None:
+                student.set_strength(topic, strength)
+            elif base is not None and strength != base:
+                student.set_strength(topic, _round(max(engine.MIN_STRENGTH, current + strength - base)))
+        if mistakes > 0:
+            student.add_mistake(topic, mistakes)
+        if studied is not None and studied > student.last_studied(topic, float("-inf")):
+            student.mark_studied(topic, studied)
+
+    for text, when in added:
+        # Analysed like any other reflection so it reaches the study plan
+        engine.add_reflection(student, text, when)
+    if delta.get("b") and not student.baseline_done:
+        student.baseline_done = True
+        student.touch()
+
+    topics = set(delta.get("t", {}))
+    topics.update(TOPIC_NAMES[tid] for tid in student.changed_since(known))
+    return {
+        "v": student.version,
+        "t": {topic: topic_state(student, topic) for topic in sorted(topics)},
+        "r": student.reflections[seen:],
+        "rc": len(student.reflections),
+        "b": 1 if student.baseline_done else 0,
+    }
+
+
+# =========================
+# WIRE FORMAT
+# =========================
+def encode(payload):
+    """Compact JSON, deflate-compressed."""
+    return zlib.compress(serialization.dumps(payload), 9)
+
+
+def decode(body, encoding="deflate"):
+    """Decode a sync body, refusing anything that inflates past MAX_PAYLOAD."""
+    try:
+        if encoding == "deflate":
+            inflater = zlib.decompressobj()
+            body = inflater.decompress(body, MAX_PAYLOAD)
+            if inflater.unconsumed_tail:
+                raise SyncError("Sync payload too large")
+        return serialization.loads(body)
+    except (zlib.error, ValueError) as e:
+        raise SyncError(f"Invalid sync payload: {e}")
+
+
+def http_transport(base_url=None, timeout=10):
+    """Return a transport that POSTs payloads to a server's /api/sync."""
+    url = (base_url or SYNC_URL).rstrip("/") + "/api/sync"
+
+    def send(payload):
+        req = urllib.request.Request(url, data=payload, headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "deflate",
+            "Accept-Encoding": "deflate",
+        })
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read(), resp.headers.get("Content-Encoding")
+
+    return send
+
+
+def sync(student, state, transport, student_id=None):
+    """Run one sync round; returns (bytes sent, bytes received)."""
+    payload = encode(build_delta(student, state, student_id))
+    body, encoding = transport(payload)
+    apply_response(student, state, decode(body, encoding))
+    return len(payload), len(body)
@@ -0,0 +1,203 @@
+"""
+Tests for NEXA AI NDJSON bulk export and import
+"""
+
+import io
+import json
+
+import pytest
+
+import bulk
+import storage
+
+
+def make_students(count):
+    for i in range(count):
+        student = storage.new_student()
+        student["username"] = f"student-{i}"
+        student["topic_strength"] = {"cells": 0.7, "ratio": 0.3 + (i % 5) / 10}
+        student["mistakes"] = {"ratio": i % 3}
+        yield f"s{i:05d}", student
+
+
+def ndjson(students):
+    return b"".join(json.dumps({"id": sid, "student": data}).encode() + b"\n" for sid, data in students)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    yield store
+    store.close()
+
+
+def test_round_trip(store, tmp_path):
+    summary = bulk.import_ndjson(store, io.BytesIO(ndjson(make_students(250))), batch_size=40)
+    assert summary["imported"] == 250 and summary["skipped"] == 0
+    assert len(store) == 250
+
+    out = io.BytesIO()
+    assert bulk.export_ndjson(store, out) == 250
+    lines = out.getvalue().splitlines()
+    assert json.loads(lines[0]) == {"id": "s00000", "student": dict(make_students(1))["s00000"]}
+
+    copy = storage.SQLiteStore(str(tmp_path / "copy.db"))
+    bulk.import_ndjson(copy, io.BytesIO(out.getvalue()))
+    assert dict(copy.iter_students()) == dict(store.iter_students())
+    copy.close()
+
+
+def test_invalid_lines_skipped(store):
+    data = ndjson(make_students(3)) + b"{broken\n" + \
+        json.dumps({"id": "bad", "student": {"mistakes": {"cells": -1}}}).encode() + b"\n\n"
+    summary = bulk.import_ndjson(store, io.BytesIO(data))
+    assert summary["imported"] == 3
+    assert summary["skipped"] == 2
+    assert [line for line, _ in summary["errors"]] == [4, 5]
+
+
+def test_file_store_refuses_many_students(tmp_path):
+    store = storage.JSONFileStore(str(tmp_path / "student.json"))
+    assert bulk.import_ndjson(store, io.BytesIO(ndjson(make_students(1))))["imported"] == 1
+    with pytest.raises(ValueError, match="single student"):
+        bulk.import_ndjson(store, io.BytesIO(ndjson(make_students(3))))
+    with pytest.raises(ValueError, match="single student"):
+        bulk.import_baseline(store, io.BytesIO(baseline_csv(3)), "csv", replace=True)
+    assert store.load("s00000")["username"] == "student-0"
+
+
+def test_parallel_workers(store):
+    summary = bulk.import_ndjson(store, io.BytesIO(ndjson(make_students(500))),
+                                 batch_size=50, workers=2)
+    assert summary["imported"] == 500
+    assert store.load("s00499")["username"] == "student-499"
+
+
+def test_resume_from_checkpoint(store, tmp_path):
+    source = tmp_path / "students.ndjson"
+    source.write_bytes(ndjson(make_students(100)))
+    checkpoint = str(tmp_path / "import.checkpoint")
+
+    def interrupt(summary):
+        if summary["imported"] >= 30:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        with open(source, "rb") as fp:
+            bulk.import_ndjson(store, fp, batch_size=10, checkpoint=checkpoint,
+                               source=str(source), progress=interrupt)
+    assert len(store) == 30
+
+    seen = []
+    with open(source, "rb") as fp:
+        summary = bulk.import_ndjson(store, fp, batch_size=10, checkpoint=checkpoint,
+                                     source=str(source), progress=lambda s: seen.append(s["imported"]))
+    assert seen[0] == 40
+    assert summary["imported"] == 100 and len(store) == 100
+
+
+def test_admin_endpoints(store, tmp_path, monkeypatch):
+    import app as web
+
+    monkeypatch.setattr(storage, "_store", store)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    monkeypatch.setitem(web.app.config, "JOBS_DIR", str(tmp_path / "jobs"))
+    client = web.app.test_client()
+
+    assert client.post("/api/admin/import", data=b"").status_code == 403
+    resp = client.post("/api/admin/import", data=ndjson(make_students(20)),
+                       headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["data"]["id"]
+    assert resp.headers["Location"] == f"/api/jobs/{job_id}"
+    web.jobs.wait(job_id, 10)
+    assert web.jobs.get(job_id).result["imported"] == 20
+    assert list((tmp_path / "jobs").iterdir()) == []
+
+    resp = client.get("/api/admin/export", headers={"X-Admin-Token": "secret"})
+    assert resp.mimetype == "application/x-ndjson"
+    assert len(resp.data.splitlines()) == 20
+
+
+def baseline_csv(count):
+    lines = ["id,username,class_id,cells,ratio,force"]
+    for i in range(count):
+        lines.append(f"b{i:04d},Student {i},9{'AB'[i % 2]},"
+                     f"\"cells are units, of life\",{'a long answer' if i % 3 else '?'},")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def test_baseline_csv_matches_web_rules(store):
+    from models import StudentModel
+    import engine
+
+    seen = []
+    summary = bulk.import_baseline(store, io.BytesIO(baseline_csv(30)), "csv", batch_size=8,
+                                   progress=lambda s: seen.append((s["rows"], s["rate"])))
+    assert summary["imported"] == 30 and summary["skipped"] == 0
+    assert [rows for rows, _ in seen] == [8, 16, 24, 30] and seen[-1][1] > 0
+
+    data = store.load("b0001")
+    expected = StudentModel.from_dict(storage.new_student())
+    engine.apply_baseline(expected, {"cells": "cells are units, of life", "ratio": "a long answer",
+                                     "force": ""})
+    assert data["topic_strength"] == expected.to_dict()["topic_strength"]
+    assert data["topic_strength"] == {"cells": 0.7, "ratio": 0.7, "force": 0.3}
+    assert data["baseline_done"] and data["username"] == "Student 1" and data["class_id"] == "9B"
+    assert data["progress"]
+    assert store.load("b0000")["topic_strength"]["ratio"] == 0.3
+
+
+def test_baseline_ndjson_errors_and_existing_students(store):
+    lines = [
+        {"id": "n1", "answers": {"cells": "a long answer"}},
+        {"id": "n2", "answers": {"volcanoes": "a long answer"}},
+        {"id": "n3", "answers": {}},
+        {"answers": {"cells": "x"}},
+        {"id": "n4", "answers": {"cells": 5}},
+    ]
+    data = b"".join(json.dumps(line).encode() + b"\n" for line in lines) + b"{broken\n"
+    summary = bulk.import_baseline(store, io.BytesIO(data), "ndjson")
+    assert summary["imported"] == 1 and summary["skipped"] == 5
+    assert [line for line, _ in summary["errors"]] == [2, 3, 4, 5, 6]
+
+    # Running again skips students that already have a record
+    summary = bulk.import_baseline(store, io.BytesIO(data[:data.index(b"\n") + 1]), "ndjson")
+    assert summary["imported"] == 0 and summary["errors"] == [(None, "n1 already exists")]
+    store.save("n1", storage.new_student())
+    bulk.import_baseline(store, io.BytesIO(data[:data.index(b"\n") + 1]), "ndjson", replace=True)
+    assert store.load("n1")["baseline_done"]
+
+    with pytest.raises(bulk.ValidationError):
+        bulk.import_baseline(store, io.BytesIO(b"id,volcanoes\nx,y\n"), "csv")
+
+
+def test_baseline_parallel_workers(store):
+    summary = bulk.import_baseline(store, io.BytesIO(baseline_csv(200)), "csv", batch_size=25,
+                                   workers=2)
+    assert summary["imported"] == 200 and len(store) == 200
+    assert store.load("b0199")["username"] == "Student 199"
+
+
+def test_pools_spawn_workers():
+    # Pools are started from job threads, where forking could copy a held lock.
+    with bulk._process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() == "spawn"
+
+
+def test_baseline_job(store, tmp_path, monkeypatch):
+    import app as web
+
+    monkeypatch.setattr(storage, "_store", store)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    monkeypatch.setitem(web.app.config, "JOBS_DIR", str(tmp_path / "jobs"))
+    (tmp_path / "jobs").mkdir()
+    (tmp_path / "jobs" / "class.csv").write_bytes(baseline_csv(10))
+    client = web.app.test_client()
+    resp = client.post("/api/jobs", headers={"X-Admin-Token": "secret"},
+                       json={"type": "baseline", "params": {"file": "class.csv"}})
+    job_id = resp.get_json()["data"]["id"]
+    web.jobs.wait(job_id, 10)
+    result = web.jobs.get(job_id).result
+    assert result["imported"] == 10 and result["rate"] > 0
+
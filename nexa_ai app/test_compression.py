@@ -0,0 +1,123 @@
+"""
+Tests for NEXA AI response compression
+"""
+
+import gzip
+import io
+import json
+import zlib
+
+from flask import Flask, Response, jsonify, request, send_file
+
+from compression import compress_stream, init_compression
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    init_compression(app)
+
+    @app.route("/big")
+    def big():
+        return jsonify({"topics": ["photosynthesis"] * 500})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/versioned")
+    def versioned():
+        response = jsonify({"topics": ["respiration"] * 500})
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route("/stream")
+    def stream():
+        return Response((json.dumps({"n": i}) + "\n" for i in range(100)),
+                        mimetype="application/x-ndjson")
+
+    @app.route("/sw.js")
+    def script():
+        return send_file(io.BytesIO(b"self.addEventListener('fetch', () => {});\n" * 50),
+                         mimetype="application/javascript", etag="sw-1")
+
+    return app
+
+
+def test_gzip_negotiated():
+    client = make_app().test_client()
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert json.loads(gzip.decompress(resp.data))["topics"][0] == "photosynthesis"
+
+
+def test_deflate_preferred_by_quality():
+    client = make_app().test_client()
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip;q=0.5, deflate"})
+    assert resp.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(resp.data))["topics"]
+
+
+def test_identity_and_small_bodies_untouched():
+    client = make_app().test_client()
+    assert "Content-Encoding" not in client.get("/big").headers
+    resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+    assert resp.get_json() == {"ok": True}
+
+
+def test_etag_responses_cached():
+    app = make_app()
+    client = app.test_client()
+    cache = app.extensions["compression_cache"]
+    first = client.get("/versioned", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/versioned", headers={"Accept-Encoding": "gzip"})
+    assert first.data == second.data
+    assert cache.hits == 1 and len(cache) == 1
+    assert first.headers["ETag"].startswith("W/")
+
+    etag = first.headers["ETag"]
+    again = client.get("/versioned", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+
+
+def test_passthrough_files_get_a_weak_etag():
+    client = make_app().test_client()
+    plain = client.get("/sw.js")
+    assert plain.headers["ETag"] == '"sw-1"'
+    resp = client.get("/sw.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip" and resp.headers["ETag"] == 'W/"sw-1"'
+    assert gzip.decompress(resp.data) == plain.data
+
+
+def test_large_bodies_streamed():
+    client = make_app(COMPRESS_STREAM_THRESHOLD=1024).test_client()
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    assert len(json.loads(gzip.decompress(resp.data))["topics"]) == 500
+
+
+def test_streamed_response_compressed():
+    client = make_app().test_client()
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    lines = gzip.decompress(resp.data).decode().splitlines()
+    assert len(lines) == 100 and json.loads(lines[-1]) == {"n": 99}
+
+
+def test_compress_stream_round_trip():
+    chunks = [b"cells " * 100, "energy " * 100]
+    out = b"".join(compress_stream(iter(chunks), "deflate", sync_flush=True))
+    assert zlib.decompress(out) == b"cells " * 100 + b"energy " * 100
+
+
+if __name__ == "__main__":
+    test_gzip_negotiated()
+    test_deflate_preferred_by_quality()
+    test_identity_and_small_bodies_untouched()
+    test_etag_responses_cached()
+    test_large_bodies_streamed()
+    test_streamed_response_compressed()
+    test_compress_stream_round_trip()
+    print("✅ All compression tests passed!")
@@ -0,0 +1,169 @@
+"""
+Tests for NEXA AI content pack loading and hot reload
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+import content
+import predictor
+import questions
+import reflections
+from models import StudentModel
+
+
+def write_pack(path, topics, prompt="Explain: {topic}", mtime=None):
+    pack = {"subjects": {"science": topics},
+            "explanations": {topic: f"All about {topic}." for topic in topics},
+            "questions": [{"topic": topic, "difficulty": 1, "prompt": prompt.format(topic=topic),
+                           "keywords": [topic]} for topic in topics]}
+    path.write_text(json.dumps(pack))
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def restore_pack(monkeypatch):
+    monkeypatch.setattr(content, "_pack", content.get_pack())
+
+
+def test_reload_builds_indexes_before_the_swap(tmp_path, restore_pack):
+    old = content.get_pack()
+    old_bank = questions.get_bank()
+    path = tmp_path / "pack.json"
+    write_pack(path, ["cells", "volcanoes"])
+
+    pack = content.reload_pack(str(path))
+    assert content.get_pack() is pack and pack.version > old.version
+    assert pack.built("questions") is not None and pack.built("phrases") is not None
+    assert len(questions.get_bank()) == 2 and questions.get_bank() is not old_bank
+    assert reflections.get_index() is pack.built("phrases")
+    # A reader still holding the old pack keeps its own indexes
+    assert old.index("questions") is old_bank
+
+
+def test_failed_reload_keeps_the_current_pack(tmp_path, restore_pack):
+    current = content.get_pack()
+    path = tmp_path / "pack.json"
+    path.write_text("{not json")
+    with pytest.raises(ValueError):
+        content.reload_pack(str(path))
+    assert content.get_pack() is current
+    # Startup still falls back to the built-in content
+    assert content.load_pack(str(path)).subject_topics == content.SUBJECT_TOPICS
+
+
+def test_watcher_waits_for_the_file_to_settle(tmp_path, restore_pack):
+    path = tmp_path / "pack.json"
+    write_pack(path, ["cells"], mtime=1_000_000_000)
+    content.reload_pack(str(path))
+    watcher = content.PackWatcher(str(path), interval=60)
+    assert watcher.check() is False
+
+    write_pack(path, ["cells", "force"], mtime=2_000_000_000)
+    assert watcher.check() is False                  # changed: wait one check
+    assert watcher.check() is True and watcher.reloads == 1
+    assert content.get_pack().subject_topics == {"science": ["cells", "force"]}
+    assert watcher.check() is False
+
+    # A broken save is retried, and the pack in use stays active meanwhile
+    path.write_text("{half written")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    watcher.check()
+    assert watcher.check() is False and watcher.failed
+    assert content.get_pack().subject_topics == {"science": ["cells", "force"]}
+    write_pack(path, ["energy"], mtime=4_000_000_000)
+    watcher.check()
+    assert watcher.check() is True
+    assert content.get_pack().explanations == {"energy": "All about energy."}
+
+
+def test_fresh_watcher_starts_settled(tmp_path, restore_pack, monkeypatch):
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({"subjects": {"science": ["cells"]},
+                                "questions": "questions.ndjson"}))
+    (tmp_path / "questions.ndjson").write_text(json.dumps(
+        {"topic": "cells", "difficulty": 1, "prompt": "What is a cell?", "keywords": ["unit"]}) + "\n")
+    monkeypatch.setattr(content, "CONTENT_PACK", str(path))
+    monkeypatch.setattr(content, "_pack", None)
+
+    watcher = content.PackWatcher(str(path), interval=60)
+    assert len(watcher.loaded) == 2
+    assert watcher.check() is False and watcher.check() is False
+    assert watcher.reloads == 0 and watcher.pending is None
+
+
+def test_watch_pack_needs_a_path_and_interval(monkeypatch):
+    monkeypatch.setattr(content, "CONTENT_PACK", None)
+    assert content.watch_pack(None, 5) is None
+    assert content.watch_pack("pack.json", 0) is None
+
+
+def test_readers_never_see_a_half_built_pack(tmp_path, restore_pack):
+    paths = []
+    for i in range(2):
+        paths.append(tmp_path / f"pack{i}.json")
+        write_pack(paths[-1], ["cells", f"topic {i}"], prompt=f"Pack {i}: {{topic}}")
+    stop, problems = threading.Event(), []
+
+    def read():
+        while not stop.is_set():
+            pack = content.get_pack()
+            if pack.built("questions") is None:
+                problems.append(pack.version)
+
+    content.reload_pack(str(paths[0]))
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(50):
+        content.reload_pack(str(paths[i % 2]))
+    stop.set()
+    for thread in readers:
+        thread.join()
+    assert problems == []
+
+
+def test_derived_caches_follow_the_content_version(tmp_path, restore_pack):
+    student = StudentModel()
+    student.set_strength("cells", 0.4)
+    first = predictor.ranking(student, now=0.0)
+    assert predictor.ranking(student, now=0.0) is first
+    path = tmp_path / "pack.json"
+    write_pack(path, ["cells"])
+    content.reload_pack(str(path))
+    assert predictor.ranking(student, now=0.0) is not first
+
+
+def test_cached_students_follow_reordered_subjects(tmp_path, restore_pack, monkeypatch):
+    import app as web
+    import engine
+    import storage
+
+    monkeypatch.setattr(storage, "DATA_FILE", str(tmp_path / "student.json"))
+    web._student_cache.clear()
+    student = web.load_cached_student("pat")
+    student.set_strength("ratio", 0.2)
+    student.set_strength("cells", 0.8)
+    student.set_decay_rate(student.pack.subject_ids["biology"], 0.5)
+
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({"subjects": {"biology": ["cells"], "math": ["ratio"]}}))
+    content.reload_pack(str(path))
+    # A stale record still saves its own subject names
+    assert student.to_dict()["decay_rates"] == {"biology": 0.5}
+
+    current = web.load_cached_student("pat")
+    assert current is not student and current.is_current()
+    summary = {row["subject"]: row for row in engine.subject_summary(current, now=0.0)}
+    assert summary["biology"]["mean_strength"] == 0.8 and summary["math"]["mean_strength"] == 0.2
+    assert current.decay_rate("cells") == 0.5 and current.decay_rate("ratio") is None
+    assert current.to_dict()["decay_rates"] == {"biology": 0.5}
+    web._student_cache.clear()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
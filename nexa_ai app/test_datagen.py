@@ -0,0 +1,119 @@
+"""
+Tests for the NEXA AI synthetic student generator
+"""
+
+import io
+import json
+
+import pytest
+
+import bulk
+import content
+import datagen
+import storage
+from models import StudentModel
+
+
+def test_same_seed_same_students():
+    first = list(datagen.generate(50, seed=4))
+    assert list(datagen.generate(50, seed=4)) == first
+    assert list(datagen.generate(10, seed=4, start=20)) == first[20:30]
+    assert list(datagen.generate(50, seed=5)) != first
+    batched = [row for rows in datagen.encoded(50, seed=4, batch_size=7) for row in rows]
+    assert [sid for sid, _ in batched] == [sid for sid, _ in first]
+
+
+def test_records_match_the_schema():
+    for student_id, data in datagen.generate(200, seed=1, topics=60, reflections=5):
+        bulk.validate_record({"id": student_id, "student": data})
+        model = StudentModel.from_dict(json.loads(json.dumps(data)))
+        assert model.to_dict()["topic_strength"] == data["topic_strength"]
+        for topic in data.get("quiz_history", {}):
+            history = model.topic_history(topic)
+            assert history.last_time() == pytest.approx(data["study_log"][topic])
+        assert all(0.0 <= s <= 1.0 for s in data["topic_strength"].values())
+
+
+def test_profile_shapes_the_data():
+    rows = [data for _, data in datagen.generate(500, seed=2, topics=30, coverage=0.5,
+                                                  reflections=0, history=0)]
+    assessed = sum(len(d["topic_strength"]) for d in rows) / (500 * 30)
+    assert 0.45 < assessed < 0.55
+    assert not any(d["reflections"] or "quiz_history" in d for d in rows)
+
+    weak, strong = [], []
+    for data in rows:
+        for topic, strength in data["topic_strength"].items():
+            (weak if strength < 0.4 else strong if strength > 0.7 else []).append(
+                data["mistakes"].get(topic, 0))
+    assert sum(weak) / len(weak) > 2 * sum(strong) / len(strong)
+
+
+def test_reflections_mention_weak_topics():
+    hard = 0
+    for _, data in datagen.generate(300, seed=3, reflections=4):
+        for reflection in data["reflections"]:
+            for topic, strength in data["topic_strength"].items():
+                if reflection["entry"] in [text.format(topic=topic)
+                                           for text in datagen.FEELINGS["hard"]]:
+                    assert strength < 0.5
+                    hard += 1
+    assert hard > 100
+
+
+def test_content_pack_covers_topics():
+    pack = datagen.content_pack(80)
+    topics = [t for names in pack["subjects"].values() for t in names]
+    assert topics == datagen.topic_names(80)
+    assert max(len(names) for names in pack["subjects"].values()) <= datagen.SUBJECT_SIZE
+    assert datagen.content_pack(5)["subjects"] == {"math": ["linear equations", "algebra", "ratio"],
+                                                   "biology": ["cells", "photosynthesis"]}
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "sharded"])
+def test_write_store(tmp_path, backend):
+    store = storage.open_store(f"{backend}:{tmp_path / 'students'}")
+    progress = []
+    assert datagen.write_store(store, 120, seed=6, batch_size=50, progress=progress.append) == 120
+    assert progress == [50, 100, 120]
+    assert len(store) == 120
+    assert store.load("student-0000042") == dict(datagen.generate(1, seed=6, start=42))[
+        "student-0000042"]
+    store.close()
+
+
+def test_file_backend_takes_one_student(tmp_path):
+    store = storage.JSONFileStore(str(tmp_path / "student.json"))
+    with pytest.raises(ValueError):
+        datagen.write_store(store, 2)
+    assert datagen.write_store(store, 1, seed=8) == 1
+    assert store.load("default")["username"] == "Student 0"
+
+
+def test_ndjson_imports_with_bulk(tmp_path):
+    out = io.BytesIO()
+    assert datagen.write_ndjson(out, 75, seed=9, batch_size=20, workers=2) == 75
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    summary = bulk.import_ndjson(store, io.BytesIO(out.getvalue()))
+    assert summary["imported"] == 75 and summary["skipped"] == 0
+    store.close()
+
+
+def test_command_line(tmp_path):
+    pack = tmp_path / "pack.json"
+    assert datagen.main(["30", "--store", f"sqlite:{tmp_path / 'students.db'}", "--workers", "0",
+                         "--topics", "40", "--pack-out", str(pack)]) == 0
+    loaded = content.load_pack(str(pack))
+    assert len(loaded.topic_subject) == 40
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    assert len(store) == 30
+    store.close()
+
+
+if __name__ == "__main__":
+    test_same_seed_same_students()
+    test_records_match_the_schema()
+    test_profile_shapes_the_data()
+    test_reflections_mention_weak_topics()
+    test_content_pack_covers_topics()
+    print("✅ All data generator tests passed!")
@@ -0,0 +1,285 @@
+"""
+Tests for the NEXA AI core engine
+"""
+
+import random
+
+import pytest
+
+import engine
+from content import SUBJECT_TOPICS, get_pack, topic_id
+from models import SCALE, StudentModel
+
+
+def test_retention_curve():
+    assert engine.retention(1000.0, 1000.0) == 1.0
+    assert engine.retention(0.0, 3600.0) == 0.86
+    assert engine.retention(0.0, 3600.0, rate=0.5) == 0.61
+
+
+def test_baseline_rules():
+    student = StudentModel()
+    readiness = engine.apply_baseline(student, {"cells": "the unit of life", "ratio": "no"})
+    assert readiness == 50
+    assert student.baseline_done
+    assert student.get_strength("cells") == engine.BASELINE_STRONG
+    assert student.get_strength("ratio") == engine.BASELINE_WEAK
+    assert engine.readiness_score(student) == 50
+
+
+def test_quiz_updates():
+    student = StudentModel()
+    student.set_strength("force", 0.3)
+    assert engine.answer_quiz(student, "force", "A force is a push", now=50.0)
+    assert student.get_strength("force") == pytest.approx(0.35)
+    assert not engine.answer_quiz(student, "force", "", now=60.0)
+    assert student.get_mistakes("force") == 1
+    assert student.last_studied("force") == 60.0
+    for _ in range(5):
+        engine.register_mistake(student, "force")
+    assert student.get_strength("force") == engine.MIN_STRENGTH
+
+
+def test_numeric_answers_match_whole_values():
+    speed, shares, solve = ["10"], ["12", "8"], ["x = 2", "x=2", "x is 2"]
+    for answer, keywords in [("10 m/s", speed), ("it is 10.", speed), ("12 and 8", shares),
+                             ("8:12", shares), ("x = 2", solve), ("x=2, because", solve)]:
+        assert engine.is_correct("topic", answer, keywords), answer
+    for answer, keywords in [("100", speed), ("10.5 m/s", speed), ("110", speed),
+                             ("18", shares), ("12", shares), ("128", shares),
+                             ("x = 25", solve), ("x=2.5", solve)]:
+        assert not engine.is_correct("topic", answer, keywords), answer
+    # Word keywords still match inside longer words
+    assert engine.is_correct("separation of mixtures", "by evaporating it", ["evaporat"])
+
+
+def test_weakest_topics():
+    student = StudentModel()
+    for topic, value in {"cells": 0.7, "ratio": 0.2, "motion": 0.4}.items():
+        student.set_strength(topic, value)
+    assert engine.weakest_topics(student, 2) == ["ratio", "motion"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_readiness_matches_recompute(seed):
+    rng = random.Random(seed)
+    topics = ["cells", "ratio", "motion", "energy", "weather", "volcanoes"]
+    student = StudentModel()
+    for _ in range(300):
+        topic = rng.choice(topics)
+        op = rng.random()
+        if op < 0.3:
+            engine.register_mistake(student, topic)
+        elif op < 0.6:
+            engine.register_correct(student, topic)
+        elif op < 0.8:
+            student.set_strength(topic, rng.random())
+        else:
+            engine.answer_quiz(student, topic, rng.choice(["", topic, "no idea"]), now=1.0)
+        assert engine.readiness_score(student) == engine.recompute_readiness(student)
+    reloaded = StudentModel.from_dict(student.to_dict())
+    assert reloaded.strength_total == student.strength_total
+    assert reloaded.strength_count == student.strength_count
+
+
+def brute_force_subjects(student, now):
+    rows = []
+    for subject, topics in SUBJECT_TOPICS.items():
+        strengths = [round(student.get_strength(t) * SCALE) for t in topics if student.has_topic(t)]
+        studied = [student.last_studied(t) for t in topics if student.last_studied(t) is not None]
+        rows.append({
+            "subject": subject,
+            "topics": len(strengths),
+            "mean_strength": round(sum(strengths) / (len(strengths) * SCALE), 2) if strengths else None,
+            "min_retention": min((engine.retention(ts, now) for ts in studied), default=1.0),
+            "mistakes": sum(student.get_mistakes(t) for t in topics),
+        })
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_subject_rollups_match_brute_force(seed):
+    rng = random.Random(seed)
+    topics = [t for ts in SUBJECT_TOPICS.values() for t in ts] + ["volcanoes"]
+    student = StudentModel()
+    clock = 0.0
+    for _ in range(200):
+        topic = rng.choice(topics)
+        clock += rng.random() * 3600
+        if rng.random() < 0.2:
+            student.set_strength(topic, rng.random())
+        else:
+            engine.answer_quiz(student, topic, rng.choice(["", topic]), now=clock)
+        assert engine.subject_summary(student, now=clock) == brute_force_subjects(student, clock)
+    reloaded = StudentModel.from_dict(student.to_dict())
+    assert engine.subject_summary(reloaded, now=clock) == brute_force_subjects(student, clock)
+
+
+def test_topic_subject_index():
+    pack = get_pack()
+    for subject, topics in SUBJECT_TOPICS.items():
+        for topic in topics:
+            assert pack.topic_subject[topic] == subject
+            assert pack.subject_names[pack.subject_for(topic_id(topic))] == subject
+    assert pack.subject_for(topic_id("volcanoes")) == -1
+
+
+def test_web_flow(client, monkeypatch):
+    import app as web
+    import storage
+
+    monkeypatch.setattr(web, "is_online", lambda: False)
+
+    resp = client.post("/api/baseline", json={"answers": {"cells": "basic units of life", "ratio": "?"}})
+    assert resp.get_json()["readiness_score"] == 50
+    resp = client.post("/api/quiz", json={"topic": "ratio", "answer": "a ratio compares"})
+    assert resp.get_json()["correct"] is True
+    dashboard = client.get("/api/dashboard").get_json()["data"]
+    assert dashboard["readiness_score"] == 52
+    assert {row["topic"] for row in dashboard["topics"]} == {"cells", "ratio"}
+    assert storage.load_student()["topic_strength"]["ratio"] == 0.35
+    subjects = client.get("/api/dashboard/subjects").get_json()["data"]["subjects"]
+    math_row = next(row for row in subjects if row["subject"] == "math")
+    assert math_row["topics"] == 1 and math_row["mean_strength"] == 0.35
+
+
+def test_concurrent_answers_do_not_interleave(client, monkeypatch):
+    import threading
+    import time
+    import app as web
+
+    client.post("/api/baseline", json={"answers": {"cells": "basic units of life", "ratio": "?"}})
+    answer_quiz, active, overlaps = engine.answer_quiz, [], []
+
+    def slow_answer(*args, **kwargs):
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.01)
+        try:
+            return answer_quiz(*args, **kwargs)
+        finally:
+            active.pop()
+
+    monkeypatch.setattr(engine, "answer_quiz", slow_answer)
+    threads = [threading.Thread(target=web.app.test_client().post, args=("/api/quiz",),
+                                kwargs={"json": {"topic": "ratio", "answer": ""}})
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1 and len(overlaps) == 6
+    assert web.get_store().load(web.DEFAULT_STUDENT_ID)["mistakes"]["ratio"] == 6
+
+
+def test_baseline_rejects_unknown_topics(client):
+    import content
+
+    student = StudentModel()
+    with pytest.raises(ValueError):
+        engine.apply_baseline(student, {"cells": "a long answer", "no such topic": "x"})
+    assert len(student) == 0 and not student.baseline_done
+
+    interned = len(content.TOPIC_NAMES)
+    junk = {f"junk {i}": "x" for i in range(20000)}
+    resp = client.post("/api/baseline", json={"answers": junk})
+    assert resp.status_code == 400 and len(content.TOPIC_NAMES) == interned
+    assert client.post("/api/baseline", json={"answers": {"cells": 5}}).status_code == 400
+    resp = client.post("/api/baseline", json={"answers": {"cells": "x" * (2 << 20)}})
+    assert resp.status_code == 413 and resp.get_json()["status"] == "error"
+    assert client.post("/api/baseline", json={"answers": {"cells": "x"}}).status_code == 200
+
+
+def test_dashboard_deltas():
+    student = StudentModel()
+    engine.apply_baseline(student, {"cells": "a long answer", "ratio": "?", "force": "?"})
+    full, rows = engine.dashboard_topics(student)
+    assert full and len(rows) == 3
+    version = student.version
+    engine.answer_quiz(student, "ratio", "ratio", now=1000.0)
+    full, rows = engine.dashboard_topics(student, version, now=1000.0)
+    assert not full and [row["topic"] for row in rows] == ["ratio"]
+    assert rows[0]["strength"] == 0.35 and rows[0]["retention"] == 1.0
+    assert engine.dashboard_topics(student, student.version) == (False, [])
+    # Versions the log cannot answer get every row
+    assert engine.dashboard_topics(student, student.version + 5)[0]
+    assert engine.dashboard_topics(student, 0)[0]
+
+    # A new decay rate changes retention across the subject
+    version = student.version
+    student.set_decay_rate(get_pack().subject_ids["biology"], 0.05)
+    assert [row["topic"] for row in engine.dashboard_topics(student, version)[1]] == ["cells"]
+
+
+def test_dashboard_since_route(client):
+    client.post("/api/baseline", json={"answers": {"cells": "basic units of life", "ratio": "?"}})
+    first = client.get("/api/dashboard").get_json()["data"]
+    assert first["full"] and len(first["topics"]) == 2
+
+    client.post("/api/quiz", json={"topic": "ratio", "answer": "a ratio compares"})
+    delta = client.get(f"/api/dashboard?since={first['version']}").get_json()["data"]
+    assert not delta["full"] and [row["topic"] for row in delta["topics"]] == ["ratio"]
+    assert delta["version"] > first["version"] and delta["readiness_score"] == 52
+
+    # After a reset old versions are compacted away
+    client.post("/api/reset")
+    after = client.get(f"/api/dashboard?since={delta['version']}").get_json()["data"]
+    assert after["full"] and after["topics"] == [] and after["version"] > delta["version"]
+
+
+def test_study_plan_generator_matches_full_sort():
+    student = StudentModel()
+    for i, topic in enumerate(get_pack().all_topics()):
+        student.set_strength(topic, 0.3 + 0.1 * (i % 3))       # plenty of ties
+    ranked = sorted(((engine.plan_strength(student, topic, 1000.0), topic)
+                     for topic, _ in student.strength_items()), key=lambda item: item[0])
+    everything = list(engine.iter_study_plan(student, None, now=1000.0))
+    assert [row["topic"] for row in everything] == [topic for _, topic in ranked]
+    for n in (1, 5, len(ranked), len(ranked) + 3):
+        assert engine.study_plan(student, n, now=1000.0) == everything[:n]
+
+    full, rows = engine.iter_dashboard_topics(student, now=1000.0)
+    assert full and iter(rows) is rows
+    assert list(rows) == engine.dashboard_topics(student, now=1000.0)[1]
+
+
+def test_streamed_listings(client, monkeypatch):
+    import json
+    import app as web
+
+    monkeypatch.setattr(web, "STREAM_BATCH", 2)
+    client.post("/api/baseline", json={"answers": {topic: "a long answer here"
+                                                   for topic in get_pack().all_topics()}})
+
+    response = client.get("/api/dashboard?stream=1", buffered=False)
+    assert response.mimetype == "application/x-ndjson"
+    chunks = list(response.response)
+    assert len(chunks) > 2
+    lines = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    header, rows = lines[0], lines[1:]
+    whole = client.get("/api/dashboard").get_json()["data"]
+    assert header["status"] == "success" and header["full"]
+    assert header["version"] == whole["version"] and rows == whole["topics"]
+
+    response = client.get("/api/study-plan?n=0", headers={"Accept": "application/x-ndjson"})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {"status": "success", "count": len(get_pack().all_topics())}
+    plan = client.get("/api/study-plan?n=0").get_json()["data"]
+    assert [row["topic"] for row in lines[1:]] == [row["topic"] for row in plan]
+    assert len(client.get("/api/study-plan").get_json()["data"]) == 5
+
+
+if __name__ == "__main__":
+    test_retention_curve()
+    test_baseline_rules()
+    test_quiz_updates()
+    test_numeric_answers_match_whole_values()
+    test_weakest_topics()
+    for seed in range(20):
+        test_incremental_readiness_matches_recompute(seed)
+    for seed in range(10):
+        test_subject_rollups_match_brute_force(seed)
+    test_topic_subject_index()
+    test_dashboard_deltas()
+    test_study_plan_generator_matches_full_sort()
+    print("✅ All engine tests passed!")
@@ -0,0 +1,163 @@
+"""
+Tests for NEXA AI per-student forgetting-rate fitting
+"""
+
+import math
+import random
+
+import pytest
+
+import engine
+import fitting
+import storage
+from models import HISTORY_LIMIT, StudentModel
+
+
+def history_for(rate, topics, seed=0, gaps=(1, 3, 8, 24, 48)):
+    """Quiz histories whose recall follows exp(-rate * hours)."""
+    rng = random.Random(seed)
+    history = {}
+    for topic in topics:
+        ts, entries = 0.0, [[0.0, 1]]
+        for _ in range(HISTORY_LIMIT - 1):
+            hours = rng.choice(gaps)
+            ts += hours * 3600
+            entries.append([ts, 1 if rng.random() < math.exp(-rate * hours) else 0])
+        history[topic] = entries
+    return history
+
+
+def test_recovers_each_subjects_rate():
+    data = storage.new_student()
+    data["quiz_history"] = {**history_for(0.02, ["algebra", "ratio", "linear equations"]),
+                            **history_for(0.2, ["cells", "photosynthesis", "respiration"], seed=1)}
+    rates = fitting.fit_student(data)
+    assert set(rates) == {"math", "biology"}
+    assert rates["math"] == pytest.approx(0.02, rel=0.35)
+    assert rates["biology"] == pytest.approx(0.2, rel=0.35)
+
+
+def test_sparse_history_keeps_default():
+    data = storage.new_student()
+    data["quiz_history"] = {"force": [[0, 1], [3600, 1], [7200, 0]]}
+    assert fitting.fit_student(data) == {}
+
+
+def test_forgetting_retention_uses_fitted_rate():
+    student = StudentModel()
+    engine.answer_quiz(student, "cells", "cells", now=0.0)
+    now = 10 * 3600
+    assert engine.forgetting_retention(student, "cells", now) == engine.retention(0.0, now)
+
+    data = student.to_dict()
+    data["decay_rates"] = {"biology": 0.01}
+    student = StudentModel.from_dict(data)
+    assert student.decay_rate("cells") == 0.01
+    assert student.decay_rate("force") is None
+    assert engine.forgetting_retention(student, "cells", now) == engine.retention(0.0, now, 0.01)
+    assert StudentModel.from_dict(student.to_dict()).to_dict() == student.to_dict()
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_fit_all_writes_rates(tmp_path, workers):
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    docs = []
+    for i in range(40):
+        data = storage.new_student()
+        data["quiz_history"] = history_for(0.05, ["force", "energy", "motion"], seed=i)
+        docs.append((f"s{i:02d}", data))
+    docs.append(("new", storage.new_student()))
+    store.save_many(docs)
+
+    summary = fitting.fit_all(store, workers=workers, chunk_size=7)
+    assert summary == {"students": 41, "updated": 40}
+    assert "decay_rates" not in store.load("new")
+    assert store.load("s03")["decay_rates"]["physics"] == pytest.approx(0.05, rel=0.5)
+    # A second run finds nothing to change
+    assert fitting.fit_all(store, workers=workers)["updated"] == 0
+    store.close()
+
+
+def test_fit_endpoint_queues_a_job(tmp_path, monkeypatch):
+    import app as web
+
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    data = storage.new_student()
+    data["quiz_history"] = history_for(0.05, ["force", "energy", "motion"])
+    store.save("pat", data)
+    monkeypatch.setattr(storage, "_store", store)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    client = web.app.test_client()
+
+    resp = client.post("/api/admin/fit-decay", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["data"]["id"]
+    web.jobs.wait(job_id, 10)
+    assert web.jobs.get(job_id).result == {"students": 1, "updated": 1}
+    assert "physics" in store.load("pat")["decay_rates"]
+    store.close()
+
+
+def test_fit_keeps_writes_made_after_the_scan(tmp_path):
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    data = storage.new_student()
+    data["quiz_history"] = history_for(0.05, ["force", "energy", "motion"])
+    data["revision"] = "scanned"
+    store.save("pat", data)
+    fitted = fitting.fit_chunk(list(store.iter_students()))
+
+    # A web worker saves an answer while the chunk is being fitted
+    data = store.load("pat")
+    data["mistakes"] = {"force": 1}
+    data["reflections"] = [{"entry": "saved mid-fit", "timestamp": "2024-01-01T00:00:00"}]
+    data["version"] = 3
+    store.save("pat", data)
+
+    assert store.put_many(list(fitting._rows(store, fitted))) == 1
+    stored = store.load("pat")
+    assert stored["mistakes"] == {"force": 1} and len(stored["reflections"]) == 1
+    assert "physics" in stored["decay_rates"]
+    assert stored["version"] == stored["version_floor"] == 4
+    assert stored["revision"] != "scanned"
+    store.close()
+
+
+def test_cached_copies_keep_out_of_band_writes(tmp_path, monkeypatch):
+    import app as web
+
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    monkeypatch.setattr(storage, "_store", store)
+    web._student_cache.clear()
+    student = web.load_cached_student("pat")
+    engine.answer_quiz(student, "cells", "cells", now=0.0)
+    student = web.store_student("pat", student)
+
+    # A fit in another worker writes rates behind this worker's cache
+    data = store.load("pat")
+    data["decay_rates"] = {"biology": 0.1451}
+    data["version"] = data["version_floor"] = data["version"] + 1
+    store.save("pat", data)
+
+    engine.answer_quiz(student, "force", "", now=60.0)
+    saved = web.store_student("pat", student)
+    stored = store.load("pat")
+    assert stored["decay_rates"] == {"biology": 0.1451}
+    assert stored["mistakes"] == {"force": 1} and "cells" in stored["topic_strength"]
+    assert saved.decay_rate("cells") == 0.1451 and web.cached_student("pat") is saved
+
+    # A replacing import wins over everything the cached copy did not change
+    imported = storage.new_student()
+    imported["topic_strength"] = {"ratio": 0.9}
+    store.save("pat", imported)
+    engine.answer_quiz(saved, "ratio", "ratio", now=120.0)
+    web.store_student("pat", saved)
+    assert set(store.load("pat")["topic_strength"]) == {"ratio"}
+    web._student_cache.clear()
+    store.close()
+
+
+if __name__ == "__main__":
+    test_recovers_each_subjects_rate()
+    test_sparse_history_keeps_default()
+    test_forgetting_retention_uses_fitted_rate()
+    print("✅ All fitting tests passed!")
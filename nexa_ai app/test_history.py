@@ -0,0 +1,106 @@
+"""
+Tests for the NEXA AI per-topic study history ring buffer
+"""
+
+import math
+import random
+
+import pytest
+
+import engine
+from history import TopicHistory
+from models import HISTORY_LIMIT, StudentModel
+
+
+def filled(capacity, count, seed=0):
+    rng = random.Random(seed)
+    history, expected = TopicHistory(capacity), []
+    for i in range(count):
+        outcome = rng.random() < 0.6
+        history.append(1000.0 + i * 60.5, outcome)
+        expected.append((1000.0 + i * 60.5, int(outcome)))
+    return history, expected[-capacity:]
+
+
+def as_pairs(history):
+    return [(history.time_at(i), history.outcome_at(i)) for i in range(len(history))]
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 20, 21])
+def test_ring_keeps_newest_in_order(count):
+    history, expected = filled(8, count)
+    assert len(history) == len(expected)
+    assert as_pairs(history) == expected
+    assert history.correct() == sum(o for _, o in expected)
+    if expected:
+        assert history.last_time() == expected[-1][0]
+        assert history.time_at(-1) == expected[-1][0]
+
+
+def test_streak_and_recall():
+    history = TopicHistory(4)
+    assert history.recall() is None and history.streak() == 0
+    for outcome in (1, 0, 1, 1, 1):
+        history.append(0.0, outcome)
+    assert history.streak() == 3
+    assert history.recall() == 0.75
+    history.append(0.0, 0)
+    assert history.streak() == 0
+
+
+@pytest.mark.parametrize("count", [0, 3, 8, 13])
+def test_encode_round_trip(count):
+    history, expected = filled(8, count, seed=count)
+    text = history.encode()
+    assert isinstance(text, str)
+    assert as_pairs(TopicHistory.decode(text, 8)) == expected
+    # Shrinking the capacity keeps the newest entries
+    assert as_pairs(TopicHistory.decode(text, 3)) == expected[-3:]
+    # Histories saved as plain [timestamp, outcome] lists still load
+    assert as_pairs(TopicHistory.decode([list(p) for p in expected], 8)) == expected
+
+
+def test_encoding_is_compact():
+    history, _ = filled(HISTORY_LIMIT, 100)
+    as_json_lists = len(str([[1700000000.123456, 1]] * HISTORY_LIMIT))
+    assert len(history.encode()) < as_json_lists / 2
+
+
+def test_student_history_round_trips():
+    student = StudentModel()
+    for i in range(HISTORY_LIMIT + 10):
+        engine.answer_quiz(student, "ratio", "ratio" if i % 2 else "", now=float(i))
+    history = student.topic_history("ratio")
+    assert len(history) == HISTORY_LIMIT
+    assert (history.time_at(0), history.outcome_at(0)) == (10.0, 0)
+    assert student.topic_history("cells") is None
+
+    data = student.to_dict()
+    assert isinstance(data["quiz_history"]["ratio"], str)
+    copy = StudentModel.from_dict(data)
+    assert as_pairs(copy.topic_history("ratio")) == as_pairs(history)
+    assert copy.to_dict() == data
+
+
+def test_next_review_stretches_with_streak():
+    student = StudentModel()
+    assert engine.next_review(student, "force") is None
+    engine.answer_quiz(student, "force", "", now=0.0)
+    base = -math.log(engine.REVIEW_RETENTION) / engine.DECAY_RATE * 3600
+    assert engine.next_review(student, "force") == pytest.approx(base)
+    for i in range(1, 3):
+        engine.answer_quiz(student, "force", "force", now=float(i))
+    assert engine.next_review(student, "force") == pytest.approx(2.0 + 4 * base)
+    assert engine.recent_recall(student, "force") == pytest.approx(2 / 3)
+
+
+if __name__ == "__main__":
+    for count in (0, 1, 7, 8, 9, 20, 21):
+        test_ring_keeps_newest_in_order(count)
+    test_streak_and_recall()
+    for count in (0, 3, 8, 13):
+        test_encode_round_trip(count)
+    test_encoding_is_compact()
+    test_student_history_round_trips()
+    test_next_review_stretches_with_streak()
+    print("✅ All history tests passed!")
@@ -0,0 +1,164 @@
+"""
+Tests for the NEXA AI background job queue
+"""
+
+import threading
+
+import pytest
+
+import jobs
+
+
+def make_queue(**kwargs):
+    gate = threading.Event()
+
+    def blocked(job, steps=3):
+        for step in range(steps):
+            gate.wait(5)
+            job.progress({"step": step + 1})
+        return {"steps": steps}
+
+    def broken(job):
+        raise RuntimeError("boom")
+
+    queue = jobs.JobQueue(types={"blocked": blocked, "broken": broken}, **kwargs)
+    return queue, gate
+
+
+def test_job_runs_and_reports_result():
+    queue, gate = make_queue()
+    job = queue.submit("blocked", {"steps": 2})
+    gate.set()
+    queue.wait(job.id, 5)
+    assert job.state == jobs.DONE
+    assert job.result == {"steps": 2} and job.progress_info == {"step": 2}
+    assert job.started >= job.created and job.finished >= job.started
+    assert queue.get(job.id).to_dict()["state"] == "done"
+    queue.shutdown()
+
+
+def test_failed_and_unknown_jobs():
+    queue, _ = make_queue()
+    job = queue.submit("broken")
+    queue.wait(job.id, 5)
+    assert job.state == jobs.FAILED and job.error == "boom"
+    with pytest.raises(ValueError):
+        queue.submit("nope")
+    queue.shutdown()
+
+
+def test_backpressure_when_queue_is_full():
+    queue, gate = make_queue(workers=1, max_pending=2)
+    running = queue.submit("blocked")
+    while running.state != jobs.RUNNING:
+        pass
+    waiting = [queue.submit("blocked"), queue.submit("blocked")]
+    with pytest.raises(jobs.QueueFull):
+        queue.submit("blocked")
+    gate.set()
+    for job in [running] + waiting:
+        queue.wait(job.id, 5)
+    assert all(job.state == jobs.DONE for job in [running] + waiting)
+    queue.shutdown()
+
+
+def test_cancel_queued_and_running_jobs():
+    queue, gate = make_queue(workers=1)
+    running = queue.submit("blocked")
+    queued = queue.submit("blocked")
+    while running.state != jobs.RUNNING:
+        pass
+    assert queue.cancel(queued.id).state == jobs.CANCELLED
+    queue.cancel(running.id)
+    gate.set()
+    queue.wait(running.id, 5)
+    assert running.state == jobs.CANCELLED and running.result is None
+    assert running.progress_info == {"step": 1}
+    assert queue.cancel("missing") is None
+    queue.shutdown()
+
+
+def test_finished_jobs_are_forgotten():
+    queue, gate = make_queue(keep=2)
+    gate.set()
+    done = []
+    for _ in range(4):
+        done.append(queue.submit("blocked", {"steps": 1}))
+        queue.wait(done[-1].id, 5)
+    queue.submit("blocked", {"steps": 1})
+    assert queue.get(done[0].id) is None and queue.get(done[1].id) is None
+    assert queue.get(done[3].id) is not None
+    queue.shutdown()
+
+
+def test_jobs_api_export_then_import(tmp_path, monkeypatch):
+    import app as web
+    import storage
+    from models import StudentModel
+
+    source = storage.SQLiteStore(str(tmp_path / "source.db"))
+    for i in range(5):
+        student = StudentModel(f"student {i}")
+        student.set_strength("cells", i / 10)
+        source.save(f"s{i}", student.to_dict())
+    monkeypatch.setattr(storage, "_store", source)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    monkeypatch.setitem(web.app.config, "JOBS_DIR", str(tmp_path / "jobs"))
+    client = web.app.test_client()
+    headers = {"X-Admin-Token": "secret"}
+
+    assert client.post("/api/jobs", json={"type": "export"}).status_code == 403
+    resp = client.post("/api/jobs", headers=headers,
+                       json={"type": "export", "params": {"file": "students.ndjson"}})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["data"]["id"]
+    assert resp.headers["Location"] == f"/api/jobs/{job_id}"
+    web.jobs.wait(job_id, 10)
+    data = client.get(f"/api/jobs/{job_id}", headers=headers).get_json()["data"]
+    assert data["state"] == "done" and data["result"]["exported"] == 5
+
+    target = storage.SQLiteStore(str(tmp_path / "target.db"))
+    monkeypatch.setattr(storage, "_store", target)
+    resp = client.post("/api/jobs", headers=headers,
+                       json={"type": "import", "params": {"file": "students.ndjson"}})
+    job_id = resp.get_json()["data"]["id"]
+    web.jobs.wait(job_id, 10)
+    data = client.get(f"/api/jobs/{job_id}", headers=headers).get_json()["data"]
+    assert data["result"]["imported"] == 5
+    assert target.load("s3")["username"] == "student 3"
+
+    listed = client.get("/api/jobs", headers=headers).get_json()["data"]
+    assert [job["id"] for job in listed][0] == job_id
+
+    resp = client.post("/api/jobs", headers=headers,
+                       json={"type": "export", "params": {"file": "../escape.ndjson"}})
+    job_id = resp.get_json()["data"]["id"]
+    web.jobs.wait(job_id, 10)
+    assert web.jobs.get(job_id).state == jobs.FAILED
+    assert not (tmp_path / "escape.ndjson").exists()
+
+    assert client.post("/api/jobs", headers=headers, json={"type": "nope"}).status_code == 400
+    assert client.get("/api/jobs/missing", headers=headers).status_code == 404
+    source.close()
+    target.close()
+
+
+def test_jobs_api_backpressure(monkeypatch):
+    import app as web
+
+    queue, gate = make_queue(workers=1, max_pending=0)
+    monkeypatch.setattr(web, "jobs", queue)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    resp = web.app.test_client().post("/api/jobs", headers={"X-Admin-Token": "secret"},
+                                      json={"type": "blocked"})
+    assert resp.status_code == 503 and resp.headers["Retry-After"]
+    queue.shutdown()
+
+
+if __name__ == "__main__":
+    test_job_runs_and_reports_result()
+    test_failed_and_unknown_jobs()
+    test_backpressure_when_queue_is_full()
+    test_cancel_queued_and_running_jobs()
+    test_finished_jobs_are_forgotten()
+    print("✅ All job queue tests passed!")
@@ -0,0 +1,118 @@
+"""
+Tests for the NEXA AI memory accounting
+"""
+
+import pytest
+
+import engine
+import memory
+from models import StudentModel
+
+
+def make_student(reflections=0):
+    student = StudentModel()
+    for topic in ("cells", "ratio", "force"):
+        student.set_strength(topic, 0.5)
+    for i in range(reflections):
+        engine.add_reflection(student, f"Reflection number {i} " * 10)
+    return student
+
+
+def test_nbytes_grows_with_reflections():
+    small, large = make_student(), make_student(reflections=50)
+    assert large.nbytes() - small.nbytes() > 50 * 200
+    assert memory.deep_sizeof({"a": [1, 2, "three"]}) > 0
+
+
+def test_cache_is_lru():
+    cache = memory.StudentCache(max_entries=2)
+    for name in ("a", "b"):
+        cache.put(name, make_student())
+    assert cache.get("a") is not None      # "b" is now least recently used
+    cache.put("c", make_student())
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.evictions == 1
+    with pytest.raises(KeyError):
+        cache["b"]
+
+
+def test_cache_keeps_under_byte_budget():
+    size = make_student().nbytes()
+    cache = memory.StudentCache(max_bytes=size * 3)
+    for i in range(10):
+        cache.put(f"s{i}", make_student())
+    assert len(cache) == 3
+    assert cache.nbytes() == 3 * size
+    assert [sid for sid, _ in cache.sizes()] == ["s7", "s8", "s9"]
+
+    # Re-putting a grown student updates its size
+    grown = cache["s9"]
+    for i in range(20):
+        engine.add_reflection(grown, "more")
+    cache.put("s9", grown)
+    assert cache.sizes()[0] == ("s9", grown.nbytes())
+    # Larger than the whole budget: everyone else goes, the student just saved stays
+    assert len(cache) == 1 and cache.nbytes() == grown.nbytes()
+
+    cache.shrink(0)
+    assert len(cache) == 0 and cache.nbytes() == 0
+
+
+def test_rss_budget_halves_the_cache():
+    cache = memory.StudentCache()
+    for i in range(8):
+        cache.put(f"s{i}", make_student())
+    monitor = memory.MemoryMonitor(cache, rss_budget=1, check_every=2)
+    assert monitor.tick() is False
+    assert monitor.tick() is True
+    assert len(cache) == 4 and monitor.over_budget == 1
+    assert memory.rss_bytes() > 0
+
+
+def test_snapshots_diff():
+    snapshots = memory.Snapshots()
+    try:
+        first = snapshots.take()
+        assert snapshots.tracing and first["snapshot"] == 1
+        hoard = [bytearray(1024) for _ in range(2000)]
+        second = snapshots.take(limit=5)
+        assert second["snapshot"] == 2
+        assert second["top"][0]["size_diff"] >= 1024 * 2000
+        assert second["top"][0]["file"] == __file__
+        del hoard
+    finally:
+        snapshots.stop()
+    assert not snapshots.tracing
+
+
+def test_admin_memory_endpoints(client, monkeypatch):
+    import app as web
+
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    client.post("/api/baseline", json={"answers": {"cells": "cells"}})
+    headers = {"X-Admin-Token": "secret"}
+
+    assert client.get("/api/admin/memory").status_code == 403
+    report = client.get("/api/admin/memory", headers=headers).get_json()["data"]
+    assert report["students"]["cached"] == 1
+    assert report["students"]["largest"][0]["id"] == web.DEFAULT_STUDENT_ID
+    assert report["subsystems"]["student_cache"] == report["students"]["bytes"] > 0
+    assert "compression_cache" in report["subsystems"]
+
+    try:
+        data = client.post("/api/admin/memory/snapshot", headers=headers).get_json()["data"]
+        assert data["snapshot"] == 1
+        data = client.post("/api/admin/memory/snapshot?limit=3", headers=headers).get_json()["data"]
+        assert data["snapshot"] == 2 and len(data["top"]) <= 3
+    finally:
+        resp = client.delete("/api/admin/memory/snapshot", headers=headers)
+    assert resp.get_json()["tracing"] is False
+
+
+if __name__ == "__main__":
+    test_nbytes_grows_with_reflections()
+    test_cache_is_lru()
+    test_cache_keeps_under_byte_budget()
+    test_rss_budget_halves_the_cache()
+    test_snapshots_diff()
+    print("✅ All memory tests passed!")
@@ -0,0 +1,82 @@
+"""
+Tests for the NEXA AI StudentModel
+"""
+
+import json
+import os
+
+from models import StudentModel
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_round_trip_sample_data():
+    with open(os.path.join(HERE, "nexa-ai-student-data.json")) as f:
+        data = json.load(f)
+    model = StudentModel.from_dict(data)
+    assert model.to_dict() == data
+    assert "username" not in model.to_dict()
+
+
+def test_round_trip_unknown_topics_and_extra_keys():
+    data = {
+        "username": "Amina",
+        "baseline_done": True,
+        "topic_strength": {"cells": 0.7, "volcanoes": 0.3},
+        "mistakes": {"volcanoes": 2, "cells": 0},
+        "study_log": {"magnetism": 1770593096.5},
+        "reflections": ["ratio was hard", {"entry": "cells", "timestamp": "2026-02-08T10:00:00"}],
+        "class_id": "9B",
+    }
+    model = StudentModel.from_dict(data)
+    # Plain-string reflections from early versions come back as entries
+    assert model.to_dict() == dict(data, reflections=[{"entry": "ratio was hard"},
+                                                       data["reflections"][1]])
+    assert StudentModel.from_dict(model.to_dict()).to_dict() == model.to_dict()
+    assert model.get_strength("volcanoes") == 0.3
+    assert model.get_strength("magnetism") is None
+    assert model.get_mistakes("cells") == 0
+    assert model.last_studied("magnetism") == 1770593096.5
+
+
+def test_column_updates():
+    model = StudentModel()
+    model.set_strength("algebra", 0.5)
+    model.add_mistake("algebra")
+    model.add_mistake("algebra")
+    model.mark_studied("algebra", 100.0)
+    assert model.topics() == ["algebra"]
+    assert len(model) == 1
+    assert model.to_dict()["mistakes"] == {"algebra": 2}
+    assert model.to_dict()["study_log"] == {"algebra": 100.0}
+    assert not model.has_topic("ratio")
+
+
+def test_versions_and_compaction():
+    model = StudentModel()
+    model.set_strength("cells", 0.5)
+    model.set_strength("ratio", 0.5)
+    model.add_mistake("cells")
+    assert model.version == 3 and model.changed_since(2) == [model._existing("cells")]
+    assert model.can_diff(1) and not model.can_diff(0) and not model.can_diff(4)
+
+    assert model.compact(10) == 11
+    assert not model.can_diff(3) and model.can_diff(11)
+    model.set_strength("ratio", 0.6)
+    copy = StudentModel.from_dict(json.loads(json.dumps(model.to_dict())))
+    assert (copy.version, copy.floor) == (12, 11)
+    assert copy.changed_since(11) == [copy._existing("ratio")]
+
+
+def test_slots_prevent_attribute_dicts():
+    model = StudentModel()
+    assert not hasattr(model, "__dict__")
+
+
+if __name__ == "__main__":
+    test_round_trip_sample_data()
+    test_round_trip_unknown_topics_and_extra_keys()
+    test_column_updates()
+    test_versions_and_compaction()
+    test_slots_prevent_attribute_dicts()
+    print("✅ All model tests passed!")
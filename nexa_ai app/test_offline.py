@@ -0,0 +1,86 @@
+"""
+Tests for the NEXA AI offline web client support
+"""
+
+import pytest
+
+import app as web
+
+
+@pytest.fixture
+def client(client):
+    client.post("/api/baseline", json={"answers": {"cells": "a long answer", "force": "no"}})
+    return client
+
+
+def test_service_worker_is_served_from_the_root(client):
+    response = client.get("/sw.js")
+    assert response.status_code == 200
+    assert "javascript" in response.content_type
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert b"/api/replay" in response.data
+
+
+def test_offline_pack_is_conditional(client):
+    response = client.get("/api/offline-pack")
+    data = response.get_json()
+    assert "force" in data["explanations"] and data["topics"]
+    again = client.get("/api/offline-pack", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_replay_applies_operations_in_order(client, monkeypatch):
+    saves = []
+    save = web.store_student
+    monkeypatch.setattr(web, "store_student", lambda *args: (saves.append(args[0]), save(*args)))
+    before = client.get("/api/student-info").get_json()["data"]["readiness_score"]
+    ops = [
+        {"id": "a1", "type": "quiz", "ts": 1, "topic": "force", "answer": "force"},
+        {"id": "a2", "type": "quiz", "ts": 2, "topic": "force", "answer": "force"},
+        {"id": "a3", "type": "reflection", "ts": 3, "entry": "Force makes sense now"},
+        {"id": "a4", "type": "quiz", "topic": "no such topic", "answer": "x"},
+        {"id": "a5", "type": "dance"},
+    ]
+    data = client.post("/api/replay", json={"ops": ops}).get_json()
+    assert data["applied"] == 3
+    assert [r["status"] for r in data["results"]] == ["applied"] * 3 + ["rejected"] * 2
+    assert data["results"][0]["correct"] is True
+    assert len(saves) == 1
+    after = client.get("/api/student-info").get_json()["data"]["readiness_score"]
+    assert after > before
+
+    # A batch resent after a lost response changes nothing
+    saves.clear()
+    data = client.post("/api/replay", json={"ops": ops[:3]}).get_json()
+    assert data["applied"] == 0 and {r["status"] for r in data["results"]} == {"duplicate"}
+    assert saves == []
+
+
+def test_replay_dedupes_across_workers_and_restarts(client):
+    stale = web.StudentModel.from_dict(web.get_store().load(web.DEFAULT_STUDENT_ID))
+    ops = [{"id": "m1", "type": "quiz", "ts": 1, "topic": "cells", "answer": ""}]
+    assert client.post("/api/replay", json={"ops": ops}).get_json()["applied"] == 1
+    stored = web.get_store().load(web.DEFAULT_STUDENT_ID)
+    assert stored["replayed_ops"] == ["m1"]
+    mistakes = stored["mistakes"]["cells"]
+
+    # A restarted worker, then a worker still caching the record from before the batch
+    web._student_cache.clear()
+    assert client.post("/api/replay", json={"ops": ops}).get_json()["applied"] == 0
+    web._student_cache.put(web.DEFAULT_STUDENT_ID, stale)
+    data = client.post("/api/replay", json={"ops": ops}).get_json()
+    assert data["applied"] == 0 and data["results"][0]["status"] == "duplicate"
+    assert web.get_store().load(web.DEFAULT_STUDENT_ID)["mistakes"]["cells"] == mistakes
+
+
+def test_replay_rejects_bad_batches(client):
+    assert client.post("/api/replay", json={}).status_code == 400
+    ops = [{"id": str(i), "type": "reflection", "entry": "x"}
+           for i in range(web.REPLAY_BATCH + 1)]
+    assert client.post("/api/replay", json={"ops": ops}).status_code == 400
+    data = client.post("/api/replay", json={"ops": ["nope"]}).get_json()
+    assert data["results"][0]["status"] == "rejected"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,96 @@
+"""
+Tests for the NEXA AI weighted exam predictor
+"""
+
+import math
+
+import content
+import engine
+import predictor
+from models import StudentModel
+
+HOUR = 3600.0
+
+
+def make_student():
+    student = StudentModel()
+    for topic, strength in {"cells": 0.4, "ratio": 0.4, "force": 0.9, "energy": 0.6}.items():
+        student.set_strength(topic, strength)
+    return student
+
+
+def test_scores_combine_weakness_mistakes_and_forgetting():
+    student = make_student()
+    student.add_mistake("ratio", 2)
+    student.mark_studied("cells", 0.0)
+    now = 10 * HOUR
+    scores = dict(predictor.ranking(student, now))
+
+    forgotten = 1 - math.exp(-engine.DECAY_RATE * 10)
+    assert scores["cells"] == round(0.5 * 0.6 + 0.2 * forgotten, 3)
+    assert scores["ratio"] == round(0.5 * 0.6 + 0.3 * 2 / 5, 3)
+    assert scores["force"] == round(0.5 * 0.1, 3)
+    assert predictor.predict(student, 2, now) == ["cells", "ratio"]
+
+
+def test_exam_weights_from_content_pack(monkeypatch):
+    pack = content.ContentPack(content.SUBJECT_TOPICS, {}, {"force": 10.0})
+    monkeypatch.setattr(content, "_pack", pack)
+    assert pack.weight_for(content.topic_id("force")) == 10.0
+    assert pack.weight_for(content.topic_id("cells")) == 1.0
+    assert predictor.predict(make_student(), 1, now=0.0) == ["force"]
+
+
+def test_cached_until_the_student_changes():
+    student = make_student()
+    first = predictor.ranking(student, now=1000.0)
+    assert predictor.ranking(student, now=1010.0) is first
+
+    engine.answer_quiz(student, "force", "", now=1020.0)
+    second = predictor.ranking(student, now=1020.0)
+    assert second is not first
+    assert dict(second)["force"] > dict(first)["force"]
+
+
+def test_cache_expires_with_time_and_pack(monkeypatch):
+    student = make_student()
+    first = predictor.ranking(student, now=0.0)
+    assert predictor.ranking(student, now=predictor.RETENTION_BUCKET + 1) is not first
+
+    second = predictor.ranking(student, now=0.0)
+    monkeypatch.setattr(content, "_pack", content.ContentPack(content.SUBJECT_TOPICS, {}))
+    assert predictor.ranking(student, now=0.0) is not second
+
+
+def test_predict_many():
+    students = [(f"s{i}", make_student()) for i in range(5)]
+    students[3][1].set_strength("force", 0.0)
+    students[0][1].set_strength("ratio", 0.45)   # no tie with cells
+    results = dict(predictor.predict_many(students, n=1, now=0.0))
+    assert [topic for topic, _ in results["s3"]] == ["force"]
+    assert [topic for topic, _ in results["s0"]] == ["cells"]
+
+
+def test_admin_bulk_endpoint(tmp_path, monkeypatch):
+    import app as web
+    import storage
+
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    store.save_many((f"s{i}", make_student().to_dict()) for i in range(3))
+    monkeypatch.setattr(storage, "_store", store)
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+
+    resp = web.app.test_client().get("/api/admin/exam-predictions?n=2",
+                                     headers={"X-Admin-Token": "secret"})
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [web.app.json.loads(line) for line in resp.data.splitlines()]
+    assert [line["id"] for line in lines] == ["s0", "s1", "s2"]
+    assert len(lines[0]["topics"]) == 2
+    store.close()
+
+
+if __name__ == "__main__":
+    test_scores_combine_weakness_mistakes_and_forgetting()
+    test_cached_until_the_student_changes()
+    test_predict_many()
+    print("✅ All predictor tests passed!")
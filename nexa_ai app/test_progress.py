@@ -0,0 +1,121 @@
+"""
+Tests for the NEXA AI readiness history
+"""
+
+import json
+import math
+
+import pytest
+
+import engine
+import progress
+from models import StudentModel
+from progress import DAY, HOUR, ProgressSeries
+
+T0 = 1767225600.0        # a UTC midnight
+
+
+def fill(series, hours, every=600, start=T0):
+    """A sample every ``every`` seconds with readiness rising by one per sample."""
+    count = int(hours * HOUR // every)
+    for i in range(count):
+        series.record(start + i * every, i % 101, [i / count, math.nan])
+    return count
+
+
+def test_tiers_stay_bounded():
+    series = ProgressSeries(["math", "biology"])
+    fill(series, 30 * 24)
+    assert len(series.raw) == progress.RAW_WINDOW // 600 + 1
+    assert len(series.hourly) == progress.HOURLY_RETENTION // HOUR + 1
+    assert len(series.daily) == 30
+    series.record(T0 + 500 * DAY, 1, [0.5, 0.5])
+    assert len(series.daily) <= progress.DAILY_RETENTION // DAY + 1
+    assert series.daily[0][0] >= T0 + 100 * DAY
+
+
+def test_buckets_aggregate_samples():
+    series = ProgressSeries(["math"])
+    for i, readiness in enumerate([40, 60, 50, 70]):
+        series.record(T0 + i * 900, readiness, [readiness / 100])
+    _, points = series.query(T0, T0 + HOUR, "hour")
+    assert points == [{"t": T0, "readiness": 55.0, "min": 40.0, "max": 70.0, "last": 70.0,
+                       "samples": 4, "subjects": {"math": 0.7}}]
+    # Nothing changed: no new sample
+    assert series.record(T0 + 3700, 70, [0.7]) is False
+
+
+def test_query_picks_the_covering_tier():
+    series = ProgressSeries(["math", "biology"])
+    fill(series, 10 * 24)
+    end = T0 + 10 * DAY
+    resolution, points = series.query(end - 3 * HOUR, end)
+    assert resolution == "raw" and len(points) == 18
+    assert points[0]["subjects"]["biology"] is None
+    resolution, points = series.query(end - 2 * DAY, end)
+    assert resolution == "hour" and len(points) == 48
+    resolution, points = series.query(end - 30 * DAY, end)
+    assert resolution == "day" and len(points) == 10
+    assert all(p["samples"] == 144 for p in points)
+
+
+def test_encoding_round_trip_and_new_subjects():
+    series = ProgressSeries(["math", "biology"])
+    fill(series, 50)
+    copy = ProgressSeries.decode(json.loads(json.dumps(series.encode())))
+    assert copy.encode() == series.encode()
+    assert copy.query(T0, T0 + DAY, "hour")[1][:3] == series.query(T0, T0 + DAY, "hour")[1][:3]
+
+    copy.relayout(["physics", "math"])
+    point = copy.query(T0, T0 + DAY, "day")[1][0]
+    assert point["subjects"]["physics"] is None
+    assert point["subjects"]["math"] == series.query(T0, T0 + DAY, "day")[1][0]["subjects"]["math"]
+
+
+def test_parse_range():
+    assert progress.parse_range("6h") == 6 * HOUR
+    assert progress.parse_range("2w") == 14 * DAY
+    assert progress.parse_range("all") == progress.DAILY_RETENTION
+    assert progress.parse_range(None) == 7 * DAY
+    for bad in ("x", "-1d", "5y"):
+        with pytest.raises(ValueError):
+            progress.parse_range(bad)
+
+
+def test_student_records_readiness():
+    student = StudentModel()
+    engine.apply_baseline(student, {"cells": "long answer", "ratio": "no"})
+    assert progress.record(student, now=T0)
+    engine.answer_quiz(student, "ratio", "ratio", now=T0 + 60)
+    assert progress.record(student, now=T0 + 60)
+    _, points = progress.history(student, HOUR, now=T0 + 120)
+    assert [p["readiness"] for p in points] == [50, engine.readiness_score(student)]
+    assert points[-1]["subjects"]["biology"] == 0.7
+
+    copy = StudentModel.from_dict(json.loads(json.dumps(student.to_dict())))
+    assert progress.history(copy, HOUR, now=T0 + 120)[1] == points
+    assert progress.history(StudentModel(), DAY) == ("hour", [])
+
+
+def test_progress_api(client):
+    client.post("/api/baseline", json={"answers": {"cells": "a long answer", "force": "no"}})
+    client.post("/api/quiz", json={"topic": "force", "answer": "force"})
+
+    data = client.get("/api/progress?range=6h").get_json()["data"]
+    assert data["resolution"] == "raw" and len(data["points"]) == 2
+    assert data["points"][-1]["readiness"] == client.get("/api/dashboard").get_json()[
+        "data"]["readiness_score"]
+    data = client.get("/api/progress?range=30d").get_json()["data"]
+    assert data["resolution"] == "day" and data["points"][0]["samples"] == 2
+    assert client.get("/api/progress?range=nope").status_code == 400
+    assert client.get("/api/progress?resolution=minute").status_code == 400
+
+
+if __name__ == "__main__":
+    test_tiers_stay_bounded()
+    test_buckets_aggregate_samples()
+    test_query_picks_the_covering_tier()
+    test_encoding_round_trip_and_new_subjects()
+    test_parse_range()
+    test_student_records_readiness()
+    print("✅ All progress history tests passed!")
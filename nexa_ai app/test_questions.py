@@ -0,0 +1,141 @@
+"""
+Tests for the NEXA AI question bank
+"""
+
+import json
+import random
+import time
+
+import content
+import engine
+import questions
+from models import StudentModel
+
+
+def make_bank(per_pool=10, topics=("cells", "ratio"), difficulties=(1, 2, 3)):
+    return questions.QuestionBank(
+        {"topic": t, "difficulty": d, "prompt": f"{t} {d} #{i}", "keywords": [f"k{i}"]}
+        for t in topics for d in difficulties for i in range(per_pool))
+
+
+def test_index_by_topic_and_difficulty():
+    bank = make_bank(per_pool=4, difficulties=(1, 3))
+    assert len(bank) == 16
+    assert bank.difficulties("cells") == [1, 3]
+    assert bank.difficulties("force") == []
+    assert [bank.prompts[q] for q in bank.pool("ratio", 3)] == [f"ratio 3 #{i}" for i in range(4)]
+
+
+def test_draws_without_replacement_then_new_cycle():
+    bank, student, rng = make_bank(), StudentModel(), random.Random(3)
+    first = [questions.draw(student, "cells", 2, rng, bank).qid for _ in range(10)]
+    assert sorted(first) == sorted(bank.pool("cells", 2))
+    assert all(questions.has_seen(student, qid, bank) for qid in first)
+
+    second = [questions.draw(student, "cells", 2, rng, bank).qid for _ in range(10)]
+    assert sorted(second) == sorted(first)
+    assert first != second
+
+
+def test_difficulty_follows_strength():
+    bank, student = make_bank(difficulties=(1, 3)), StudentModel()
+    student.set_strength("cells", 0.2)
+    assert questions.draw(student, "cells", bank=bank).difficulty == 1
+    student.set_strength("cells", 0.9)
+    assert questions.draw(student, "cells", bank=bank).difficulty == 3
+    # No difficulty 2 questions: the nearest easier one is used
+    student.set_strength("cells", 0.5)
+    assert questions.draw(student, "cells", bank=bank).difficulty == 1
+    assert questions.draw(student, "force", bank=bank) is None
+
+
+def test_draw_state_persists():
+    bank, student, rng = make_bank(), StudentModel(), random.Random(5)
+    drawn = {questions.draw(student, "ratio", 1, rng, bank).qid for _ in range(6)}
+
+    copy = StudentModel.from_dict(json.loads(json.dumps(student.to_dict())))
+    rest = {questions.draw(copy, "ratio", 1, rng, bank).qid for _ in range(4)}
+    assert drawn | rest == set(bank.pool("ratio", 1))
+
+
+def test_changed_bank_resets_state():
+    student = StudentModel()
+    bank = make_bank()
+    qid = questions.draw(student, "cells", 1, random.Random(1), bank).qid
+    other = make_bank(per_pool=11)
+    assert not questions.has_seen(student, qid, other)
+
+
+def test_large_bank_draws_stay_constant_time():
+    bank = questions.QuestionBank(
+        {"topic": "cells", "difficulty": 1, "prompt": f"q{i}"} for i in range(100000))
+    student, rng = StudentModel(), random.Random(9)
+    start = time.perf_counter()
+    drawn = {questions.draw(student, "cells", 1, rng, bank).qid for _ in range(5000)}
+    elapsed = time.perf_counter() - start
+    assert len(drawn) == 5000
+    assert elapsed < 1.0
+    pool = student.questions.pools[(content.topic_id("cells"), 1)]
+    assert len(pool.swaps) <= 5000
+
+
+def test_pack_loads_questions_from_ndjson(tmp_path, monkeypatch):
+    with open(tmp_path / "questions.ndjson", "w") as f:
+        for i in range(3):
+            f.write(json.dumps({"topic": "force", "difficulty": 2, "prompt": f"Force {i}?",
+                                "keywords": ["newton"]}) + "\n")
+    (tmp_path / "pack.json").write_text(json.dumps(
+        {"subjects": {"physics": ["force"]}, "questions": "questions.ndjson"}))
+    monkeypatch.setattr(content, "_pack", content.load_pack(str(tmp_path / "pack.json")))
+    bank = questions.get_bank()
+    assert len(bank) == 3 and questions.get_bank() is bank
+    assert bank.question(0).keywords == ("newton",)
+
+
+def test_keywords_mark_answers():
+    student = StudentModel()
+    assert engine.answer_quiz(student, "force", "it is measured in Newtons", keywords=("newton",))
+    assert not engine.answer_quiz(student, "force", "a force", keywords=("newton",))
+    assert engine.answer_quiz(student, "force", "a force")
+
+
+def test_quiz_api_uses_the_bank(client):
+    client.post("/api/baseline", json={"answers": {"force": "push or pull"}})
+
+    resp = client.get("/api/quiz/question?topic=force")
+    question = resp.get_json()["data"]
+    assert question["topic"] == "force" and question["id"] is not None
+    assert question["prompt"] in [q[2] for q in content.QUIZ_QUESTIONS]
+
+    keywords = questions.get_bank().question(question["id"]).keywords
+    resp = client.post("/api/quiz", json={"question_id": question["id"], "answer": keywords[0]})
+    assert resp.get_json()["correct"] is True
+    assert client.post("/api/quiz", json={"question_id": 10 ** 9, "answer": "x"}).status_code == 400
+
+
+def test_drawing_does_not_write(client, tmp_path):
+    import app as web
+    import storage
+
+    client.post("/api/baseline", json={"answers": {"force": "push or pull"}})
+    saved = (tmp_path / "student.json").read_bytes()
+
+    for _ in range(3):
+        assert client.get("/api/quiz/question?topic=force").get_json()["data"]["id"] is not None
+    assert (tmp_path / "student.json").read_bytes() == saved
+    assert web._student_cache.get(web.DEFAULT_STUDENT_ID).questions.pools
+
+    client.post("/api/quiz", json={"topic": "force", "answer": "push"})
+    stored = storage.get_store().load(web.DEFAULT_STUDENT_ID)
+    assert stored["question_state"]["pools"]
+
+
+if __name__ == "__main__":
+    test_index_by_topic_and_difficulty()
+    test_draws_without_replacement_then_new_cycle()
+    test_difficulty_follows_strength()
+    test_draw_state_persists()
+    test_changed_bank_resets_state()
+    test_large_bank_draws_stay_constant_time()
+    test_keywords_mark_answers()
+    print("✅ All question bank tests passed!")
@@ -0,0 +1,140 @@
+"""
+Tests for NEXA AI per-session and per-IP rate limiting
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+import ratelimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.config.update(config)
+
+    @app.route("/api/quiz", methods=["POST"])
+    def api_quiz():
+        return jsonify({"status": "success"})
+
+    @app.route("/api/topics")
+    def api_topics():
+        return jsonify({"status": "success"})
+
+    limiter = ratelimit.init_rate_limits(app)
+    return app, limiter
+
+
+def test_parse_rate():
+    assert ratelimit.parse_rate("30/minute") == (30, 0.5)
+    assert ratelimit.parse_rate("10/seconds") == (10, 10)
+    assert ratelimit.parse_rate("6/30") == (6, 0.2)
+    assert ratelimit.parse_limits("api_quiz=5/hour, api_sync=1/second") == \
+        {"api_quiz": "5/hour", "api_sync": "1/second"}
+    for bad in ("fast", "0/minute", "5/fortnight"):
+        with pytest.raises(ValueError):
+            ratelimit.parse_rate(bad)
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    buckets = ratelimit.MemoryBuckets(clock=clock)
+    assert all(buckets.take("k", 3, 0.5)[0] for _ in range(3))
+    allowed, retry = buckets.take("k", 3, 0.5)
+    assert not allowed and retry == pytest.approx(2.0)
+    clock.now += 2
+    assert buckets.take("k", 3, 0.5)[0]
+    clock.now += 3600
+    assert all(buckets.take("k", 3, 0.5)[0] for _ in range(3))
+
+
+def test_memory_buckets_are_bounded():
+    buckets = ratelimit.MemoryBuckets(max_keys=10)
+    for i in range(50):
+        buckets.take(f"client-{i}", 5, 1)
+    assert len(buckets) == 10
+
+
+def test_sqlite_buckets_shared_between_workers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "ratelimit.db")
+    first = ratelimit.SQLiteBuckets(path, clock=clock)
+    second = ratelimit.SQLiteBuckets(path, clock=clock)
+    assert first.take("k", 2, 1)[0]
+    assert second.take("k", 2, 1)[0]
+    assert not first.take("k", 2, 1)[0]
+    assert len(second) == 1
+
+
+def test_route_returns_429_with_retry_after():
+    app, _ = make_app(RATELIMIT_ROUTES="api_quiz=3/minute")
+    client = app.test_client()
+    codes = [client.post("/api/quiz").status_code for _ in range(4)]
+    assert codes == [200, 200, 200, 429]
+    resp = client.post("/api/quiz")
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) == 20
+    assert resp.get_json()["status"] == "error"
+
+    # Unlimited routes and other sessions are unaffected
+    assert client.get("/api/topics").status_code == 200
+    assert app.test_client().post("/api/quiz").status_code == 200
+
+
+def test_ip_bucket_caps_many_sessions():
+    app, _ = make_app(RATELIMIT_ROUTES={"api_quiz": "2/minute"}, RATELIMIT_IP_FACTOR=2)
+    codes = [app.test_client().post("/api/quiz").status_code for _ in range(6)]
+    assert codes == [200, 200, 200, 200, 429, 429]
+
+
+def test_client_address_from_trusted_proxies():
+    def codes(app, forwarded):
+        return [app.test_client().post("/api/quiz", environ_base={"REMOTE_ADDR": "10.0.0.1"},
+                                       headers={"X-Forwarded-For": value}).status_code
+                for value in forwarded]
+
+    limits = {"RATELIMIT_ROUTES": "api_quiz=1/minute", "RATELIMIT_IP_FACTOR": 2}
+    app, _ = make_app(PROXY_HOPS=1, **limits)
+    # Spoofed entries before the one the proxy appended do not make a new client
+    assert codes(app, ["1.1.1.1", "9.9.9.9, 1.1.1.1", "8.8.8.8, 1.1.1.1"]) == [200, 200, 429]
+    assert codes(app, ["2.2.2.2", "2.2.2.2"]) == [200, 200]
+
+    # Without trusted proxies the header is ignored: everyone is the proxy
+    app, _ = make_app(**limits)
+    assert codes(app, ["1.1.1.1", "2.2.2.2", "3.3.3.3"]) == [200, 200, 429]
+
+
+def test_limits_can_be_disabled():
+    app, limiter = make_app(RATELIMIT_ROUTES={"api_quiz": None})
+    assert "api_quiz" not in limiter.limits
+    app, _ = make_app(RATELIMIT_ENABLED=False, RATELIMIT_ROUTES="api_quiz=1/minute")
+    client = app.test_client()
+    assert [client.post("/api/quiz").status_code for _ in range(3)] == [200, 200, 200]
+
+
+def test_default_limits_cover_write_routes():
+    import app as web
+
+    limits = web.app.extensions["rate_limiter"].limits
+    for endpoint in ("api_quiz", "api_reflection", "api_baseline", "api_sync"):
+        assert endpoint in limits and endpoint in web.app.view_functions
+
+
+if __name__ == "__main__":
+    test_parse_rate()
+    test_bucket_allows_burst_then_refills()
+    test_memory_buckets_are_bounded()
+    test_route_returns_429_with_retry_after()
+    test_ip_bucket_caps_many_sessions()
+    test_client_address_from_trusted_proxies()
+    test_limits_can_be_disabled()
+    test_default_limits_cover_write_routes()
+    print("✅ All rate limit tests passed!")
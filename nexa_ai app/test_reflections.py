@@ -0,0 +1,174 @@
+"""
+Tests for the NEXA AI reflection analytics
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import engine
+import reflections
+from content import topic_id
+from models import StudentModel
+
+START = datetime(2026, 3, 2, 18, 0)
+
+
+def make_student():
+    student = StudentModel()
+    for topic, strength in {"cells": 0.5, "ratio": 0.4, "force": 0.6,
+                            "states of matter": 0.55}.items():
+        student.set_strength(topic, strength)
+    return student
+
+
+def signals(text):
+    return {reflections.TOPIC_NAMES[tid]: score
+            for tid, score in reflections.analyse(text)[1].items()}
+
+
+def test_topics_and_feelings_per_clause():
+    assert signals("Found ratio hard today") == {"ratio": 1}
+    assert signals("Ratio was easy but states of matter confused me") == {
+        "ratio": -1, "states of matter": 1}
+    assert signals("Cells were not hard. Force makes no sense") == {"cells": -1, "force": 1}
+    assert signals("Revised cells for an hour") == {"cells": 0}
+    # "separation of mixtures" contains "ratio" but is not the topic ratio
+    assert "ratio" not in signals("separation of mixtures is tricky")
+
+
+def test_terms_skip_stopwords_and_topics():
+    terms, _ = reflections.analyse("I was stuck on the ratio homework, the homework was long")
+    assert terms == {"stuck": 1, "homework": 2, "long": 1}
+
+
+def test_study_plan_pulls_hard_topics_forward():
+    student = make_student()
+    assert [item["topic"] for item in engine.study_plan(student, 2)] == ["ratio", "cells"]
+
+    engine.add_reflection(student, "Force was really difficult, I got stuck", when=START)
+    now = START.timestamp() + 60
+    assert reflections.topic_signal(student, "force", now) == pytest.approx(2, rel=1e-3)
+    plan = engine.study_plan(student, 2, now)
+    assert [item["topic"] for item in plan] == ["force", "ratio"]
+    assert plan[0]["priority"] == engine.priority(0.6 - engine.REFLECTION_WEIGHT) and plan[0]["reflection"] == 2.0
+
+
+def test_signals_fade():
+    student = make_student()
+    engine.add_reflection(student, "Found cells hard", when=START)
+    week = START.timestamp() + reflections.SIGNAL_HALF_LIFE
+    assert reflections.topic_signal(student, "cells", week) == pytest.approx(0.5)
+    engine.add_reflection(student, "Cells are hard", when=START + timedelta(days=7))
+    assert reflections.topic_signal(student, "cells", week) == pytest.approx(1.5)
+    assert reflections.topic_signal(student, "energy", week) == 0.0
+
+
+def test_each_entry_is_analysed_once(monkeypatch):
+    calls = []
+    analyse = reflections.analyse
+    monkeypatch.setattr(reflections, "analyse", lambda text, index=None: (
+        calls.append(text), analyse(text, index))[1])
+    student = make_student()
+    for i in range(5):
+        engine.add_reflection(student, f"Entry {i} about ratio", when=START)
+        reflections.topic_signal(student, "ratio")
+    assert calls == [f"Entry {i} about ratio" for i in range(5)]
+
+
+def test_stats_round_trip_and_catch_up():
+    student = make_student()
+    engine.add_reflection(student, "Ratio is confusing", when=START)
+    data = student.to_dict()
+    assert data["reflection_stats"]["n"] == 1
+    assert data["reflection_stats"]["terms"] == {"confusing": 1}
+
+    copy = StudentModel.from_dict(data)
+    assert reflections.topic_signal(copy, "ratio", START.timestamp()) == 1
+    assert copy.to_dict() == data
+
+    # Documents saved before the analytics existed are caught up once
+    old = dict(data, reflections=data["reflections"] * 3)
+    del old["reflection_stats"]
+    restored = StudentModel.from_dict(old)
+    stats = reflections.stats(restored)
+    assert stats.processed == 3 and stats.signal(topic_id("ratio"), START.timestamp()) == 3
+
+
+def test_legacy_and_synced_reflections_reach_the_plan():
+    import sync
+
+    data = make_student().to_dict()
+    data["reflections"] = ["Ratio is so confusing"]
+    student = StudentModel.from_dict(data)
+    assert student.reflections == [{"entry": "Ratio is so confusing"}]
+    assert reflections.topic_signal(student, "ratio") > 0
+    assert reflections.stats(student).processed == 1
+
+    server = make_student()
+    sync.merge(server, {"v": 0, "rc": 0, "r": [
+        {"entry": "Force was really difficult", "timestamp": START.isoformat()}]})
+    assert server.reflections[-1]["timestamp"] == START.isoformat()
+    assert reflections.topic_signal(server, "force", START.timestamp()) > 0
+    assert engine.study_plan(server, 1, START.timestamp())[0]["topic"] == "force"
+    with pytest.raises(ValueError):
+        sync.merge(server, {"v": 0, "rc": 0, "r": [{"entry": 5}]})
+
+
+def test_global_summary_counts_new_entries():
+    before = reflections.global_summary(100)
+    engine.add_reflection(make_student(), "Photosynthesis is so hard, leaves confuse me",
+                          when=START)
+    after = reflections.global_summary(100)
+    assert after["entries"] == before["entries"] + 1
+    assert dict(after["hard_topics"])["photosynthesis"] == \
+        dict(before["hard_topics"]).get("photosynthesis", 0) + 1
+    assert dict(after["terms"])["leaves"] >= 1
+
+
+def test_catch_up_is_not_counted_again():
+    student = make_student()
+    engine.add_reflection(student, "Force was really difficult", when=START)
+    data = student.to_dict()
+    del data["reflection_stats"]
+    before = reflections.global_summary(100)
+    assert reflections.stats(StudentModel.from_dict(data)).processed == 1
+    assert reflections.global_summary(100) == before
+
+
+def test_older_entries_keep_the_latest_timestamp():
+    student = make_student()
+    later = START + timedelta(days=7)
+    engine.add_reflection(student, "Cells are hard", when=later)
+    engine.add_reflection(student, "Found cells hard", when=START)
+    score, since = reflections.stats(student).signals[topic_id("cells")]
+    assert since == later.timestamp() and score == pytest.approx(1.5)
+    assert reflections.topic_signal(student, "cells", later.timestamp()) == pytest.approx(1.5)
+
+
+def test_reflection_route_feeds_the_plan(client, monkeypatch):
+    import app as web
+
+    monkeypatch.setitem(web.app.config, "ADMIN_TOKEN", "secret")
+    client.post("/api/baseline", json={"answers": {t: "a long answer here" for t in
+                                                   ("cells", "ratio", "force")}})
+    client.post("/api/reflection", json={"entry": "Still struggling with force. Ratio was fine"})
+
+    plan = client.get("/api/study-plan").get_json()["data"]
+    assert plan[0]["topic"] == "force" and plan[0]["reflection"] > 0
+    assert {item["topic"]: item["reflection"] for item in plan}["ratio"] < 0
+
+    summary = client.get("/api/admin/reflections",
+                         headers={"X-Admin-Token": "secret"}).get_json()["data"]
+    assert summary["entries"] >= 1
+
+
+if __name__ == "__main__":
+    test_topics_and_feelings_per_clause()
+    test_terms_skip_stopwords_and_topics()
+    test_study_plan_pulls_hard_topics_forward()
+    test_signals_fade()
+    test_stats_round_trip_and_catch_up()
+    test_legacy_and_synced_reflections_reach_the_plan()
+    test_global_summary_counts_new_entries()
+    print("✅ All reflection analytics tests passed!")
@@ -0,0 +1,77 @@
+"""
+Tests for the NEXA AI serialisation layer and storage
+"""
+
+import json
+from datetime import datetime
+
+from flask import Flask, jsonify
+
+import serialization
+import storage
+from json_provider import FastJSONProvider
+
+
+def test_round_trip_is_compact():
+    data = {"topic_strength": {"cells": 0.7}, "reflections": ["hard: ratio"]}
+    encoded = serialization.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert b" " not in encoded.replace(b"hard: ratio", b"")
+    assert serialization.loads(encoded) == data
+
+
+def test_float_noise_compacted():
+    data = {"topic_strength": {"ratio": 0.3 - 0.1, "cells": 0.7}}
+    encoded = serialization.encode_student(data)
+    assert b"0.19999999999999998" not in encoded
+    assert serialization.loads(encoded)["topic_strength"] == {"ratio": 0.2, "cells": 0.7}
+    # The caller's document is left untouched
+    assert data["topic_strength"]["ratio"] == 0.3 - 0.1
+
+
+def test_storage_round_trip(tmp_path):
+    path = str(tmp_path / "student.json")
+    student = storage.new_student()
+    student["topic_strength"]["algebra"] = 0.75
+    assert storage.save_student(student, path)
+    assert storage.load_student(path) == student
+
+
+def test_storage_reads_pretty_printed_files(tmp_path):
+    path = tmp_path / "student.json"
+    student = storage.new_student()
+    path.write_text(json.dumps(student, indent=4))
+    assert storage.load_student(str(path)) == student
+
+
+def test_storage_corrupted_file_starts_fresh(tmp_path):
+    path = tmp_path / "student.json"
+    path.write_text("{invalid json}")
+    assert storage.load_student(str(path)) == storage.new_student()
+
+
+def test_flask_provider():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+
+    @app.route("/")
+    def index():
+        return jsonify({"topic": "énergie", "when": datetime(2026, 2, 8, 12, 0)})
+
+    resp = app.test_client().get("/")
+    assert resp.get_json()["topic"] == "énergie"
+    assert resp.get_json()["when"].startswith("2026-02-08T12:00:00")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_round_trip_is_compact()
+    test_float_noise_compacted()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_storage_round_trip(Path(tmp))
+        test_storage_reads_pretty_printed_files(Path(tmp))
+        test_storage_corrupted_file_starts_fresh(Path(tmp))
+    test_flask_provider()
+    print("✅ All serialisation tests passed!")
@@ -0,0 +1,82 @@
+"""
+Cold start of the NEXA AI CLI
+Importing main and rendering the menu must stay fast even with a large
+content pack and a large student data file, because neither is read
+until the student picks an action, and no heavy module is imported.
+Run this file directly to time the cold start.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_MS = float(os.getenv("NEXA_STARTUP_BUDGET_MS", "50"))
+RUNS = 10
+HEAVY_MODULES = ("numpy", "sqlite3", "hashlib")
+
+PROBE = """
+import sys
+import time
+start = time.perf_counter()
+import main
+main.render_menu()
+elapsed = (time.perf_counter() - start) * 1000
+import content
+import json
+print(json.dumps([elapsed, main._student is None, content._pack is None,
+                  sorted(name for name in HEAVY_MODULES if name in sys.modules)]))
+""".replace("HEAVY_MODULES", repr(HEAVY_MODULES))
+
+
+def make_workspace(tmp_path):
+    subjects = {f"Subject {s}": [f"topic {s}-{t}" for t in range(500)] for s in range(20)}
+    topics = [topic for names in subjects.values() for topic in names]
+    pack = {"subjects": subjects, "explanations": {t: "An explanation. " * 20 for t in topics}}
+    (tmp_path / "pack.json").write_text(json.dumps(pack))
+
+    student = {
+        "username": "Student",
+        "baseline_done": True,
+        "topic_strength": {t: 0.5 for t in topics},
+        "mistakes": {t: 1 for t in topics[::3]},
+        "study_log": {t: 1700000000.0 for t in topics},
+        "reflections": [{"entry": "hard day " * 10, "timestamp": "2024-01-01"}] * 2000,
+    }
+    (tmp_path / "nexa-ai-student-data.json").write_text(json.dumps(student))
+    return tmp_path
+
+
+@pytest.fixture
+def large_workspace(tmp_path):
+    return make_workspace(tmp_path)
+
+
+def cold_start(workspace):
+    env = dict(os.environ, PYTHONPATH=APP_DIR, NEXA_CONTENT_PACK=str(workspace / "pack.json"))
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=workspace, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def test_menu_renders_without_loading_data(large_workspace):
+    _, student_lazy, pack_lazy, _ = cold_start(large_workspace)
+    assert student_lazy and pack_lazy
+
+
+def test_menu_imports_no_heavy_modules(large_workspace):
+    assert cold_start(large_workspace)[3] == []
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = make_workspace(pathlib.Path(tmp))
+        timings = [cold_start(workspace)[0] for _ in range(RUNS)]
+        print(f"CLI cold start: best {min(timings):.1f} ms, worst {max(timings):.1f} ms "
+              f"(budget {BUDGET_MS:.0f} ms)")
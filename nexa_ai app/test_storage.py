@@ -0,0 +1,146 @@
+"""
+Tests for the NEXA AI sharded per-student file store
+"""
+
+import io
+import os
+import threading
+
+import pytest
+
+import bulk
+import storage
+
+
+def student(name, strength=0.5):
+    data = storage.new_student()
+    data["username"] = name
+    data["topic_strength"] = {"cells": strength}
+    return data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return storage.ShardedFileStore(str(tmp_path / "students"))
+
+
+def test_round_trip_and_layout(store):
+    assert store.save("alice", student("Alice"))
+    assert store.save("class 9/bob", student("Bob"))
+    assert store.load("alice")["username"] == "Alice"
+    assert store.load("class 9/bob")["username"] == "Bob"
+    assert store.load("nobody") is None
+
+    path = store._index["class 9/bob"]
+    shard = os.path.relpath(os.path.dirname(path), store.root)
+    assert len(shard.split(os.sep)) == 2
+    assert os.path.basename(path) == "class%209%2Fbob.json"
+
+
+def test_save_replaces_atomically(store):
+    store.save("alice", student("Alice", 0.3))
+    store.save("alice", student("Alice", 0.9))
+    assert store.load("alice")["topic_strength"] == {"cells": 0.9}
+    shard = os.path.dirname(store._index["alice"])
+    assert os.listdir(shard) == ["alice.json"]
+
+
+def test_lookups_use_the_index(store, monkeypatch):
+    store.save("alice", student("Alice"))
+
+    def no_listing(*args):
+        raise AssertionError("directory listed")
+
+    monkeypatch.setattr(os, "scandir", no_listing)
+    monkeypatch.setattr(os, "listdir", no_listing)
+    assert store.load("alice")["username"] == "Alice"
+    assert store.load("missing") is None
+    assert store.save("carol", student("Carol"))
+    monkeypatch.undo()
+    assert [sid for sid, _ in store.iter_students()] == ["alice", "carol"]
+
+
+def test_reopen_rebuilds_index_and_cleans_temp_files(store):
+    store.save_many((f"s{i}", student(f"S{i}")) for i in range(50))
+    shard = os.path.dirname(store._index["s7"])
+    for name in (".99.tmp", ".100.tmp"):
+        with open(os.path.join(shard, name), "wb") as f:
+            f.write(b"{half a stud")
+    old = os.path.getmtime(os.path.join(shard, ".99.tmp")) - 2 * store.TEMP_MAX_AGE
+    os.utime(os.path.join(shard, ".99.tmp"), (old, old))
+
+    reopened = storage.ShardedFileStore(store.root)
+    assert len(reopened) == 50
+    assert reopened.load("s7")["username"] == "S7"
+    # A recent temp file may belong to a save in progress in another worker
+    assert sorted(name for name in os.listdir(shard) if name.endswith(".tmp")) == [".100.tmp"]
+
+
+def test_sees_students_saved_by_another_worker(store):
+    other = storage.ShardedFileStore(store.root)
+    assert store.save("bob", student("Bob"))
+    assert other.load("bob")["username"] == "Bob"
+    assert store.save("carol", student("Carol"))
+    assert [sid for sid, _ in other.iter_students()] == ["bob", "carol"]
+
+
+def test_big_batches_hold_no_files_open(store):
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (64, hard))
+    try:
+        assert store.save_many((f"s{i}", student(f"S{i}")) for i in range(500)) == 500
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert len(store) == 500 and store.load("s499")["username"] == "S499"
+
+
+def test_concurrent_saves_share_fsyncs(store, monkeypatch):
+    barrier = threading.Barrier(16)
+    fsync, outside = os.fsync, []
+
+    def leader_fsync(fd):
+        # Only a batch leader syncs, for every writer queued behind it
+        if not store._commit._flushing:
+            outside.append(fd)
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", leader_fsync)
+
+    def writer(n):
+        barrier.wait()
+        for i in range(10):
+            assert store.save(f"w{n}-{i}", student(f"W{n}", i / 10))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store) == 160
+    assert store._commit.batches < 160 and outside == []
+    assert store.load("w3-9")["topic_strength"] == {"cells": 0.9}
+
+
+def test_selected_by_configuration(tmp_path):
+    store = storage.open_store(f"sharded:{tmp_path / 'students'}")
+    assert isinstance(store, storage.ShardedFileStore)
+    data = b"".join(b'{"id": "s%d", "student": {"username": "S"}}\n' % i for i in range(30))
+    assert bulk.import_ndjson(store, io.BytesIO(data), batch_size=8)["imported"] == 30
+    assert len(storage.open_store(f"sharded:{tmp_path / 'students'}")) == 30
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (test_round_trip_and_layout, test_save_replaces_atomically,
+                 test_reopen_rebuilds_index_and_cleans_temp_files,
+                 test_sees_students_saved_by_another_worker):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(storage.ShardedFileStore(os.path.join(tmp, "students")))
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as mp:
+        test_concurrent_saves_share_fsyncs(storage.ShardedFileStore(os.path.join(tmp, "students")), mp)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_selected_by_configuration(pathlib.Path(tmp))
+    print("✅ All storage tests passed!")
@@ -0,0 +1,150 @@
+"""
+Tests for NEXA AI delta sync against a local server instance
+"""
+
+import pytest
+
+import app as web
+import engine
+import storage
+import sync
+from models import StudentModel
+
+
+@pytest.fixture
+def server(client):
+    def transport(payload):
+        resp = client.post("/api/sync", data=payload,
+                           headers={"Content-Encoding": "deflate", "Accept-Encoding": "deflate"})
+        assert resp.status_code == 200, resp.data
+        return resp.data, resp.headers.get("Content-Encoding")
+
+    return transport
+
+
+def baselined_student():
+    student = StudentModel()
+    engine.apply_baseline(student, {"cells": "basic unit of life", "ratio": "no", "force": "push or pull"})
+    return student
+
+
+def server_student():
+    return web._student_cache[web.DEFAULT_STUDENT_ID]
+
+
+def test_first_sync_uploads_and_second_is_tiny(server):
+    student, state = baselined_student(), sync.SyncState()
+    sync.sync(student, state, server)
+    assert server_student().to_dict()["topic_strength"] == student.to_dict()["topic_strength"]
+    assert server_student().baseline_done
+
+    engine.answer_quiz(student, "ratio", "ratio compares", now=1000.0)
+    sent, received = sync.sync(student, state, server)
+    assert sent < 200 and received < 300
+    assert server_student().get_strength("ratio") == pytest.approx(0.35)
+    assert server_student().last_studied("ratio") == 1000.0
+
+
+def test_unchanged_sync_sends_no_topics(server):
+    student, state = baselined_student(), sync.SyncState()
+    sync.sync(student, state, server)
+    assert "t" not in sync.build_delta(student, state)
+
+
+def test_concurrent_changes_merge_deterministically(server):
+    laptop, laptop_state = baselined_student(), sync.SyncState()
+    sync.sync(laptop, laptop_state, server)
+    phone = StudentModel()
+    phone_state = sync.SyncState()
+    sync.sync(phone, phone_state, server)
+    assert phone.to_dict()["topic_strength"] == laptop.to_dict()["topic_strength"]
+
+    # Both devices study offline
+    engine.answer_quiz(laptop, "cells", "cells", now=2000.0)          # +0.05
+    engine.answer_quiz(phone, "cells", "", now=3000.0)                 # -0.1, one mistake
+    engine.answer_quiz(phone, "force", "", now=2500.0)
+    engine.add_reflection(laptop, "cells are tricky")
+    engine.add_reflection(phone, "force too")
+
+    sync.sync(laptop, laptop_state, server)
+    sync.sync(phone, phone_state, server)
+    sync.sync(laptop, laptop_state, server)
+
+    for device in (laptop, phone, server_student()):
+        data = device.to_dict()
+        assert data["topic_strength"]["cells"] == pytest.approx(0.65)
+        assert data["mistakes"] == {"cells": 1, "force": 1}
+        assert data["study_log"]["cells"] == 3000.0
+        assert [r["entry"] for r in data["reflections"]] == ["cells are tricky", "force too"]
+    assert engine.readiness_score(laptop) == engine.readiness_score(phone)
+
+
+def test_first_writer_wins_for_new_topics(server):
+    first, second = StudentModel(), StudentModel()
+    first.set_strength("motion", 0.7)
+    second.set_strength("motion", 0.3)
+    first_state, second_state = sync.SyncState(), sync.SyncState()
+    sync.sync(first, first_state, server)
+    sync.sync(second, second_state, server)
+    assert second.get_strength("motion") == 0.7
+
+
+def test_sync_state_persists(tmp_path):
+    path = str(tmp_path / "state.json")
+    state = sync.SyncState(version=7, reflections=2, base={"cells": [0.7, 0, None]})
+    state.save(path)
+    loaded = sync.SyncState.load(path)
+    assert (loaded.client_id, loaded.version, loaded.reflections) == (state.client_id, 7, 2)
+    assert loaded.base == state.base
+
+
+def test_bad_payload_rejected(server):
+    resp = web.app.test_client().post("/api/sync", data=b"not deflate",
+                                      headers={"Content-Encoding": "deflate"})
+    assert resp.status_code == 400
+
+
+def test_unknown_topics_rejected(server):
+    import content
+
+    interned = len(content.TOPIC_NAMES)
+    delta = {"v": 0, "rc": 0, "t": {f"junk {i}": [0.5, None, 0, None] for i in range(100)}}
+    resp = web.app.test_client().post("/api/sync", data=sync.encode(delta),
+                                      headers={"Content-Encoding": "deflate"})
+    assert resp.status_code == 400 and len(content.TOPIC_NAMES) == interned
+
+
+@pytest.mark.parametrize("bad", [[0.5, None, "bad", None], ["bad", None, 0, None],
+                                 [0.5, None, 0, "bad"], [0.5, None], "bad"])
+def test_bad_topic_leaves_the_student_untouched(server, client, bad):
+    student, state = baselined_student(), sync.SyncState()
+    sync.sync(student, state, server)
+    before = server_student().to_dict()
+
+    delta = {"v": 0, "rc": 0, "t": {"force": [0.9, None, 2, 5000.0], "cells": bad},
+             "r": ["half a sync"]}
+    resp = client.post("/api/sync", data=sync.encode(delta), headers={"Content-Encoding": "deflate"})
+    assert resp.status_code == 400
+    assert server_student().to_dict() == before
+
+    client.post("/api/reflection", json={"entry": "a later save"})
+    stored = storage.get_store().load(web.DEFAULT_STUDENT_ID)
+    assert stored["topic_strength"] == before["topic_strength"]
+    assert stored["mistakes"] == before["mistakes"]
+    assert [r["entry"] for r in stored["reflections"]] == ["a later save"]
+
+
+def test_cannot_sync_another_student(client, tmp_path, monkeypatch):
+    store = storage.SQLiteStore(str(tmp_path / "students.db"))
+    monkeypatch.setattr(storage, "_store", store)
+    alice = baselined_student()
+    engine.add_reflection(alice, "private thoughts")
+    store.save("alice", alice.to_dict())
+    for delta in ({"s": "alice", "v": 0, "rc": 0},
+                  {"s": "alice", "v": 0, "rc": 0, "t": {"cells": [0.1, 0.7, 0, None]}}):
+        resp = client.post("/api/sync", data=sync.encode(delta),
+                           headers={"Content-Encoding": "deflate"})
+        assert resp.status_code == 403 and b"private" not in resp.data
+    assert store.load("alice") == alice.to_dict()
+    store.close()
+